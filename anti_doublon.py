@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+MANGUI FI - INDEX ANTI-DOUBLON
+Dernier pointage de chaque agent gardé en mémoire : vérification en O(1)
+"""
+
+import threading
+import time
+
+
+class IndexAntiDoublon:
+    """Dictionnaire agent -> timestamp du dernier pointage, reconstruit au démarrage"""
+
+    def __init__(self, fenetre=25):
+        self.fenetre = fenetre                # Secondes minimum entre deux pointages d'un même agent
+        self.derniers = {}
+        self._verrou = threading.Lock()
+
+    def charger(self, stockage, maintenant=None):
+        """Reconstruit l'index depuis la fin du stockage (seule la fenêtre récente compte)"""
+        maintenant = time.time() if maintenant is None else maintenant
+        with self._verrou:
+            self.derniers = dict(stockage.derniers_par_agent(maintenant - self.fenetre))
+        return self
+
+    def est_doublon(self, agent, maintenant=None):
+        """Vrai si l'agent a déjà pointé dans la fenêtre anti-doublon"""
+        maintenant = time.time() if maintenant is None else maintenant
+        dernier = self.derniers.get(agent)
+        return dernier is not None and maintenant - dernier < self.fenetre
+
+    def enregistrer(self, agent, timestamp):
+        """Mémorise un pointage accepté"""
+        with self._verrou:
+            if timestamp > self.derniers.get(agent, float('-inf')):
+                self.derniers[agent] = timestamp
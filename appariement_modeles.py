@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+MANGUI FI - APPARIEMENT DE MODÈLES DE PIXELS
+Toutes les variations de toutes les personnes sont empilées dans un seul tenseur
+(uint8 pour L1, float32 centré-normé pour la corrélation) : une vignette est comparée
+à tous les modèles en une passe vectorisée. Reconnaissance de secours sur CPU, sans dlib.
+
+Les modèles viennent de vignettes ajoutées une à une, ou d'une galerie de pixels écrite
+par photo_aug.py (variations de toute l'équipe, ou modèle moyen d'Alphonse).
+
+Banc (boucle modèle par modèle contre passe empilée) :
+    python3 appariement_modeles.py --dossier dev_data/ --variations 12
+    python3 appariement_modeles.py --dossier dev_data/ --galerie modeles_augmentes.gal
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+METHODES = ('l1', 'ncc')
+
+
+class AppariementModeles:
+    """Modèles empilés (une ligne par variation), scores vectorisés par modèle puis par personne"""
+
+    def __init__(self, taille=(64, 64), methode='ncc', egaliser=True):
+        if methode not in METHODES:
+            raise ValueError(f"méthode inconnue: {methode} ({', '.join(METHODES)})")
+        self.taille = taille                  # (largeur, hauteur) des vignettes comparées
+        self.methode = methode                # 'l1' : 1 - écart absolu moyen, 'ncc' : corrélation normalisée
+        self.egaliser = egaliser              # Égalisation d'histogramme avant comparaison
+        self.noms = []                        # Personnes distinctes
+        self.variations = []                  # Libellé de chaque ligne
+        self._ids = np.zeros(0, dtype=np.int32)
+        self._pixels = np.zeros((0, taille[0] * taille[1]), dtype=np.uint8)
+        self._normes = np.zeros((0, taille[0] * taille[1]), dtype=np.float32)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def pretraiter(self, visage):
+        """Vignette en niveaux de gris à la taille des modèles, aplatie (uint8)"""
+        if visage.ndim == 3:
+            visage = cv2.cvtColor(visage, cv2.COLOR_BGR2GRAY)
+        if visage.shape[1] != self.taille[0] or visage.shape[0] != self.taille[1]:
+            visage = cv2.resize(visage, self.taille)
+        if self.egaliser:
+            visage = cv2.equalizeHist(visage)
+        return np.ascontiguousarray(visage, dtype=np.uint8).reshape(-1)
+
+    @staticmethod
+    def _centrer_normer(pixels):
+        """Lignes centrées et de norme 1 : la corrélation devient un produit scalaire"""
+        lignes = pixels.astype(np.float32)
+        lignes -= lignes.mean(axis=1, keepdims=True)
+        normes = np.linalg.norm(lignes, axis=1, keepdims=True)
+        lignes /= np.maximum(normes, 1e-6)
+        return lignes
+
+    def ajouter(self, nom, visages, variations=None):
+        """Ajoute les vignettes d'une personne (une ligne par variation)"""
+        if not len(visages):
+            return
+        pixels = np.stack([self.pretraiter(v) for v in visages])
+        if nom not in self.noms:
+            self.noms.append(nom)
+        identite = self.noms.index(nom)
+        self._pixels = np.concatenate([self._pixels, pixels])
+        self._normes = np.concatenate([self._normes, self._centrer_normer(pixels)])
+        self._ids = np.concatenate([self._ids, np.full(len(pixels), identite, dtype=np.int32)])
+        self.variations += list(variations) if variations is not None else [nom] * len(pixels)
+
+    def charger(self, chemin):
+        """Remplace les modèles par une galerie de pixels écrite par photo_aug.py (format_galerie)"""
+        from format_galerie import lire_galerie
+
+        fichier = lire_galerie(chemin)
+        taille = tuple(fichier.metadonnees.get('taille_visage', self.taille))
+        if taille != tuple(self.taille) or fichier.dimension != self.taille[0] * self.taille[1]:
+            raise ValueError(f"vignettes {taille} dans {chemin}, {tuple(self.taille)} attendues")
+        # Lignes déjà redimensionnées et égalisées par le moteur d'augmentation : pas de pretraiter()
+        self._pixels = np.clip(np.rint(fichier.matrice), 0, 255).astype(np.uint8)
+        self._normes = self._centrer_normer(self._pixels)
+        self._ids = np.array(fichier.ids, dtype=np.int32)
+        self.noms = list(fichier.identites)
+        # Variations de l'équipe : une ligne par (photo, variation), dans l'ordre de la spécification
+        libelles = fichier.metadonnees.get('variations') or []
+        if libelles and len(fichier) % len(libelles) == 0:
+            self.variations = libelles * (len(fichier) // len(libelles))
+        else:
+            self.variations = [self.noms[i] for i in self._ids.tolist()]
+        return self
+
+    def scores(self, visages):
+        """Scores vignettes × modèles (plus grand = plus ressemblant) ; une vignette seule donne un vecteur"""
+        seule = isinstance(visages, np.ndarray) and visages.ndim in (2, 3) and \
+            (visages.ndim == 2 or visages.shape[2] == 3)
+        lot = np.stack([self.pretraiter(v) for v in ([visages] if seule else visages)])
+        if self.methode == 'ncc':
+            resultat = self._centrer_normer(lot) @ self._normes.T
+        else:
+            # |a - b| sans débordement en uint8, somme sur uint32, une vignette à la fois (mémoire M × D)
+            resultat = np.empty((len(lot), len(self._pixels)), dtype=np.float32)
+            for i, vignette in enumerate(lot):
+                ecarts = np.maximum(self._pixels, vignette) - np.minimum(self._pixels, vignette)
+                resultat[i] = ecarts.sum(axis=1, dtype=np.uint32)
+            resultat = 1.0 - resultat / (255.0 * self._pixels.shape[1])
+        return resultat[0] if seule else resultat
+
+    def scores_personnes(self, visages, agregation='max'):
+        """Score par personne : meilleure variation ('max') ou moyenne des variations ('moyenne')"""
+        scores = self.scores(visages)
+        seule = scores.ndim == 1
+        scores = np.atleast_2d(scores)
+        if agregation == 'max':
+            resultat = np.full((len(scores), len(self.noms)), -np.inf, dtype=np.float32)
+            np.maximum.at(resultat.T, self._ids, scores.T)
+        elif agregation == 'moyenne':
+            resultat = np.zeros((len(scores), len(self.noms)), dtype=np.float32)
+            np.add.at(resultat.T, self._ids, scores.T)
+            resultat /= np.bincount(self._ids, minlength=len(self.noms))
+        else:
+            raise ValueError(f"agrégation inconnue: {agregation}")
+        return resultat[0] if seule else resultat
+
+    def identifier(self, visage, seuil, agregation='max'):
+        """(nom, score) de la personne la plus proche, ("INCONNU", score) sous le seuil"""
+        if not self.noms:
+            return "INCONNU", 0.0
+        scores = self.scores_personnes(visage, agregation)
+        meilleur = int(np.argmax(scores))
+        score = float(scores[meilleur])
+        return (self.noms[meilleur] if score >= seuil else "INCONNU"), score
+
+
+def variations_rapides(visage):
+    """Quelques variations simples (miroir, luminosité, flou, rotations) pour le banc"""
+    h, w = visage.shape[:2]
+    variations = [visage, cv2.flip(visage, 1),
+                  cv2.convertScaleAbs(visage, alpha=1.2), cv2.convertScaleAbs(visage, alpha=0.8),
+                  cv2.GaussianBlur(visage, (3, 3), 0)]
+    for angle in (-10, -5, 5, 10):
+        matrice = cv2.getRotationMatrix2D((w // 2, h // 2), angle, 1.0)
+        variations.append(cv2.warpAffine(visage, matrice, (w, h), borderMode=cv2.BORDER_REFLECT))
+    return variations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Banc de l'appariement de modèles empilés")
+    parser.add_argument('--dossier', default="dev_data", help="une photo par personne")
+    parser.add_argument('--variations', type=int, default=9, help="variations gardées par personne")
+    parser.add_argument('--methode', choices=METHODES, default='l1')
+    parser.add_argument('--requetes', type=int, default=200)
+    parser.add_argument('--galerie', default=None,
+                        help="modèles lus dans une galerie de photo_aug.py (ex. modeles_augmentes.gal)")
+    args = parser.parse_args()
+
+    from sources_frames import lister_images
+
+    appariement = AppariementModeles(methode=args.methode)
+    vignettes = []
+    for chemin in lister_images(args.dossier):
+        image = cv2.imread(chemin, cv2.IMREAD_GRAYSCALE)
+        if image is None:
+            continue
+        # Vignette centrale : le banc mesure la comparaison, pas la détection
+        h, w = image.shape
+        cote = min(h, w) // 2
+        visage = cv2.resize(image[h // 2 - cote // 2:h // 2 + cote // 2, w // 2 - cote // 2:w // 2 + cote // 2],
+                            appariement.taille)
+        if not args.galerie:
+            variations = variations_rapides(visage)[:args.variations]
+            appariement.ajouter(os.path.splitext(os.path.basename(chemin))[0], variations)
+        vignettes.append(visage)
+    if not vignettes:
+        print(f"❌ Aucune image dans {args.dossier}")
+        return 1
+    if args.galerie:
+        try:
+            appariement.charger(args.galerie)
+        except Exception as e:
+            print(f"❌ Erreur chargement galerie: {e}")
+            return 1
+
+    rng = np.random.default_rng(0)
+    requetes = [cv2.convertScaleAbs(vignettes[i], alpha=1.1, beta=-5)
+                for i in rng.integers(0, len(vignettes), args.requetes)]
+    print(f"\n🧪 APPARIEMENT - {len(appariement.noms)} personnes, {len(appariement)} modèles, "
+          f"{len(requetes)} requêtes ({args.methode})")
+
+    # Ancienne approche : un modèle à la fois (cv2.absdiff + np.mean, comme comparer_avec_alphonse)
+    modeles = [ligne.reshape(appariement.taille[1], appariement.taille[0]) for ligne in appariement._pixels]
+    debut = time.perf_counter()
+    for requete in requetes:
+        vignette = appariement.pretraiter(requete).reshape(appariement.taille[1], appariement.taille[0])
+        [1 - np.mean(cv2.absdiff(vignette, modele)) / 255.0 for modele in modeles]
+    duree_boucle = (time.perf_counter() - debut) / len(requetes)
+
+    debut = time.perf_counter()
+    for requete in requetes:
+        appariement.scores_personnes(requete)
+    duree_empilee = (time.perf_counter() - debut) / len(requetes)
+
+    debut = time.perf_counter()
+    appariement.scores_personnes(requetes)
+    duree_lot = (time.perf_counter() - debut) / len(requetes)
+
+    print(f"   Boucle   : {duree_boucle * 1000:.3f} ms/vignette")
+    print(f"   Empilée  : {duree_empilee * 1000:.3f} ms/vignette ({duree_boucle / duree_empilee:.1f}x)")
+    print(f"   Par lot  : {duree_lot * 1000:.3f} ms/vignette ({duree_boucle / duree_lot:.1f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
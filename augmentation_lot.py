@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+MANGUI FI - AUGMENTATION PAR LOTS
+Moteur d'augmentation déclaratif : toutes les vignettes d'un lot (N × H × W) passent
+ensemble par chaque variation. Les opérations photométriques sont diffusées sur tout le
+lot, les déformations géométriques (miroir, rotation, zoom) réduites à une carte de
+rééchantillonnage par variation, partagée par toutes les vignettes.
+
+Une variation est un libellé et un dictionnaire d'opérations, appliquées dans l'ordre :
+    miroir, rotation (degrés), zoom (facteur)     -> une seule transformation affine
+    contraste (facteur), luminosite (facteur)     -> photométrie
+    flou (taille du noyau gaussien), bruit (écart-type), egalisation
+
+generer() produit les variations à la demande, lot par lot, sans rien écrire sur disque :
+même graine et mêmes vignettes -> mêmes variations.
+"""
+
+from itertools import islice
+
+import cv2
+import numpy as np
+
+# Les 12 variations historiques de photo_aug
+SPEC_DEFAUT = [
+    ("Original", {}),
+    ("Luminosité +20%", {'luminosite': 1.2}),
+    ("Luminosité -20%", {'luminosite': 0.8}),
+    ("Contraste +30%", {'contraste': 1.3}),
+    ("Rotation -5°", {'rotation': -5}),
+    ("Rotation +5°", {'rotation': 5}),
+    ("Flou léger", {'flou': 3}),
+    ("Zoom 105%", {'zoom': 1.05}),
+    ("Zoom 95%", {'zoom': 0.95}),
+    ("Bruit léger", {'bruit': 5}),
+    ("Égalisation renforcée", {'egalisation': True}),
+    ("Miroir horizontal", {'miroir': True}),
+]
+
+OPERATIONS = ('miroir', 'rotation', 'zoom', 'contraste', 'luminosite', 'flou', 'bruit', 'egalisation')
+
+
+def egaliser_lot(lot):
+    """equalizeHist de chaque vignette d'un lot uint8 (N × H × W), histogrammes calculés ensemble"""
+    n = len(lot)
+    plat = lot.reshape(n, -1)
+    histogrammes = np.bincount((plat + (np.arange(n) * 256)[:, None]).ravel(),
+                               minlength=n * 256).reshape(n, 256)
+    cumul = np.cumsum(histogrammes, axis=1)
+    # Même table que OpenCV : 0 jusqu'au premier niveau présent, puis cumul étiré sur 0..255
+    premier = np.take_along_axis(cumul, np.argmax(histogrammes > 0, axis=1)[:, None], axis=1)
+    total = plat.shape[1]
+    echelle = 255.0 / np.maximum(total - premier, 1)
+    tables = np.clip(np.rint((cumul - premier) * echelle), 0, 255).astype(np.uint8)
+    # Image uniforme : inchangée
+    uniformes = (premier[:, 0] == total)
+    if uniformes.any():
+        tables[uniformes] = np.arange(256, dtype=np.uint8)
+    return np.take_along_axis(tables, plat.astype(np.intp), axis=1).reshape(lot.shape)
+
+
+def _par_paquets(lot, operation):
+    """Applique une opération OpenCV aux vignettes groupées par 4 en canaux d'une même image"""
+    n, h, w = lot.shape
+    resultat = np.empty_like(lot)
+    for i in range(0, n, 4):
+        paquet = np.ascontiguousarray(lot[i:i + 4].transpose(1, 2, 0))
+        resultat[i:i + 4] = operation(paquet).reshape(h, w, -1).transpose(2, 0, 1)
+    return resultat
+
+
+def flou_lot(lot, taille_noyau):
+    """GaussianBlur (sigma automatique) de tout un lot"""
+    return _par_paquets(lot, lambda paquet: cv2.GaussianBlur(paquet, (taille_noyau, taille_noyau), 0))
+
+
+def deformer_lot(lot, matrice, reflechir=True):
+    """warpAffine bilinéaire de tout un lot avec la même matrice (2 × 3, sens direct)"""
+    h, w = lot.shape[1:]
+    # Carte de rééchantillonnage calculée une fois (virgule fixe), partagée par toutes les vignettes
+    inverse = cv2.invertAffineTransform(matrice)
+    ys, xs = np.mgrid[0:h, 0:w].astype(np.float32)
+    carte_x = (inverse[0, 0] * xs + inverse[0, 1] * ys + inverse[0, 2]).astype(np.float32)
+    carte_y = (inverse[1, 0] * xs + inverse[1, 1] * ys + inverse[1, 2]).astype(np.float32)
+    carte1, carte2 = cv2.convertMaps(carte_x, carte_y, cv2.CV_16SC2)
+    bord = cv2.BORDER_REFLECT if reflechir else cv2.BORDER_CONSTANT
+    return _par_paquets(lot, lambda paquet: cv2.remap(paquet, carte1, carte2, cv2.INTER_LINEAR,
+                                                       borderMode=bord))
+
+
+class MoteurAugmentation:
+    """Applique une spécification de variations à des lots de vignettes de visages"""
+
+    def __init__(self, spec=None, taille=(64, 64), graine=None):
+        self.spec = list(spec if spec is not None else SPEC_DEFAUT)
+        for libelle, operations in self.spec:
+            inconnues = set(operations) - set(OPERATIONS)
+            if inconnues:
+                raise ValueError(f"opération inconnue dans '{libelle}': {', '.join(sorted(inconnues))}")
+        self.taille = taille                  # (largeur, hauteur) des vignettes produites
+        self.graine = graine                  # None = bruit différent à chaque appel
+        self.rng = np.random.RandomState(graine)
+
+    @property
+    def libelles(self):
+        return [libelle for libelle, _ in self.spec]
+
+    def preparer(self, visages):
+        """Vignettes de tailles quelconques -> lot uint8 N × H × W redimensionné et égalisé"""
+        lot = np.stack([cv2.resize(v if v.ndim == 2 else cv2.cvtColor(v, cv2.COLOR_BGR2GRAY), self.taille)
+                        for v in visages])
+        return egaliser_lot(lot)
+
+    def _matrice(self, operations):
+        """Transformation affine d'une variation (None si aucune opération géométrique)"""
+        if not any(cle in operations for cle in ('miroir', 'rotation', 'zoom')):
+            return None
+        w, h = self.taille
+        # Rotation et zoom autour du centre de la vignette
+        matrice = cv2.getRotationMatrix2D((w // 2, h // 2), operations.get('rotation', 0),
+                                          operations.get('zoom', 1.0))
+        if operations.get('miroir'):
+            miroir = np.array([[-1, 0, w - 1], [0, 1, 0], [0, 0, 1]], dtype=np.float64)
+            matrice = miroir[:2] @ np.vstack([matrice, [0, 0, 1]])
+        return matrice
+
+    def appliquer(self, lot, operations):
+        """Une variation sur tout le lot"""
+        resultat = lot
+        matrice = self._matrice(operations)
+        if matrice is not None:
+            # Dézoom : fond noir autour du visage réduit ; sinon bord réfléchi
+            resultat = deformer_lot(resultat, matrice, reflechir=operations.get('zoom', 1.0) >= 1.0)
+        if 'contraste' in operations:
+            flottant = resultat.astype(np.float32)
+            moyennes = flottant.mean(axis=(1, 2), keepdims=True)
+            resultat = np.clip((flottant - moyennes) * operations['contraste'] + moyennes, 0, 255).astype(np.uint8)
+        if 'luminosite' in operations:
+            resultat = np.clip(resultat.astype(np.float32) * operations['luminosite'], 0, 255).astype(np.uint8)
+        if operations.get('flou'):
+            resultat = flou_lot(resultat, operations['flou'])
+        if operations.get('bruit'):
+            bruit = self.rng.normal(0, operations['bruit'], resultat.shape).astype(np.float32)
+            resultat = np.clip(resultat.astype(np.float32) + bruit, 0, 255).astype(np.uint8)
+        if operations.get('egalisation'):
+            resultat = egaliser_lot(resultat)
+        return resultat
+
+    def augmenter(self, lot):
+        """Toutes les variations d'un lot N × H × W -> tableau uint8 N × V × H × W"""
+        lot = np.asarray(lot, dtype=np.uint8)
+        variations = np.empty((len(lot), len(self.spec)) + lot.shape[1:], dtype=np.uint8)
+        for v, (_, operations) in enumerate(self.spec):
+            variations[:, v] = self.appliquer(lot, operations)
+        return variations
+
+    def generer(self, visages, taille_lot=256):
+        """Variations à la demande : (indice du visage, libellé, vignette), calculées par lots
+
+        visages peut être un générateur (photos lues et détectées au fil de l'eau) : seul
+        le lot en cours est en mémoire. Le bruit repart de la graine à chaque appel.
+        """
+        self.rng = np.random.RandomState(self.graine)
+        visages = iter(visages)
+        debut = 0
+        while True:
+            paquet = list(islice(visages, taille_lot))
+            if not paquet:
+                return
+            variations = self.augmenter(self.preparer(paquet))
+            for i in range(len(paquet)):
+                for v, libelle in enumerate(self.libelles):
+                    yield debut + i, libelle, variations[i, v]
+            debut += len(paquet)
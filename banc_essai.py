@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+MANGUI FI - BANC D'ESSAI HORS LIGNE
+Alimente le moteur de reconnaissance avec des photos, des vidéos ou des séquences
+synthétiques (sans caméra) et mesure latence par étape, frames/s et exactitude
+
+Exemples :
+    python3 banc_essai.py                                   # dev_data/ + marie/
+    python3 banc_essai.py --synthetique 30 --frame-skip 2
+    python3 banc_essai.py --video couloir_ALLA_NIANG.mp4 --taille-traitement 480x360
+    python3 banc_essai.py --modele cnn --seuil 0.55 --json rapport.json
+    python3 banc_essai.py --latence-cible 120              # avec le contrôleur adaptatif
+
+Vérité terrain : le nom de fichier. Une photo dont le nom contient tous les mots d'une
+identité de la galerie doit être reconnue comme elle, toute autre photo doit rester INCONNU.
+"""
+
+import argparse
+import contextlib
+import importlib
+import json
+import os
+import sys
+import tempfile
+import time
+import unicodedata
+
+import cv2
+
+from instrumentation import MesuresLatence
+from sources_frames import SourceVideo, cadrer, sequence_synthetique
+from sources_frames import lister_images as lister_images_dossier
+
+DOSSIER = os.path.dirname(os.path.abspath(__file__))
+
+
+def mots(texte):
+    """'El Hadji Malick Ndiaye_' -> {'EL', 'HADJI', 'MALICK', 'NDIAYE'} (sans accents ni ponctuation)"""
+    texte = unicodedata.normalize('NFKD', texte).encode('ascii', 'ignore').decode('ascii')
+    return set(''.join(c if c.isalnum() else ' ' for c in texte.upper()).split())
+
+
+def verite_terrain(chemin, identites):
+    """Identité attendue d'après le nom de fichier, ou None (personne hors galerie)"""
+    mots_fichier = mots(os.path.splitext(os.path.basename(chemin))[0])
+    for nom in identites:
+        if mots(nom) <= mots_fichier:
+            return nom
+    return None
+
+
+def frames_video(chemin, taille):
+    """Frames d'un fichier vidéo, à la taille caméra, sans cadencement temps réel"""
+    source = SourceVideo(chemin, taille, temps_reel=False)
+    try:
+        while True:
+            ret, frame = source.read()
+            if not ret:
+                break
+            yield frame
+    finally:
+        source.release()
+
+
+def lister_images(dossiers):
+    """Photos des dossiers donnés, triées par nom"""
+    chemins = []
+    for dossier in dossiers:
+        if not os.path.isdir(dossier):
+            print(f"⚠️  Dossier introuvable: {dossier}")
+            continue
+        chemins += lister_images_dossier(dossier)
+    return chemins
+
+
+class ResultatsBanc:
+    """Compteurs d'exactitude et de débit"""
+
+    def __init__(self):
+        self.frames = 0
+        self.duree = 0.0
+        self.frames_avec_visage = 0
+        self.correctes = 0
+        self.positifs = 0                 # Frames d'une personne de la galerie
+        self.positifs_reconnus = 0
+        self.negatifs = 0                 # Frames d'une personne hors galerie
+        self.fausses_acceptations = 0
+        self.erreurs = []                 # (source, attendu, obtenu)
+
+    def ajouter(self, source, attendu, reconnus, nb_visages, duree):
+        """Compte une frame : identités reconnues comparées à l'identité attendue"""
+        self.frames += 1
+        self.duree += duree
+        if nb_visages:
+            self.frames_avec_visage += 1
+        if attendu is None:
+            self.negatifs += 1
+            correct = not reconnus
+            if not correct:
+                self.fausses_acceptations += 1
+        else:
+            self.positifs += 1
+            correct = reconnus == {attendu}
+            if correct:
+                self.positifs_reconnus += 1
+        if correct:
+            self.correctes += 1
+        else:
+            self.erreurs.append((source, attendu or "INCONNU", sorted(reconnus) or ["INCONNU"]))
+
+    def rapport(self):
+        """Débit, taux de détection, exactitude, rappel et fausses acceptations"""
+        division = lambda a, b: a / b if b else 0.0
+        return {
+            'frames': self.frames,
+            'duree_s': self.duree,
+            'fps': division(self.frames, self.duree),
+            'taux_detection': division(self.frames_avec_visage, self.frames),
+            'exactitude': division(self.correctes, self.frames),
+            'rappel_galerie': division(self.positifs_reconnus, self.positifs),
+            'fausses_acceptations': self.fausses_acceptations,
+            'negatifs': self.negatifs,
+            'positifs': self.positifs
+        }
+
+
+def executer_sequence(systeme, source, frames, attendu, identites, frame_skip, resultats):
+    """Passe une séquence dans le moteur (suivi et fond de mouvement réinitialisés au début de chaque séquence)"""
+    systeme.suivi.reinitialiser()
+    systeme.mouvement.reinitialiser()
+    attente = 0
+    for frame in frames:
+        if attente:
+            attente -= 1
+            continue
+        # Le contrôleur adaptatif peut changer le saut de frames en cours de séquence
+        attente = max(1, frame_skip or systeme.frame_skip) - 1
+        debut = time.perf_counter()
+        face_locations, noms = systeme.detecter_et_reconnaitre(frame)
+        duree = time.perf_counter() - debut
+        systeme.mesures.ajouter('total', duree)
+        reconnus = {nom for nom, _ in noms if nom in identites}
+        resultats.ajouter(source, attendu, reconnus, len(face_locations), duree)
+
+
+def lire_taille(texte):
+    """'320x240' -> (320, 240)"""
+    largeur, hauteur = texte.lower().split('x')
+    return int(largeur), int(hauteur)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Banc d'essai hors ligne du moteur MANGUI FI")
+    parser.add_argument('--script', default='x_rell', choices=['x_rell', 'l_rell', 'j_vvv'],
+                        help="moteur à évaluer (défaut : x_rell)")
+    parser.add_argument('--images', nargs='*', default=None,
+                        help="dossiers de photos (défaut : dev_data/ et marie/)")
+    parser.add_argument('--video', action='append', default=[], help="fichier vidéo (répétable)")
+    parser.add_argument('--synthetique', type=int, default=0,
+                        help="séquence synthétique de N frames par photo au lieu d'une frame fixe")
+    parser.add_argument('--repetitions', type=int, default=1,
+                        help="nombre de frames identiques par photo (exerce le suivi)")
+    parser.add_argument('--references', default=os.path.join(DOSSIER, 'marie'),
+                        help="dossier des photos de référence")
+    parser.add_argument('--galerie', default=None, help="galerie écrite par enrolement.py")
+    parser.add_argument('--taille-traitement', type=lire_taille, default=None, help="ex. 320x240")
+    parser.add_argument('--frame-skip', type=int, default=None)
+    parser.add_argument('--modele', choices=['hog', 'cnn'], default=None, help="détecteur de visages")
+    parser.add_argument('--seuil', type=float, default=None, help="confiance minimum (1 - distance)")
+    parser.add_argument('--latence-cible', type=float, default=0,
+                        help="active le contrôleur adaptatif avec ce p95 de détection visé (ms)")
+    parser.add_argument('--json', default=None, help="écrit le rapport complet dans ce fichier")
+    parser.add_argument('--verbeux', action='store_true', help="garde les messages du moteur")
+    args = parser.parse_args()
+
+    dossiers = args.images if args.images is not None else [os.path.join(DOSSIER, 'dev_data'),
+                                                           os.path.join(DOSSIER, 'marie')]
+    module = importlib.import_module(args.script)
+
+    with tempfile.TemporaryDirectory() as temporaire:
+        # Pointages automatiques écrits dans un stockage jetable
+        systeme = module.SystemeReconnaissanceFaciale(
+            pointages_file=os.path.join(temporaire, "pointages_banc.json"),
+            dossier_references=args.references,
+            fichier_galerie=args.galerie)
+        systeme.mesures = MesuresLatence(taille_fenetre=1000000, fichier_metriques=None)
+        if args.taille_traitement:
+            systeme.taille_traitement = args.taille_traitement
+        if args.modele:
+            systeme.modele_detection = args.modele
+        if args.seuil is not None:
+            systeme.seuil_confiance = args.seuil
+        # Réglages fixes par défaut pour des mesures comparables
+        systeme.controleur.actif = args.latence_cible > 0
+        systeme.controleur.latence_cible = args.latence_cible / 1000.0
+        frame_skip = max(1, args.frame_skip or systeme.frame_skip)
+        if systeme.controleur.actif and not args.frame_skip:
+            frame_skip = None
+        identites = set(systeme.noms_references)
+
+        print(f"\n🧪 BANC D'ESSAI - {args.script}")
+        print(f"   Traitement: {systeme.taille_traitement[0]}x{systeme.taille_traitement[1]} | "
+              f"Frame skip: {frame_skip or 'adaptatif'} | Modèle: {systeme.modele_detection} | "
+              f"Seuil: {systeme.seuil_confiance}")
+        print(f"   Galerie: {len(identites)} identités")
+
+        resultats = ResultatsBanc()
+        silence = open(os.devnull, 'w') if not args.verbeux else None
+        try:
+            for chemin in lister_images(dossiers):
+                image = cv2.imread(chemin)
+                if image is None:
+                    print(f"⚠️  Image illisible: {chemin}")
+                    continue
+                frame = cadrer(image, systeme.taille_affichage)
+                if args.synthetique > 0:
+                    frames = sequence_synthetique(frame, args.synthetique)
+                else:
+                    frames = (frame for _ in range(max(1, args.repetitions)))
+                attendu = verite_terrain(chemin, identites)
+                with contextlib.redirect_stdout(silence) if silence else contextlib.nullcontext():
+                    executer_sequence(systeme, chemin, frames, attendu, identites, frame_skip, resultats)
+
+            for chemin in args.video:
+                if not os.path.exists(chemin):
+                    print(f"⚠️  Vidéo introuvable: {chemin}")
+                    continue
+                attendu = verite_terrain(chemin, identites)
+                with contextlib.redirect_stdout(silence) if silence else contextlib.nullcontext():
+                    executer_sequence(systeme, chemin, frames_video(chemin, systeme.taille_affichage),
+                                      attendu, identites, frame_skip, resultats)
+        finally:
+            if silence:
+                silence.close()
+            systeme.stockage.fermer()
+
+    rapport = resultats.rapport()
+    print(f"\n📊 RÉSULTATS ({rapport['frames']} frames en {rapport['duree_s']:.2f}s)")
+    print(f"   🎞️  Débit: {rapport['fps']:.1f} frames/s")
+    print(f"   👤 Frames avec visage: {rapport['taux_detection']:.1%}")
+    print(f"   🎯 Exactitude: {rapport['exactitude']:.1%}")
+    print(f"   ✅ Rappel galerie: {rapport['rappel_galerie']:.1%} ({rapport['positifs']} frames)")
+    print(f"   ⚠️  Fausses acceptations: {rapport['fausses_acceptations']}/{rapport['negatifs']}")
+    systeme.mesures.afficher()
+    if resultats.erreurs:
+        print(f"\n❌ ERREURS ({len(resultats.erreurs)}):")
+        for source, attendu, obtenu in resultats.erreurs[:20]:
+            print(f"   • {os.path.basename(source)}: attendu {attendu}, obtenu {', '.join(obtenu)}")
+
+    if args.json:
+        rapport['parametres'] = {
+            'script': args.script,
+            'taille_traitement': list(systeme.taille_traitement),
+            'frame_skip': frame_skip or systeme.frame_skip,
+            'upsample': systeme.upsample_detection,
+            'latence_cible_ms': args.latence_cible or None,
+            'modele': systeme.modele_detection,
+            'seuil': systeme.seuil_confiance
+        }
+        rapport['latences'] = systeme.mesures.resume()['etapes']
+        rapport['erreurs'] = resultats.erreurs
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(rapport, f, indent=2, ensure_ascii=False)
+        print(f"\n💾 Rapport écrit: {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
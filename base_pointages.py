@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+MANGUI FI - BASE SQLITE DES POINTAGES
+Stockage optionnel en mode WAL, indexé sur (date, agent) et timestamp
+
+Import des anciens fichiers :
+    python3 base_pointages.py pointages_*.json
+"""
+
+import os
+import sqlite3
+import sys
+import threading
+from datetime import datetime
+
+from journal_pointages import JournalPointages
+
+
+def _pourcentage_ou_reel(valeur):
+    """'83.3%' -> 0.833, '0.60' -> 0.6, 0.55 -> 0.55"""
+    if valeur is None or valeur == "":
+        return None
+    if isinstance(valeur, str):
+        valeur = valeur.strip()
+        if valeur.endswith('%'):
+            return float(valeur[:-1]) / 100.0
+    return float(valeur)
+
+
+def normaliser_pointage(pointage, source=None):
+    """Ramène les différents schémas JSON historiques à une seule forme"""
+    date = pointage['date']
+    heure = pointage['heure']
+    timestamp = pointage.get('timestamp')
+    if timestamp is None:
+        # Anciens fichiers sans timestamp : reconstruit à partir de la date et de l'heure
+        timestamp = datetime.strptime(f"{date} {heure}", "%Y-%m-%d %H:%M:%S").timestamp()
+    return {
+        'agent': pointage['agent'],
+        'date': date,
+        'heure': heure,
+        'timestamp': float(timestamp),
+        # pointages_manguifi.json : 'confidence' ; pointages_augmentes.json : 'confiance'
+        'confiance': _pourcentage_ou_reel(pointage.get('confidence', pointage.get('confiance'))),
+        'score': _pourcentage_ou_reel(pointage.get('score')),
+        'seuil': _pourcentage_ou_reel(pointage.get('seuil_utilise', pointage.get('seuil'))),
+        'source': source
+    }
+
+
+class BasePointagesSQLite:
+    """Pointages en SQLite (WAL) : statistiques, anti-doublon et comptages par requêtes indexées"""
+
+    COLONNES = "agent, date, heure, timestamp, confiance, score, seuil, source"
+
+    def __init__(self, fichier_db="pointages_manguifi.db"):
+        self.fichier_db = fichier_db
+        self.nouvelle_base = not os.path.exists(fichier_db)
+        self._verrou = threading.RLock()
+        # Connexion partagée entre le thread de reconnaissance et l'affichage, protégée par le verrou
+        self.connexion = sqlite3.connect(fichier_db, check_same_thread=False)
+        self.connexion.row_factory = sqlite3.Row
+        with self._verrou:
+            self.connexion.execute("PRAGMA journal_mode=WAL")
+            self.connexion.execute("PRAGMA synchronous=NORMAL")
+            self.connexion.executescript("""
+                CREATE TABLE IF NOT EXISTS pointages (
+                    id INTEGER PRIMARY KEY,
+                    agent TEXT NOT NULL,
+                    date TEXT NOT NULL,
+                    heure TEXT NOT NULL,
+                    timestamp REAL NOT NULL,
+                    confiance REAL,
+                    score REAL,
+                    seuil REAL,
+                    source TEXT,
+                    UNIQUE (agent, timestamp)
+                );
+                CREATE INDEX IF NOT EXISTS idx_pointages_date_agent ON pointages (date, agent);
+                CREATE INDEX IF NOT EXISTS idx_pointages_timestamp ON pointages (timestamp);
+                CREATE INDEX IF NOT EXISTS idx_pointages_agent_timestamp ON pointages (agent, timestamp);
+            """)
+            self.connexion.commit()
+
+    @staticmethod
+    def _vers_dict(ligne):
+        """Ligne SQL -> pointage au format des fichiers JSON"""
+        pointage = {
+            'agent': ligne['agent'],
+            'heure': ligne['heure'],
+            'date': ligne['date'],
+            'timestamp': ligne['timestamp']
+        }
+        if ligne['confiance'] is not None:
+            pointage['confidence'] = f"{ligne['confiance']:.2f}"
+        if ligne['score'] is not None:
+            pointage['score'] = f"{ligne['score']:.1%}"
+        if ligne['seuil'] is not None:
+            pointage['seuil_utilise'] = ligne['seuil']
+        return pointage
+
+    def _inserer(self, pointages):
+        lignes = [(p['agent'], p['date'], p['heure'], p['timestamp'],
+                   p['confiance'], p['score'], p['seuil'], p['source']) for p in pointages]
+        with self._verrou:
+            avant = self.connexion.total_changes
+            self.connexion.executemany(
+                f"INSERT OR IGNORE INTO pointages ({self.COLONNES}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", lignes)
+            self.connexion.commit()
+            return self.connexion.total_changes - avant
+
+    def ajouter(self, pointage):
+        """Enregistre un pointage"""
+        self._inserer([normaliser_pointage(pointage, source="terminal")])
+
+    def derniers(self, n=10):
+        """Derniers pointages, tous agents confondus"""
+        with self._verrou:
+            lignes = self.connexion.execute(
+                "SELECT * FROM pointages ORDER BY timestamp DESC LIMIT ?", (n,)).fetchall()
+        return [self._vers_dict(l) for l in reversed(lignes)]
+
+    def dernier_timestamp(self, agent):
+        """Timestamp du dernier pointage d'un agent (index agent/timestamp)"""
+        with self._verrou:
+            ligne = self.connexion.execute(
+                "SELECT MAX(timestamp) FROM pointages WHERE agent = ?", (agent,)).fetchone()
+        return ligne[0]
+
+    def derniers_par_agent(self, depuis):
+        """Dernier timestamp de chaque agent ayant pointé depuis `depuis` (index timestamp)"""
+        with self._verrou:
+            lignes = self.connexion.execute(
+                "SELECT agent, MAX(timestamp) FROM pointages WHERE timestamp >= ? GROUP BY agent",
+                (depuis,)).fetchall()
+        return {agent: timestamp for agent, timestamp in lignes}
+
+    def lire_tous(self):
+        """Historique complet, dans l'ordre chronologique"""
+        with self._verrou:
+            lignes = self.connexion.execute("SELECT * FROM pointages ORDER BY timestamp").fetchall()
+        return [self._vers_dict(l) for l in lignes]
+
+    def statistiques(self, date, n_derniers=5):
+        """Totaux, comptage par agent et derniers pointages d'une journée"""
+        with self._verrou:
+            total = self.connexion.execute("SELECT COUNT(*) FROM pointages").fetchone()[0]
+            par_agent = dict(self.connexion.execute(
+                "SELECT agent, COUNT(*) FROM pointages WHERE date = ? GROUP BY agent", (date,)).fetchall())
+            derniers = self.connexion.execute(
+                "SELECT * FROM pointages WHERE date = ? ORDER BY timestamp DESC LIMIT ?",
+                (date, n_derniers)).fetchall()
+        return {
+            'total': total,
+            'jour': sum(par_agent.values()),
+            'par_agent': par_agent,
+            'derniers': [self._vers_dict(l) for l in reversed(derniers)]
+        }
+
+    def importer_json(self, chemin):
+        """Importe un fichier pointages_*.json (tableau) ou .jsonl ; retourne le nombre de pointages ajoutés"""
+        if chemin.endswith('.jsonl'):
+            pointages = JournalPointages._lire_journal(chemin)
+        else:
+            pointages = JournalPointages._lire_tableau(chemin)
+        source = os.path.basename(chemin)
+        normalises = []
+        for p in pointages:
+            try:
+                normalises.append(normaliser_pointage(p, source=source))
+            except (KeyError, ValueError) as e:
+                print(f"⚠️  Pointage ignoré dans {source}: {e}")
+        return self._inserer(normalises)
+
+    def fermer(self):
+        """Ferme la base"""
+        with self._verrou:
+            if self.connexion is not None:
+                self.connexion.close()
+                self.connexion = None
+
+
+def ouvrir_stockage_pointages(backend, fichier_json="pointages_manguifi.json"):
+    """Ouvre le stockage choisi : 'journal' (JSON Lines, défaut) ou 'sqlite'"""
+    if backend == "sqlite":
+        base = BasePointagesSQLite(os.path.splitext(fichier_json)[0] + ".db")
+        if base.nouvelle_base:
+            # Première ouverture : reprise de l'historique existant
+            for chemin in (fichier_json, os.path.splitext(fichier_json)[0] + ".jsonl"):
+                if os.path.exists(chemin):
+                    print(f"📥 Import de {chemin}: {base.importer_json(chemin)} pointages")
+        return base
+    return JournalPointages(fichier_json)
+
+
+if __name__ == "__main__":
+    fichiers = sys.argv[1:] or ["pointages_manguifi.json"]
+    base = BasePointagesSQLite()
+    for chemin in fichiers:
+        try:
+            print(f"📥 {chemin}: {base.importer_json(chemin)} pointages importés")
+        except Exception as e:
+            print(f"❌ Erreur import {chemin}: {e}")
+    base.fermer()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+MANGUI FI - CACHE DES EMBEDDINGS DE RÉFÉRENCE
+Évite de ré-encoder les photos d'enrôlement inchangées à chaque démarrage.
+Fichier partagé entre les terminaux : chaque sauvegarde relit le disque sous verrou
+et n'y ajoute que ses propres entrées
+"""
+
+import fcntl
+import hashlib
+import json
+import os
+
+import numpy as np
+
+
+class CacheEmbeddings:
+    """Stockage disque des encodages 128-d, indexés par contenu de fichier + paramètres"""
+
+    VERSION = 1
+
+    def __init__(self, fichier_cache="cache_embeddings_manguifi.json", parametres=None):
+        self.fichier_cache = fichier_cache
+        # Paramètres de détection/encodage : les changer invalide automatiquement le cache
+        self.parametres = parametres or {}
+        self.signature_parametres = json.dumps(self.parametres, sort_keys=True)
+        self.entrees = {}
+        self.nouvelles = {}                   # Entrées encodées ici, pas encore écrites
+        self.succes = 0
+        self.echecs = 0
+        self.charger()
+
+    def _lire(self):
+        """Entrées du fichier sur disque ({} s'il est absent ou illisible)"""
+        if not os.path.exists(self.fichier_cache):
+            return {}
+        try:
+            with open(self.fichier_cache, 'r') as f:
+                contenu = json.load(f)
+            if contenu.get('version') == self.VERSION:
+                return contenu.get('entrees', {})
+        except Exception as e:
+            print(f"⚠️  Cache embeddings illisible, reconstruction: {e}")
+        return {}
+
+    def charger(self):
+        """Charge le cache depuis le disque (ignoré s'il est absent ou illisible)"""
+        self.entrees = self._lire()
+
+    def calculer_cle(self, chemin):
+        """Clé = hash du contenu de la photo + paramètres du détecteur/encodeur"""
+        h = hashlib.sha256()
+        with open(chemin, 'rb') as f:
+            for bloc in iter(lambda: f.read(1 << 20), b''):
+                h.update(bloc)
+        h.update(self.signature_parametres.encode('utf-8'))
+        return h.hexdigest()
+
+    def obtenir(self, cle):
+        """Retourne (trouvé, encodage) ; encodage vaut None si aucun visage n'avait été trouvé"""
+        entree = self.entrees.get(cle)
+        if entree is None:
+            self.echecs += 1
+            return False, None
+        self.succes += 1
+        encodage = entree.get('encodage')
+        if encodage is None:
+            return True, None
+        return True, np.asarray(encodage, dtype=np.float64)
+
+    def enregistrer(self, cle, encodage, fichier=""):
+        """Mémorise le résultat d'encodage d'une photo (None = aucun visage)"""
+        self.entrees[cle] = self.nouvelles[cle] = {
+            'fichier': fichier,
+            'encodage': None if encodage is None else [float(v) for v in encodage]
+        }
+
+    def sauvegarder(self):
+        """Ajoute les nouvelles entrées au fichier (verrou, relecture, remplacement atomique) et fait le bilan"""
+        print(f"💾 Cache embeddings: {self.succes} photo(s) relue(s), {self.echecs} encodée(s)")
+        if not self.nouvelles:
+            return
+        try:
+            # Verrou exclusif entre terminaux : les entrées écrites par un autre depuis notre
+            # chargement sont relues et conservées
+            with open(self.fichier_cache + ".lock", 'w') as verrou:
+                fcntl.flock(verrou, fcntl.LOCK_EX)
+                entrees = self._lire()
+                entrees.update(self.nouvelles)
+                temporaire = self.fichier_cache + ".tmp"
+                with open(temporaire, 'w') as f:
+                    json.dump({'version': self.VERSION, 'entrees': entrees}, f)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temporaire, self.fichier_cache)
+            self.entrees.update(entrees)
+            self.nouvelles = {}
+        except Exception as e:
+            print(f"❌ Erreur sauvegarde cache embeddings: {e}")
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+MANGUI FI - PIPELINE CAPTURE / RECONNAISSANCE / AFFICHAGE
+La capture tourne sur son propre thread et ne garde que la frame la plus récente
+"""
+
+import threading
+import time
+
+
+class CaptureThreadee:
+    """Thread de capture avec un emplacement unique « dernière frame »
+
+    politique "derniere"  : les frames périmées sont écrasées (caméra en direct)
+    politique "bloquante" : la capture attend que la reconnaissance demande la frame suivante
+    """
+
+    def __init__(self, cap, mesures=None, politique=None):
+        self.cap = cap
+        self.mesures = mesures                # MesuresLatence optionnelle (étape 'capture')
+        self.politique = politique or getattr(cap, 'politique', "derniere")
+        self._attendue = 1                    # Séquence demandée par la reconnaissance (politique bloquante)
+        self._condition = threading.Condition()
+        self._frame = None
+        self._sequence = 0
+        self._frame_lue = True
+        self.frames_perdues = 0
+        self.actif = False
+        self._thread = None
+
+    def demarrer(self):
+        """Lance le thread de capture"""
+        self.actif = True
+        self._thread = threading.Thread(target=self._boucle, name="capture", daemon=True)
+        self._thread.start()
+        return self
+
+    def _boucle(self):
+        while self.actif:
+            if self.politique == "bloquante":
+                with self._condition:
+                    while self.actif and self._sequence >= self._attendue:
+                        self._condition.wait(0.1)
+            debut = time.perf_counter()
+            ret, frame = self.cap.read()
+            if not ret or frame is None:
+                break
+            if self.mesures is not None:
+                self.mesures.ajouter('capture', time.perf_counter() - debut)
+                self.mesures.compter('capture')
+            with self._condition:
+                if not self._frame_lue:
+                    self.frames_perdues += 1
+                self._frame = frame
+                self._sequence += 1
+                self._frame_lue = False
+                self._condition.notify_all()
+        with self._condition:
+            self.actif = False
+            self._condition.notify_all()
+
+    def lire(self, apres=0, timeout=1.0, demander=True):
+        """Attend une frame plus récente que la séquence `apres` ; retourne (séquence, frame)
+
+        `demander=False` pour un lecteur secondaire (affichage) qui ne doit pas faire avancer
+        une capture bloquante
+        """
+        limite = time.time() + timeout
+        with self._condition:
+            if demander and apres + 1 > self._attendue:
+                self._attendue = apres + 1
+                self._condition.notify_all()
+            while self._sequence <= apres and self.actif:
+                reste = limite - time.time()
+                if reste <= 0:
+                    return apres, None
+                self._condition.wait(reste)
+            if self._sequence <= apres:
+                return apres, None
+            self._frame_lue = True
+            return self._sequence, self._frame
+
+    def arreter(self):
+        """Arrête le thread de capture"""
+        self.actif = False
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+
+
+class TravailleurReconnaissance:
+    """Thread de reconnaissance : traite toujours la frame la plus fraîche disponible"""
+
+    def __init__(self, capture, traitement, pas=1, mesures=None):
+        self.capture = capture
+        self.traitement = traitement
+        self.mesures = mesures                # MesuresLatence optionnelle (flux 'reconnaissance')
+        # `pas` peut être un entier ou une fonction (réglage dynamique)
+        self.pas = pas if callable(pas) else (lambda: pas)
+        self._resultat = None
+        self._verrou = threading.Condition()
+        self.frames_traitees = 0
+        self.actif = False
+        self._thread = None
+
+    def demarrer(self):
+        """Lance le thread de reconnaissance"""
+        self.actif = True
+        self._thread = threading.Thread(target=self._boucle, name="reconnaissance", daemon=True)
+        self._thread.start()
+        return self
+
+    def _boucle(self):
+        sequence = 0
+        while self.actif and self.capture.actif:
+            nouvelle_sequence, frame = self.capture.lire(sequence + max(1, int(self.pas())) - 1)
+            if frame is None:
+                continue
+            sequence = nouvelle_sequence
+            try:
+                debut = time.perf_counter()
+                resultat = self.traitement(frame)
+                with self._verrou:
+                    self._resultat = (sequence, resultat)
+                    self._verrou.notify_all()
+                self.frames_traitees += 1
+                if self.mesures is not None:
+                    self.mesures.ajouter('reconnaissance', time.perf_counter() - debut)
+                    self.mesures.compter('reconnaissance')
+            except Exception as e:
+                print(f"⚠️  Erreur traitement: {e}")
+
+    def prendre_resultat(self):
+        """Retourne le dernier résultat publié (une seule fois), ou None"""
+        with self._verrou:
+            resultat, self._resultat = self._resultat, None
+        return resultat
+
+    def attendre_resultat(self, timeout=0.2):
+        """Comme prendre_resultat(), mais attend jusqu'à `timeout` secondes un nouveau résultat"""
+        with self._verrou:
+            if self._resultat is None:
+                self._verrou.wait(timeout)
+            resultat, self._resultat = self._resultat, None
+        return resultat
+
+    def arreter(self):
+        """Arrête le thread de reconnaissance"""
+        self.actif = False
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+MANGUI FI - CHARGEMENT DIFFÉRÉ DES MODÈLES
+face_recognition (dlib, poids HOG / landmarks / ResNet) n'est importé qu'au premier usage,
+et le préchargement tourne en arrière-plan (import, inférence factice, références) pendant
+que l'aperçu caméra et l'interface s'affichent déjà
+"""
+
+import importlib
+import threading
+import time
+
+import numpy as np
+
+
+class ModuleDiffere:
+    """Mandataire de module : l'import réel a lieu au premier accès à un attribut"""
+
+    def __init__(self, nom):
+        self._nom = nom
+        self._module = None
+        self._verrou = threading.Lock()
+
+    def charger(self):
+        """Importe le module (une seule fois, même si plusieurs threads le demandent)"""
+        if self._module is None:
+            with self._verrou:
+                if self._module is None:
+                    self._module = importlib.import_module(self._nom)
+        return self._module
+
+    @property
+    def charge(self):
+        return self._module is not None
+
+    def __getattr__(self, attribut):
+        return getattr(self.charger(), attribut)
+
+
+face_recognition = ModuleDiffere("face_recognition")
+
+
+class ChronologieDemarrage:
+    """Jalons du démarrage (secondes depuis la création) : première frame, modèles prêts, première reconnaissance"""
+
+    def __init__(self):
+        self.debut = time.perf_counter()
+        self.jalons = {}
+        self._verrou = threading.Lock()
+
+    def marquer(self, jalon, libelle=None):
+        """Enregistre un jalon la première fois seulement"""
+        with self._verrou:
+            if jalon in self.jalons:
+                return
+            self.jalons[jalon] = time.perf_counter() - self.debut
+        print(f"⏱️  {libelle or jalon}: {self.jalons[jalon]:.2f}s après le lancement")
+
+    def afficher(self):
+        """Résumé des jalons dans la console"""
+        if not self.jalons:
+            return
+        print(f"\n🚦 DÉMARRAGE:")
+        for jalon, duree in sorted(self.jalons.items(), key=lambda j: j[1]):
+            print(f"   • {jalon}: {duree:.2f}s")
+
+
+class PrechargementModeles:
+    """Thread d'arrière-plan : import de face_recognition, inférence factice puis chargement des références
+
+    Seul l'échec de l'import est bloquant (erreur) ; une chauffe ou des références en échec
+    sont signalées dans avertissements et la reconnaissance démarre quand même.
+    """
+
+    def __init__(self, chargement_references=None, chronologie=None):
+        self.chargement_references = chargement_references
+        self.chronologie = chronologie
+        self.pret = threading.Event()
+        self.erreur = None
+        self.avertissements = []
+        self.durees = {}
+        self._thread = None
+
+    def demarrer(self):
+        """Lance le préchargement"""
+        self._thread = threading.Thread(target=self._precharger, name="prechargement", daemon=True)
+        self._thread.start()
+        return self
+
+    def _precharger(self):
+        try:
+            debut = time.perf_counter()
+            face_recognition.charger()
+            self.durees['import'] = time.perf_counter() - debut
+        except Exception as e:
+            # Sans face_recognition, aucune reconnaissance possible
+            self.erreur = e
+            print(f"❌ Erreur import face_recognition: {e}")
+            self.pret.set()
+            return
+
+        try:
+            # Inférence factice : initialisations paresseuses de dlib payées ici, pas sur le premier visage
+            debut = time.perf_counter()
+            image = np.zeros((240, 320, 3), dtype=np.uint8)
+            face_recognition.face_locations(image)
+            face_recognition.face_encodings(image, [(60, 200, 180, 80)])
+            self.durees['chauffe'] = time.perf_counter() - debut
+        except Exception as e:
+            # Chauffe ratée : le premier visage paiera l'initialisation, rien de plus
+            self.avertissements.append(f"chauffe: {e}")
+            print(f"⚠️  Chauffe des modèles impossible: {e}")
+
+        if self.chargement_references is not None:
+            try:
+                debut = time.perf_counter()
+                self.chargement_references()
+                self.durees['references'] = time.perf_counter() - debut
+            except Exception as e:
+                self.avertissements.append(f"références: {e}")
+                print(f"❌ Erreur chargement références: {e}")
+
+        print(f"🧠 Modèles prêts (import {self.durees['import']:.2f}s, "
+              f"chauffe {self.durees.get('chauffe', 0.0):.2f}s)")
+        if self.chronologie is not None:
+            self.chronologie.marquer('modeles_prets', "Modèles prêts")
+        self.pret.set()
+
+    def attendre(self, timeout=None):
+        """Attend la fin du préchargement ; vrai s'il est terminé"""
+        return self.pret.wait(timeout)
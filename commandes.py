@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+MANGUI FI - COMMANDES SANS CLAVIER
+Commandes de contrôle lues sur l'entrée standard et/ou une socket Unix locale,
+pour les terminaux d'entrée sans écran (mode --sans-affichage)
+
+    echo stats | socat - UNIX-CONNECT:/tmp/manguifi.sock
+"""
+
+import os
+import queue
+import socket
+import sys
+import threading
+
+# Mots acceptés en plus des touches d'une lettre
+ALIAS = {
+    'quitter': 'q', 'quit': 'q', 'stop': 'q',
+    'pointage': 'p',
+    'stats': 's', 'statistiques': 's',
+    'liste': 'l',
+    'mesures': 'm', 'latences': 'm',
+    'statut': 'v', 'verrouillage': 'v'
+}
+
+
+# Touches d'une lettre reconnues
+TOUCHES = set(ALIAS.values())
+
+
+def normaliser_commande(texte):
+    """'  Stats\\n' -> 's' ; None si la ligne est vide ou n'est pas une commande connue"""
+    texte = texte.strip().lower()
+    if texte in TOUCHES:
+        return texte
+    return ALIAS.get(texte)
+
+
+class LecteurCommandes:
+    """File de commandes alimentée par stdin et une socket locale, lue sans bloquer par la boucle principale"""
+
+    def __init__(self, stdin=True, chemin_socket=None):
+        self.stdin = stdin
+        self.chemin_socket = chemin_socket
+        self.file = queue.Queue()
+        self.actif = False
+        self._serveur = None
+
+    def demarrer(self):
+        """Lance les threads de lecture"""
+        self.actif = True
+        if self.stdin:
+            threading.Thread(target=self._lire_stdin, name="commandes-stdin", daemon=True).start()
+        if self.chemin_socket:
+            try:
+                if os.path.exists(self.chemin_socket):
+                    os.remove(self.chemin_socket)
+                self._serveur = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                self._serveur.bind(self.chemin_socket)
+                self._serveur.listen(4)
+                self._serveur.settimeout(0.5)
+                threading.Thread(target=self._ecouter, name="commandes-socket", daemon=True).start()
+                print(f"🔌 Commandes sur la socket {self.chemin_socket}")
+            except OSError as e:
+                print(f"❌ Erreur socket de commandes: {e}")
+                self._serveur = None
+        return self
+
+    def _lire_stdin(self):
+        # Fin de stdin (service sans terminal) : on arrête simplement de lire
+        for ligne in sys.stdin:
+            if not self.actif:
+                break
+            commande = normaliser_commande(ligne)
+            if commande:
+                self.file.put(commande)
+            elif ligne.strip():
+                print(f"⚠️  Commande inconnue ignorée: {ligne.strip()}")
+
+    def _ecouter(self):
+        while self.actif:
+            try:
+                connexion, _ = self._serveur.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            threading.Thread(target=self._servir, args=(connexion,), daemon=True).start()
+
+    def _servir(self, connexion):
+        with connexion, connexion.makefile('r', encoding='utf-8') as flux:
+            for ligne in flux:
+                commande = normaliser_commande(ligne)
+                if commande:
+                    self.file.put(commande)
+                    connexion.sendall(f"ok {commande}\n".encode('utf-8'))
+                elif ligne.strip():
+                    connexion.sendall(f"inconnu {ligne.strip()}\n".encode('utf-8'))
+
+    def prendre(self):
+        """Commande suivante (une lettre) ou None, sans bloquer"""
+        try:
+            return self.file.get_nowait()
+        except queue.Empty:
+            return None
+
+    def arreter(self):
+        """Ferme la socket de commandes"""
+        self.actif = False
+        if self._serveur is not None:
+            self._serveur.close()
+            self._serveur = None
+            if os.path.exists(self.chemin_socket):
+                os.remove(self.chemin_socket)
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+MANGUI FI - CONTRÔLEUR ADAPTATIF
+Ajuste la résolution de traitement, le suréchantillonnage HOG et le saut de frames
+pour tenir une latence cible, d'un vieil Atom à un poste de bureau
+
+Les réglages forment une échelle du moins coûteux au plus fidèle. On descend d'un cran
+quand le p95 de la détection dépasse la cible. On remonte quand le coût estimé du cran
+supérieur (pixels × 4^upsample) tient encore dans la cible : tout de suite si les visages
+détectés sont trop petits pour le HOG, après quelques évaluations calmes sinon.
+"""
+
+import time
+
+# (taille_traitement, upsample HOG, frame_skip), du moins coûteux au plus fidèle
+NIVEAUX = [
+    ((240, 180), 0, 3),
+    ((320, 240), 0, 2),
+    ((320, 240), 0, 1),
+    ((320, 240), 1, 1),
+    ((480, 360), 1, 1),
+    ((640, 480), 1, 1),
+]
+
+
+class ControleurAdaptatif:
+    """Régulation par paliers avec hystérésis à partir des mesures de latence"""
+
+    def __init__(self, latence_cible=0.15, etape='detection', intervalle=2.0, min_echantillons=5,
+                 marge_haute=1.2, calmes_requis=3, hauteur_visage_min=40, niveaux=NIVEAUX):
+        self.latence_cible = latence_cible        # Secondes (p95 de l'étape surveillée, la détection HOG)
+        self.etape = etape
+        self.intervalle = intervalle              # Secondes entre deux évaluations
+        self.min_echantillons = min_echantillons  # Mesures nouvelles nécessaires pour juger un palier
+        self.marge_haute = marge_haute            # Au-delà de cible × marge_haute : on allège
+        self.calmes_requis = calmes_requis        # Évaluations calmes consécutives avant de remonter
+        self.hauteur_visage_min = hauteur_visage_min  # Pixels (résolution de traitement) sous lesquels le HOG rate des visages
+        self.niveaux = niveaux
+        self.actif = True
+        self.niveau = None
+        self.calmes = 0
+        self.plus_petit_visage = None
+        self._derniere_evaluation = time.time()
+        self._total_evalue = 0
+
+    def niveau_initial(self, systeme):
+        """Palier le plus proche des réglages actuels du système"""
+        reglage = (tuple(systeme.taille_traitement), systeme.upsample_detection, systeme.frame_skip)
+        if reglage in self.niveaux:
+            return self.niveaux.index(reglage)
+        pixels = systeme.taille_traitement[0] * systeme.taille_traitement[1]
+        return min(range(len(self.niveaux)),
+                   key=lambda i: abs(self.niveaux[i][0][0] * self.niveaux[i][0][1] - pixels))
+
+    def cout(self, niveau):
+        """Coût relatif estimé de la détection HOG à un palier"""
+        (largeur, hauteur), upsample, _ = self.niveaux[niveau]
+        return largeur * hauteur * 4 ** upsample
+
+    def observer_visages(self, face_locations):
+        """Mémorise la hauteur du plus petit visage détecté (résolution de traitement)"""
+        hauteurs = [bottom - top for (top, right, bottom, left) in face_locations]
+        if hauteurs:
+            self.plus_petit_visage = min(hauteurs) if self.plus_petit_visage is None \
+                else min(self.plus_petit_visage, min(hauteurs))
+
+    def ajuster(self, systeme):
+        """Évalue la latence récente et change de palier si nécessaire ; vrai si un réglage a changé"""
+        if not self.actif:
+            return False
+        if self.niveau is None:
+            self.niveau = self.niveau_initial(systeme)
+        maintenant = time.time()
+        if maintenant - self._derniere_evaluation < self.intervalle:
+            return False
+
+        total = systeme.mesures.totaux.get(self.etape, 0)
+        nouvelles = total - self._total_evalue
+        if nouvelles < self.min_echantillons:
+            return False
+        durees = sorted(systeme.mesures.dernieres(self.etape, nouvelles))
+        p95 = durees[min(len(durees) - 1, int(0.95 * len(durees)))]
+        petits_visages = self.plus_petit_visage is not None and self.plus_petit_visage < self.hauteur_visage_min
+        self._derniere_evaluation = maintenant
+        self._total_evalue = total
+        self.plus_petit_visage = None
+
+        niveau = self.niveau
+        if p95 > self.latence_cible * self.marge_haute:
+            # Charge CPU : on allège
+            self.calmes = 0
+            niveau = max(0, niveau - 1)
+        elif niveau + 1 < len(self.niveaux) and \
+                p95 * self.cout(niveau + 1) / self.cout(niveau) < self.latence_cible:
+            # Le cran supérieur tiendrait dans la cible
+            self.calmes += 1
+            if self.calmes >= self.calmes_requis or petits_visages:
+                # Visages petits ou lointains : plus de fidélité sans attendre
+                niveau += 1
+        else:
+            self.calmes = 0
+        if niveau == self.niveau:
+            return False
+
+        self.appliquer(systeme, niveau, p95)
+        return True
+
+    def appliquer(self, systeme, niveau, p95=None):
+        """Applique un palier au système"""
+        taille, upsample, frame_skip = self.niveaux[niveau]
+        if tuple(systeme.taille_traitement) != taille:
+            # Les pistes sont en coordonnées de traitement : on repart d'une détection complète
+            systeme.suivi.reinitialiser()
+        sens = "⬆️" if self.niveau is None or niveau > self.niveau else "⬇️"
+        systeme.taille_traitement = taille
+        systeme.upsample_detection = upsample
+        systeme.frame_skip = frame_skip
+        self.niveau = niveau
+        self.calmes = 0
+        mesure = f" (p95 {p95 * 1000:.0f} ms, cible {self.latence_cible * 1000:.0f} ms)" if p95 is not None else ""
+        print(f"{sens}  Réglage {niveau + 1}/{len(self.niveaux)}: {taille[0]}x{taille[1]}, "
+              f"upsample {upsample}, frame skip {frame_skip}{mesure}")
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+MANGUI FI - DÉTECTEUR HAAR PARTAGÉ
+La cascade XML n'est lue qu'une fois par processus et la détection ne tourne qu'une fois
+par frame : les mêmes boîtes servent à l'interface et à la reconnaissance
+
+Banc (coût par frame, ancienne boucle contre détecteur partagé) :
+    python3 detecteur_haar.py --dossier dev_data/ --repetitions 5
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+import cv2
+
+from sources_frames import lister_images
+
+FICHIER_CASCADE = "haarcascade_frontalface_default.xml"
+
+# Cascades déjà lues, par chemin
+_cascades = {}
+_verrou = threading.Lock()
+
+
+def chemin_cascade(fichier=FICHIER_CASCADE):
+    """Fichier local s'il existe, sinon celui fourni avec OpenCV"""
+    if os.path.exists(fichier) or not hasattr(cv2, 'data'):
+        return fichier
+    return os.path.join(cv2.data.haarcascades, os.path.basename(fichier))
+
+
+def obtenir_cascade(fichier=FICHIER_CASCADE):
+    """CascadeClassifier partagé : le XML n'est analysé qu'au premier appel"""
+    chemin = chemin_cascade(fichier)
+    with _verrou:
+        cascade = _cascades.get(chemin)
+        if cascade is None:
+            cascade = cv2.CascadeClassifier(chemin)
+            if cascade.empty():
+                raise ValueError(f"cascade Haar illisible: {chemin}")
+            _cascades[chemin] = cascade
+    return cascade
+
+
+class DetecteurHaar:
+    """Détection de visages Haar une fois par frame, boîtes (x, y, w, h) partagées"""
+
+    def __init__(self, fichier=FICHIER_CASCADE, facteur_echelle=1.1, voisins=4):
+        self.cascade = obtenir_cascade(fichier)
+        self.facteur_echelle = facteur_echelle
+        self.voisins = voisins
+
+    def detecter(self, gris, taille_min=None):
+        """Boîtes (x, y, w, h) des visages d'une image en niveaux de gris"""
+        if taille_min:
+            visages = self.cascade.detectMultiScale(gris, self.facteur_echelle, self.voisins,
+                                                    minSize=taille_min)
+        else:
+            visages = self.cascade.detectMultiScale(gris, self.facteur_echelle, self.voisins)
+        return [tuple(int(v) for v in visage) for visage in visages]
+
+    def analyser(self, image):
+        """(gris, visages) d'une frame BGR, pour l'interface et la reconnaissance"""
+        gris = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        return gris, self.detecter(gris)
+
+
+def filtrer_taille(visages, taille_min):
+    """Boîtes d'au moins taille_min (largeur, hauteur)"""
+    return [(x, y, w, h) for (x, y, w, h) in visages if w >= taille_min[0] and h >= taille_min[1]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Banc du détecteur Haar partagé")
+    parser.add_argument('--dossier', default="dev_data", help="photos utilisées comme frames")
+    parser.add_argument('--repetitions', type=int, default=3)
+    parser.add_argument('--largeur', type=int, default=640, help="largeur des frames (0 = taille d'origine)")
+    args = parser.parse_args()
+
+    frames = []
+    for chemin in lister_images(args.dossier):
+        image = cv2.imread(chemin)
+        if image is None:
+            continue
+        if args.largeur and image.shape[1] != args.largeur:
+            hauteur = int(image.shape[0] * args.largeur / image.shape[1])
+            image = cv2.resize(image, (args.largeur, hauteur))
+        frames.append(image)
+    if not frames:
+        print(f"❌ Aucune image dans {args.dossier}")
+        return 1
+    frames = frames * args.repetitions
+
+    fichier = chemin_cascade()
+    print(f"\n🧪 DÉTECTEUR HAAR - {len(frames)} frames")
+
+    # Ancienne boucle : cascade relue et détection refaite pour l'interface puis pour est_alphonse
+    debut = time.perf_counter()
+    temps_chargement = 0.0
+    for image in frames:
+        for taille_min in (None, (100, 100)):
+            gris = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            debut_chargement = time.perf_counter()
+            cascade = cv2.CascadeClassifier(fichier)
+            temps_chargement += time.perf_counter() - debut_chargement
+            if taille_min:
+                cascade.detectMultiScale(gris, 1.1, 4, minSize=taille_min)
+            else:
+                cascade.detectMultiScale(gris, 1.1, 4)
+    duree_avant = (time.perf_counter() - debut) / len(frames)
+
+    # Détecteur partagé : une lecture du XML, une détection par frame
+    debut = time.perf_counter()
+    detecteur = DetecteurHaar(fichier)
+    nb_visages = 0
+    for image in frames:
+        gris, visages = detecteur.analyser(image)
+        nb_visages += len(filtrer_taille(visages, (100, 100)))
+    duree_apres = (time.perf_counter() - debut) / len(frames)
+
+    print(f"   Avant : {duree_avant * 1000:.2f} ms/frame "
+          f"(dont {temps_chargement / len(frames) * 1000:.2f} ms de lecture XML)")
+    print(f"   Après : {duree_apres * 1000:.2f} ms/frame ({nb_visages} visages ≥ 100px)")
+    print(f"   Gain  : {(duree_avant - duree_apres) * 1000:.2f} ms/frame "
+          f"({duree_avant / max(duree_apres, 1e-9):.1f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
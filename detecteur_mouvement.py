@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+MANGUI FI - DÉTECTEUR DE MOUVEMENT
+Différence avec un fond moyen sur une vignette grise minuscule : la détection de visages
+n'est réveillée que si la scène change, avec un battement de contrôle à basse fréquence
+"""
+
+import time
+
+import cv2
+import numpy as np
+
+
+class DetecteurMouvement:
+    """Portier de la détection : scène immobile = pas de HOG, sauf battement périodique"""
+
+    def __init__(self, taille=(64, 48), seuil_pixel=18, fraction_min=0.004, adaptation=0.05,
+                 maintien=2.0, battement=3.0):
+        self.taille = taille                  # Vignette d'analyse (largeur, hauteur)
+        self.seuil_pixel = seuil_pixel        # Écart de niveau de gris d'un pixel « changé »
+        self.fraction_min = fraction_min      # Fraction de pixels changés qui signale un mouvement
+        self.adaptation = adaptation          # Vitesse d'absorption des changements lents (lumière)
+        self.maintien = maintien              # Secondes d'éveil après le dernier mouvement
+        self.battement = battement            # Secondes max entre deux détections sur scène immobile
+        self.fond = None
+        self.dernier_mouvement = 0.0
+        self.dernier_reveil = 0.0
+        self.frames_ignorees = 0
+        self.reveils_battement = 0
+
+    def analyser(self, gris):
+        """Met à jour le fond et indique si la scène bouge (ou a bougé il y a moins de `maintien` s)"""
+        vignette = cv2.resize(gris, self.taille, interpolation=cv2.INTER_AREA)
+        vignette = cv2.GaussianBlur(vignette, (5, 5), 0).astype(np.float32)
+        maintenant = time.time()
+        if self.fond is None:
+            self.fond = vignette
+            self.dernier_mouvement = maintenant
+            return True
+        changes = np.count_nonzero(cv2.absdiff(vignette, self.fond) > self.seuil_pixel)
+        cv2.accumulateWeighted(vignette, self.fond, self.adaptation)
+        if changes >= self.fraction_min * vignette.size:
+            self.dernier_mouvement = maintenant
+        return maintenant - self.dernier_mouvement < self.maintien
+
+    def reveiller(self, gris):
+        """Vrai si la détection complète doit tourner sur cette frame"""
+        maintenant = time.time()
+        if self.analyser(gris):
+            self.dernier_reveil = maintenant
+            return True
+        if maintenant - self.dernier_reveil >= self.battement:
+            self.dernier_reveil = maintenant
+            self.reveils_battement += 1
+            return True
+        self.frames_ignorees += 1
+        return False
+
+    def reinitialiser(self):
+        """Oublie le fond (changement de source ou de séquence)"""
+        self.fond = None
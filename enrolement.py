@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+MANGUI FI - ENRÔLEMENT EN MASSE
+Enrôle tout un dossier de photos : nom déduit du fichier, détection et encodage répartis
+sur tous les cœurs, galerie binaire projetable en mémoire (format_galerie) et rapport
+des photos refusées
+
+Exemples :
+    python3 enrolement.py dev_data/
+    python3 enrolement.py marie/ dev_data/ --sortie galerie_manguifi.gal --processus 4
+    python3 enrolement.py photos_rh/ --taille-min 60 --rapport refus.json
+
+Une galerie existante est complétée : les photos déjà enrôlées ne sont pas recalculées
+(--refaire pour tout reprendre).
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+import unicodedata
+
+import cv2
+import numpy as np
+
+# Import différé : nom_depuis_fichier et les lectures de galerie restent utilisables sans dlib
+from chargement_modeles import face_recognition
+from format_galerie import ecrire_galerie, lire_galerie
+from sources_frames import lister_images
+
+
+def nom_depuis_fichier(chemin):
+    """'El Hadji Malick Ndiaye_.jpg' -> 'EL HADJI MALICK NDIAYE', 'Alla NIANG 2.jpg' -> 'ALLA NIANG'"""
+    texte = os.path.splitext(os.path.basename(chemin))[0]
+    # Sans accents : les noms sont affichés avec les polices Hershey d'OpenCV
+    texte = unicodedata.normalize('NFKD', texte).encode('ascii', 'ignore').decode('ascii')
+    mots = ''.join(c if c.isalnum() else ' ' for c in texte.upper()).split()
+    # Numéro de photo en fin de nom (plusieurs photos d'une même personne)
+    while len(mots) > 1 and mots[-1].isdigit():
+        mots.pop()
+    return ' '.join(mots)
+
+
+def enroler_photo(tache):
+    """Dans un processus de travail : (chemin, nom, encodage ou None, motif du refus)"""
+    chemin, modele, upsample, taille_max, taille_min = tache
+    nom = nom_depuis_fichier(chemin)
+    try:
+        image_bgr = cv2.imread(chemin)
+        if image_bgr is None:
+            return chemin, nom, None, "image illisible"
+
+        hauteur, largeur = image_bgr.shape[:2]
+        if max(hauteur, largeur) > taille_max:
+            echelle = taille_max / max(hauteur, largeur)
+            image_bgr = cv2.resize(image_bgr, (int(largeur * echelle), int(hauteur * echelle)))
+        image_rgb = cv2.cvtColor(image_bgr, cv2.COLOR_BGR2RGB)
+
+        face_locations = face_recognition.face_locations(
+            image_rgb, number_of_times_to_upsample=upsample, model=modele)
+        if not face_locations:
+            return chemin, nom, None, "aucun visage"
+        if len(face_locations) > 1:
+            return chemin, nom, None, f"{len(face_locations)} visages"
+        top, right, bottom, left = face_locations[0]
+        if min(bottom - top, right - left) < taille_min:
+            return chemin, nom, None, f"visage trop petit ({bottom - top}px)"
+
+        encodages = face_recognition.face_encodings(image_rgb, face_locations)
+        if not encodages:
+            return chemin, nom, None, "encodage impossible"
+        return chemin, nom, np.asarray(encodages[0], dtype=np.float32), None
+    except Exception as e:
+        return chemin, nom, None, f"erreur: {e}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Enrôlement en masse MANGUI FI")
+    parser.add_argument('dossiers', nargs='+', help="dossiers de photos (nom de la personne = nom du fichier)")
+    parser.add_argument('--sortie', default="galerie_manguifi.gal", help="fichier de galerie")
+    parser.add_argument('--processus', type=int, default=None, help="processus de travail (défaut : tous les cœurs)")
+    parser.add_argument('--modele', choices=['hog', 'cnn'], default='hog', help="détecteur de visages")
+    parser.add_argument('--upsample', type=int, default=1, help="suréchantillonnages HOG")
+    parser.add_argument('--taille-max', type=int, default=1000, help="côté max des photos avant détection (px)")
+    parser.add_argument('--taille-min', type=int, default=40, help="taille min d'un visage accepté (px)")
+    parser.add_argument('--refaire', action='store_true', help="ré-enrôle aussi les photos déjà dans la galerie")
+    parser.add_argument('--rapport', default=None, help="écrit les refus dans ce fichier JSON")
+    args = parser.parse_args()
+
+    parametres = {'modele': args.modele, 'upsample': args.upsample,
+                  'taille_max': args.taille_max, 'taille_min': args.taille_min}
+
+    # Galerie existante : reprise incrémentale si les paramètres n'ont pas changé
+    encodages, noms, fichiers = [], [], []
+    if os.path.exists(args.sortie) and not args.refaire:
+        try:
+            existante = lire_galerie(args.sortie)
+            if existante.metadonnees.get('parametres') != parametres:
+                print("⚠️  Paramètres différents de la galerie existante : ré-enrôlement complet")
+            else:
+                encodages = list(np.array(existante.matrice))
+                noms = existante.noms
+                fichiers = list(existante.metadonnees.get('fichiers', []))
+                print(f"📂 Galerie existante: {len(noms)} photos déjà enrôlées")
+        except Exception as e:
+            print(f"❌ Erreur lecture galerie: {e}")
+
+    deja = set(fichiers)
+    chemins = []
+    for dossier in args.dossiers:
+        if not os.path.isdir(dossier):
+            print(f"⚠️  Dossier introuvable: {dossier}")
+            continue
+        chemins += [c for c in lister_images(dossier) if os.path.abspath(c) not in deja]
+
+    if not chemins:
+        print("✅ Aucune nouvelle photo à enrôler")
+        return 0
+
+    nb_processus = max(1, min(args.processus or os.cpu_count() or 1, len(chemins)))
+    print(f"📸 {len(chemins)} photos à enrôler sur {nb_processus} processus...")
+    taches = [(c, args.modele, args.upsample, args.taille_max, args.taille_min) for c in chemins]
+    refus = []
+    debut = time.time()
+    with multiprocessing.Pool(nb_processus) as pool:
+        # Une photo par tâche : les gros dossiers restent équilibrés entre les cœurs
+        for i, (chemin, nom, encodage, motif) in enumerate(pool.imap_unordered(enroler_photo, taches), 1):
+            if encodage is None:
+                refus.append({'fichier': chemin, 'nom': nom, 'motif': motif})
+                print(f"   ❌ [{i}/{len(chemins)}] {os.path.basename(chemin)}: {motif}")
+                continue
+            encodages.append(encodage)
+            noms.append(nom)
+            fichiers.append(os.path.abspath(chemin))
+            print(f"   ✅ [{i}/{len(chemins)}] {nom}")
+    duree = time.time() - debut
+
+    if encodages:
+        try:
+            ecrire_galerie(args.sortie, encodages, noms,
+                           metadonnees={'parametres': parametres, 'fichiers': fichiers})
+            print(f"\n💾 Galerie écrite: {args.sortie} ({len(noms)} photos, {len(set(noms))} personnes)")
+        except Exception as e:
+            print(f"❌ Erreur écriture galerie: {e}")
+            return 1
+
+    print(f"\n📊 ENRÔLEMENT: {len(chemins) - len(refus)}/{len(chemins)} photos acceptées "
+          f"en {duree:.1f}s ({len(chemins) / max(duree, 1e-6):.1f} photos/s)")
+    if refus:
+        print(f"❌ REFUS ({len(refus)}):")
+        for r in refus:
+            print(f"   • {os.path.basename(r['fichier'])}: {r['motif']}")
+    if args.rapport:
+        with open(args.rapport, 'w', encoding='utf-8') as f:
+            json.dump({'parametres': parametres, 'refus': refus}, f, indent=2, ensure_ascii=False)
+        print(f"💾 Rapport écrit: {args.rapport}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+MANGUI FI - FORMAT BINAIRE DE GALERIE
+Fichier versionné, projeté en mémoire (mmap) au démarrage et partagé en lecture seule
+entre les terminaux d'une même machine ; aucune désérialisation pickle
+
+Disposition (petit-boutiste) :
+    en-tête fixe      magic, version, dimension, nombre de lignes, tailles et positions des blocs
+    métadonnées       JSON UTF-8 (paramètres d'enrôlement, fichiers d'origine...)
+    identités         JSON UTF-8 : liste des noms distincts
+    ids               int32 × N : identité de chaque ligne
+    matrice           float32 × N × D, contiguë, alignée sur 64 octets
+    normes            float32 × N : normes au carré des lignes, alignées sur 64 octets (version 2)
+"""
+
+import json
+import os
+import struct
+
+import numpy as np
+
+MAGIC = b"MGFIGAL\0"
+VERSION = 2
+VERSIONS_LISIBLES = (1, 2)            # Version 1 : sans bloc de normes
+# magic, version, dimension, nombre, pos/taille métadonnées, pos/taille identités, pos ids, pos matrice
+ENTETE = struct.Struct("<8sIIIQQQQQQ")
+ALIGNEMENT = 64
+
+
+def _aligner(position):
+    return (position + ALIGNEMENT - 1) // ALIGNEMENT * ALIGNEMENT
+
+
+def ecrire_galerie(chemin, encodages, noms, metadonnees=None):
+    """Écrit une galerie (écriture atomique : un terminal qui la lit ne voit jamais un fichier partiel)"""
+    matrice = np.ascontiguousarray(encodages, dtype='<f4')
+    if matrice.ndim != 2 or len(matrice) != len(noms):
+        raise ValueError("encodages (N×D) et noms doivent avoir la même longueur")
+    identites = {}
+    ids = np.array([identites.setdefault(nom, len(identites)) for nom in noms], dtype='<i4')
+    bloc_meta = json.dumps(metadonnees or {}, ensure_ascii=False, sort_keys=True).encode('utf-8')
+    bloc_identites = json.dumps(list(identites), ensure_ascii=False).encode('utf-8')
+
+    pos_meta = ENTETE.size
+    pos_identites = pos_meta + len(bloc_meta)
+    pos_ids = _aligner(pos_identites + len(bloc_identites))
+    pos_matrice = _aligner(pos_ids + ids.nbytes)
+    normes = np.einsum('ij,ij->i', matrice, matrice).astype('<f4')
+    entete = ENTETE.pack(MAGIC, VERSION, matrice.shape[1], len(matrice),
+                         pos_meta, len(bloc_meta), pos_identites, len(bloc_identites), pos_ids, pos_matrice)
+
+    temporaire = chemin + ".tmp"
+    with open(temporaire, 'wb') as f:
+        f.write(entete)
+        f.write(bloc_meta)
+        f.write(bloc_identites)
+        f.write(b"\0" * (pos_ids - f.tell()))
+        f.write(ids.tobytes())
+        f.write(b"\0" * (pos_matrice - f.tell()))
+        f.write(matrice.tobytes())
+        f.write(b"\0" * (_aligner(f.tell()) - f.tell()))
+        f.write(normes.tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporaire, chemin)
+
+
+class GalerieFichier:
+    """Galerie projetée en mémoire : la matrice n'est lue du disque qu'à l'usage, pages partagées entre processus"""
+
+    def __init__(self, chemin):
+        self.chemin = chemin
+        taille_fichier = os.path.getsize(chemin)
+        with open(chemin, 'rb') as f:
+            brut = f.read(ENTETE.size)
+            if len(brut) < ENTETE.size:
+                raise ValueError(f"galerie tronquée: {chemin}")
+            (magic, self.version, self.dimension, self.nombre, pos_meta, taille_meta,
+             pos_identites, taille_identites, pos_ids, pos_matrice) = ENTETE.unpack(brut)
+            if magic != MAGIC:
+                raise ValueError(f"pas un fichier de galerie MANGUI FI: {chemin}")
+            if self.version not in VERSIONS_LISIBLES:
+                raise ValueError(f"version de galerie non supportée: {self.version}")
+            taille_matrice = self.nombre * self.dimension * 4
+            pos_normes = _aligner(pos_matrice + taille_matrice)
+            fin = pos_normes + self.nombre * 4 if self.version >= 2 else pos_matrice + taille_matrice
+            if fin > taille_fichier:
+                raise ValueError(f"galerie tronquée: {chemin}")
+            f.seek(pos_meta)
+            self.metadonnees = json.loads(f.read(taille_meta).decode('utf-8'))
+            f.seek(pos_identites)
+            self.identites = json.loads(f.read(taille_identites).decode('utf-8'))
+
+        # Projections en lecture seule : aucune copie, le noyau partage les pages entre terminaux
+        self.ids = np.memmap(chemin, dtype='<i4', mode='r', offset=pos_ids, shape=(self.nombre,)) \
+            if self.nombre else np.zeros(0, dtype=np.int32)
+        self.matrice = np.memmap(chemin, dtype='<f4', mode='r', offset=pos_matrice,
+                                 shape=(self.nombre, self.dimension)) \
+            if self.nombre else np.zeros((0, self.dimension), dtype=np.float32)
+        # Normes au carré précalculées à l'écriture (None pour une galerie version 1)
+        self.normes = None
+        if self.version >= 2:
+            self.normes = np.memmap(chemin, dtype='<f4', mode='r', offset=pos_normes, shape=(self.nombre,)) \
+                if self.nombre else np.zeros(0, dtype=np.float32)
+
+    def __len__(self):
+        return self.nombre
+
+    @property
+    def noms(self):
+        """Nom de chaque ligne de la matrice"""
+        return [self.identites[i] for i in self.ids]
+
+
+def lire_galerie(chemin):
+    """Ouvre une galerie écrite par ecrire_galerie()"""
+    return GalerieFichier(chemin)
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+MANGUI FI - GALERIE DE RÉFÉRENCES VECTORISÉE
+Toutes les références dans une seule matrice float32 (N×128) avec normes précalculées,
+et index IVF optionnel (index_ann) pour les galeries de plusieurs milliers de photos
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+from index_ann import IndexIVF
+
+# Meilleure et deuxième meilleure identité pour un visage (distance euclidienne, comme face_distance)
+Correspondance = namedtuple(
+    'Correspondance',
+    ['indice', 'nom', 'distance', 'indice_second', 'nom_second', 'distance_second']
+)
+
+
+class GalerieVisages:
+    """Galerie contiguë des encodages de référence, comparée en une seule opération matricielle"""
+
+    def __init__(self, encodages=None, noms=None, dimension=128):
+        self.dimension = dimension
+        self.identites = {}                       # nom -> identifiant entier
+        self._table_noms = []                     # identifiant entier -> nom (noms distincts)
+        self._capacite = 0
+        self._taille = 0
+        self._matrice = np.zeros((0, dimension), dtype=np.float32)
+        self._normes_carre = np.zeros(0, dtype=np.float32)
+        self._ids = np.zeros(0, dtype=np.int32)
+        self._actifs = np.zeros(0, dtype=bool)    # Faux pour une photo supprimée (ligne conservée)
+        self._supprimees = 0
+        self.index = None                          # IndexIVF si activer_index() a été appelé
+        self.seuil_exact = 2000                    # En deçà : recherche exacte même avec un index
+        if encodages is not None:
+            self.definir(encodages, noms)
+
+    def __len__(self):
+        return self._taille - self._supprimees
+
+    @property
+    def matrice(self):
+        """Vue (N×D) sur les encodages valides"""
+        return self._matrice[:self._taille]
+
+    @property
+    def noms(self):
+        """Nom de chaque ligne (construit à la demande)"""
+        return [self._table_noms[i] for i in self._ids[:self._taille].tolist()]
+
+    def definir(self, encodages, noms, ids=None, normes_carre=None):
+        """Remplace tout le contenu de la galerie
+
+        Sans ids : un nom par ligne. Avec ids (identité de chaque ligne) : noms est la table des
+        noms distincts, et matrice, ids et normes_carre (projections mmap de format_galerie) sont
+        utilisés sans copie, sans objet Python par ligne et sans repasser sur la matrice.
+        """
+        encodages = np.asarray(encodages, dtype=np.float32).reshape(-1, self.dimension)
+        if ids is None:
+            self.identites = {}
+            ids = [self.identites.setdefault(nom, len(self.identites)) for nom in noms]
+            self._table_noms = list(self.identites)
+        else:
+            self._table_noms = list(noms)
+            self.identites = {nom: i for i, nom in enumerate(self._table_noms)}
+        self._ids = np.asarray(ids, dtype=np.int32)
+        if len(encodages) != len(self._ids):
+            raise ValueError("encodages et noms doivent avoir la même longueur")
+        self._matrice = np.ascontiguousarray(encodages)
+        if normes_carre is not None:
+            self._normes_carre = np.asarray(normes_carre, dtype=np.float32)
+        else:
+            self._normes_carre = np.einsum('ij,ij->i', self._matrice, self._matrice)
+        self._actifs = np.ones(len(self._ids), dtype=bool)
+        self._supprimees = 0
+        self._capacite = self._taille = len(self._ids)
+        if self.index is not None:
+            self._reconstruire_index()
+
+    def ajouter(self, encodage, nom):
+        """Ajoute une référence (capacité doublée au besoin pour rester contiguë)"""
+        if self._taille == self._capacite:
+            self._agrandir(max(8, 2 * self._capacite))
+        vecteur = np.asarray(encodage, dtype=np.float32).reshape(self.dimension)
+        i = self._taille
+        self._matrice[i] = vecteur
+        self._normes_carre[i] = float(np.dot(vecteur, vecteur))
+        if nom not in self.identites:
+            self.identites[nom] = len(self._table_noms)
+            self._table_noms.append(nom)
+        self._ids[i] = self.identites[nom]
+        self._actifs[i] = True
+        self._taille += 1
+        if self.index is not None:
+            if not self.index.entraine or len(self) > 4 * self.index.taille_entrainement:
+                # Seuil franchi ou galerie qui a beaucoup grandi : centroïdes recalculés
+                self._reconstruire_index()
+            else:
+                self.index.ajouter([i], vecteur)
+
+    def supprimer(self, nom):
+        """Retire toutes les photos d'une personne ; retourne le nombre de photos retirées"""
+        identite = self.identites.get(nom)
+        if identite is None:
+            return 0
+        lignes = np.flatnonzero((self._ids[:self._taille] == identite) & self._actifs[:self._taille])
+        self._actifs[lignes] = False
+        self._supprimees += len(lignes)
+        if self.index is not None and self.index.entraine:
+            for ligne in lignes.tolist():
+                self.index.supprimer(ligne)
+        return len(lignes)
+
+    def activer_index(self, nb_sondes=8, seuil_exact=2000, nb_listes=None):
+        """Recherche approximative (IVF) au-delà de `seuil_exact` photos actives, exacte en deçà
+
+        L'index n'est construit (k-means et listes) qu'une fois le seuil atteint : une petite
+        galerie projetée en mémoire n'est jamais parcourue ni copiée au chargement.
+        """
+        self.index = IndexIVF(self.dimension, nb_listes=nb_listes, nb_sondes=nb_sondes)
+        self.seuil_exact = seuil_exact
+        self._reconstruire_index()
+
+    def _reconstruire_index(self):
+        lignes = np.flatnonzero(self._actifs[:self._taille])
+        if len(lignes) < max(1, self.seuil_exact):
+            self.index.centroides = None
+            return
+        vecteurs = self._matrice[lignes]
+        self.index.entrainer(vecteurs)
+        self.index.ajouter(lignes, vecteurs)
+
+    def _agrandir(self, capacite):
+        matrice = np.zeros((capacite, self.dimension), dtype=np.float32)
+        normes = np.zeros(capacite, dtype=np.float32)
+        ids = np.zeros(capacite, dtype=np.int32)
+        actifs = np.zeros(capacite, dtype=bool)
+        matrice[:self._taille] = self._matrice[:self._taille]
+        normes[:self._taille] = self._normes_carre[:self._taille]
+        ids[:self._taille] = self._ids[:self._taille]
+        actifs[:self._taille] = self._actifs[:self._taille]
+        self._matrice, self._normes_carre, self._ids, self._actifs = matrice, normes, ids, actifs
+        self._capacite = capacite
+
+    def distances(self, encodages):
+        """Matrice (F×N) des distances euclidiennes entre F visages et N références"""
+        requetes = np.asarray(encodages, dtype=np.float32).reshape(-1, self.dimension)
+        n = self._taille
+        # ||a - b||² = ||a||² + ||b||² - 2 a·b, en un seul produit matriciel
+        carres = (np.einsum('ij,ij->i', requetes, requetes)[:, None]
+                  + self._normes_carre[:n][None, :]
+                  - 2.0 * (requetes @ self._matrice[:n].T))
+        np.maximum(carres, 0.0, out=carres)
+        if self._supprimees:
+            carres[:, ~self._actifs[:n]] = np.inf
+        return np.sqrt(carres, out=carres)
+
+    def identifier(self, encodages):
+        """Meilleure et deuxième meilleure identité pour chaque visage de la frame"""
+        if len(encodages) == 0 or len(self) == 0:
+            return []
+        if self.index is not None and self.index.entraine and len(self) >= self.seuil_exact:
+            return self._identifier_index(encodages)
+        distances = self.distances(encodages)
+        lignes = np.arange(distances.shape[0])
+        meilleurs = np.argmin(distances, axis=1)
+        meilleures_distances = distances[lignes, meilleurs]
+
+        # Deuxième meilleure identité distincte : on masque toutes les photos de la première
+        ids = self._ids[:self._taille]
+        meme_identite = ids[None, :] == ids[meilleurs][:, None]
+        autres = np.where(meme_identite, np.inf, distances)
+        seconds = np.argmin(autres, axis=1)
+        secondes_distances = autres[lignes, seconds]
+
+        correspondances = []
+        for i in range(len(lignes)):
+            indice_second = int(seconds[i]) if np.isfinite(secondes_distances[i]) else None
+            correspondances.append(Correspondance(
+                indice=int(meilleurs[i]),
+                nom=self._table_noms[ids[meilleurs[i]]],
+                distance=float(meilleures_distances[i]),
+                indice_second=indice_second,
+                nom_second=self._table_noms[ids[indice_second]] if indice_second is not None else None,
+                distance_second=float(secondes_distances[i]) if indice_second is not None else None
+            ))
+        return correspondances
+
+    def _identifier_index(self, encodages):
+        """Comme identifier(), mais restreint aux listes de l'index les plus proches de chaque visage"""
+        requetes = np.asarray(encodages, dtype=np.float32).reshape(-1, self.dimension)
+        correspondances = []
+        for requete in requetes:
+            lignes, vecteurs = self.index.candidats(requete)
+            if not len(lignes):
+                # Listes sondées vides : recherche exacte pour ce visage
+                correspondances += self.identifier_exact(requete[None, :])
+                continue
+            carres = np.maximum(np.dot(requete, requete) + self._normes_carre[lignes]
+                                - 2.0 * (vecteurs @ requete), 0.0)
+            distances = np.sqrt(carres)
+            meilleur = int(np.argmin(distances))
+            ids = self._ids[lignes]
+            autres = np.where(ids == ids[meilleur], np.inf, distances)
+            second = int(np.argmin(autres))
+            trouve_second = bool(np.isfinite(autres[second]))
+            correspondances.append(Correspondance(
+                indice=int(lignes[meilleur]),
+                nom=self._table_noms[ids[meilleur]],
+                distance=float(distances[meilleur]),
+                indice_second=int(lignes[second]) if trouve_second else None,
+                nom_second=self._table_noms[ids[second]] if trouve_second else None,
+                distance_second=float(autres[second]) if trouve_second else None
+            ))
+        return correspondances
+
+    def identifier_exact(self, encodages):
+        """identifier() sans index (référence pour mesurer le rappel de l'index)"""
+        index, self.index = self.index, None
+        try:
+            return self.identifier(encodages)
+        finally:
+            self.index = index
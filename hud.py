@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+MANGUI FI - INTERFACE À COUCHES PRÉ-RENDUES
+En-tête assombri en place (zone limitée, sans copie de la frame), textes rastérisés
+une seule fois puis recollés, et bandeaux statiques (pied de page) mis en cache
+"""
+
+import cv2
+import numpy as np
+
+POLICE = cv2.FONT_HERSHEY_SIMPLEX
+
+
+class CoucheTexte:
+    """Texte rastérisé une fois : vignette couleur + masque, recollés à chaque frame"""
+
+    def __init__(self, texte, echelle, couleur, epaisseur=1):
+        self.texte = texte
+        self.echelle = echelle
+        self.couleur = couleur
+        self.epaisseur = epaisseur
+        (largeur, hauteur), ligne_base = cv2.getTextSize(texte, POLICE, echelle, epaisseur)
+        # Marge pour les jambages et l'épaisseur du trait
+        self.marge = epaisseur + 1
+        self.montee = hauteur + self.marge
+        # Couverture du texte blanc sur noir : binaire (LINE_8) ou lissée selon la version d'OpenCV
+        couverture = np.zeros((hauteur + ligne_base + 2 * self.marge, largeur + 2 * self.marge, 3), dtype=np.uint8)
+        cv2.putText(couverture, texte, (self.marge, self.montee), POLICE, echelle, (255, 255, 255), epaisseur)
+        couverture = couverture[:, :, :1]
+        self.masque = couverture > 0
+        self.binaire = bool(np.all(couverture[self.masque] == 255))
+        self.alpha = None if self.binaire else couverture.astype(np.float32) / 255.0
+        self.vignette = np.empty(couverture.shape[:2] + (3,), dtype=np.uint8)
+        self.vignette[:] = couleur
+
+    def est(self, texte, echelle, couleur, epaisseur):
+        return (self.texte, self.echelle, self.couleur, self.epaisseur) == (texte, echelle, couleur, epaisseur)
+
+    def coller(self, frame, position):
+        """Recolle le texte, `position` étant l'origine cv2.putText (gauche, ligne de base)"""
+        x0, y0 = position[0] - self.marge, position[1] - self.montee
+        h, w = frame.shape[:2]
+        hm, wm = self.masque.shape[:2]
+        # Découpage aux bords de la frame
+        gx, gy = max(0, -x0), max(0, -y0)
+        dx, dy = min(wm, w - x0), min(hm, h - y0)
+        if dx <= gx or dy <= gy:
+            return
+        zone = frame[y0 + gy:y0 + dy, x0 + gx:x0 + dx]
+        if self.binaire:
+            np.copyto(zone, self.vignette[gy:dy, gx:dx], where=self.masque[gy:dy, gx:dx])
+        else:
+            alpha = self.alpha[gy:dy, gx:dx]
+            zone[:] = zone * (1.0 - alpha) + self.vignette[gy:dy, gx:dx] * alpha + 0.5
+
+
+class HUD:
+    """Couches d'interface en cache : seuls les textes dont la valeur change sont re-rastérisés"""
+
+    def __init__(self):
+        self._textes = {}        # position -> CoucheTexte
+        self._bandeaux = {}      # (y0, y1, largeur, textes) -> bandeau pré-rendu
+
+    def assombrir(self, frame, y0, y1, alpha=0.7):
+        """Équivaut à fondre un rectangle noir d'opacité `alpha` (lignes y0 à y1 incluses, comme cv2.rectangle)"""
+        zone = frame[max(0, y0):min(frame.shape[0], y1 + 1)]
+        cv2.convertScaleAbs(zone, zone, 1.0 - alpha)
+
+    def texte(self, frame, texte, position, echelle, couleur, epaisseur=1):
+        """Comme cv2.putText ; le rendu est refait seulement si le texte ou son style changent"""
+        couche = self._textes.get(position)
+        if couche is None or not couche.est(texte, echelle, couleur, epaisseur):
+            couche = self._textes[position] = CoucheTexte(texte, echelle, couleur, epaisseur)
+        couche.coller(frame, position)
+
+    def bandeau(self, frame, y0, y1, textes, fond=(0, 0, 0)):
+        """Bandeau opaque statique (pied de page) : rendu une fois, puis simple copie de la zone
+
+        textes : liste de (texte, position dans la frame, échelle, couleur)
+        """
+        y0, y1 = max(0, y0), min(frame.shape[0], y1)
+        cle = (y0, y1, frame.shape[1], tuple(textes), fond)
+        image = self._bandeaux.get(cle)
+        if image is None:
+            image = np.empty((y1 - y0, frame.shape[1], 3), dtype=np.uint8)
+            image[:] = fond
+            for texte, (x, y), echelle, couleur in textes:
+                cv2.putText(image, texte, (x, y - y0), POLICE, echelle, couleur, 1)
+            self._bandeaux[cle] = image
+        frame[y0:y1] = image
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+MANGUI FI - INDEX APPROXIMATIF DES PLUS PROCHES VOISINS
+Index IVF (listes inversées) en NumPy pour les grandes galeries : les références sont
+rangées par centroïde (k-means) et seules les listes des `nb_sondes` centroïdes les plus
+proches d'un visage sont comparées. Insertion et suppression incrémentales.
+
+Banc recall / latence :
+    python3 index_ann.py --references 20000 --requetes 500 --sondes 1 2 4 8 16
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+
+def distances_carrees(a, b, normes_b=None):
+    """Matrice des distances euclidiennes au carré entre les lignes de a et de b"""
+    if normes_b is None:
+        normes_b = np.einsum('ij,ij->i', b, b)
+    carres = np.einsum('ij,ij->i', a, a)[:, None] + normes_b[None, :] - 2.0 * (a @ b.T)
+    return np.maximum(carres, 0.0, out=carres)
+
+
+class IndexIVF:
+    """Listes inversées : identifiant entier -> vecteur, regroupés par centroïde le plus proche"""
+
+    def __init__(self, dimension=128, nb_listes=None, nb_sondes=8, iterations=10, graine=0):
+        self.dimension = dimension
+        self.nb_listes = nb_listes            # None = racine carrée du nombre de vecteurs d'entraînement
+        self.nb_sondes = nb_sondes            # Listes examinées par requête (compromis rappel / latence)
+        self.iterations = iterations
+        self.graine = graine
+        self.centroides = None
+        self.taille_entrainement = 0
+        self._vecteurs = []                   # Par liste : matrice (capacité × D)
+        self._ids = []                        # Par liste : identifiants
+        self._tailles = []
+        self._position = {}                   # identifiant -> (liste, position)
+
+    def __len__(self):
+        return len(self._position)
+
+    @property
+    def entraine(self):
+        return self.centroides is not None
+
+    def entrainer(self, vecteurs):
+        """k-means sur les vecteurs (ou un échantillon) ; vide l'index"""
+        vecteurs = np.asarray(vecteurs, dtype=np.float32).reshape(-1, self.dimension)
+        if not len(vecteurs):
+            raise ValueError("aucun vecteur pour entraîner l'index")
+        rng = np.random.default_rng(self.graine)
+        nb_listes = self.nb_listes or int(np.sqrt(len(vecteurs)))
+        nb_listes = max(1, min(nb_listes, len(vecteurs)))
+        # 64 points par centroïde suffisent pour placer les centres
+        echantillon = vecteurs if len(vecteurs) <= 64 * nb_listes else \
+            vecteurs[rng.choice(len(vecteurs), 64 * nb_listes, replace=False)]
+        centroides = echantillon[rng.choice(len(echantillon), nb_listes, replace=False)].copy()
+        for _ in range(self.iterations):
+            affectation = np.argmin(distances_carrees(echantillon, centroides), axis=1)
+            comptes = np.bincount(affectation, minlength=nb_listes)
+            sommes = np.zeros_like(centroides)
+            np.add.at(sommes, affectation, echantillon)
+            vides = comptes == 0
+            centroides[~vides] = sommes[~vides] / comptes[~vides, None]
+            # Centroïde sans point : relancé sur un point au hasard
+            if vides.any():
+                centroides[vides] = echantillon[rng.choice(len(echantillon), int(vides.sum()))]
+
+        self.centroides = centroides
+        self._normes_centroides = np.einsum('ij,ij->i', centroides, centroides)
+        self.taille_entrainement = len(vecteurs)
+        self._vecteurs = [np.zeros((0, self.dimension), dtype=np.float32) for _ in range(nb_listes)]
+        self._ids = [np.zeros(0, dtype=np.int64) for _ in range(nb_listes)]
+        self._tailles = [0] * nb_listes
+        self._position = {}
+
+    def ajouter(self, ids, vecteurs):
+        """Insère des vecteurs sous des identifiants entiers (un identifiant existant est remplacé)"""
+        vecteurs = np.asarray(vecteurs, dtype=np.float32).reshape(-1, self.dimension)
+        ids = np.asarray(ids, dtype=np.int64).reshape(-1)
+        if not self.entraine:
+            raise RuntimeError("index non entraîné")
+        listes = np.argmin(distances_carrees(vecteurs, self.centroides, self._normes_centroides), axis=1)
+        for identifiant, vecteur, liste in zip(ids.tolist(), vecteurs, listes.tolist()):
+            if identifiant in self._position:
+                self.supprimer(identifiant)
+            taille = self._tailles[liste]
+            if taille == len(self._vecteurs[liste]):
+                capacite = max(8, 2 * taille)
+                vecteurs_liste = np.zeros((capacite, self.dimension), dtype=np.float32)
+                ids_liste = np.zeros(capacite, dtype=np.int64)
+                vecteurs_liste[:taille] = self._vecteurs[liste][:taille]
+                ids_liste[:taille] = self._ids[liste][:taille]
+                self._vecteurs[liste], self._ids[liste] = vecteurs_liste, ids_liste
+            self._vecteurs[liste][taille] = vecteur
+            self._ids[liste][taille] = identifiant
+            self._tailles[liste] = taille + 1
+            self._position[identifiant] = (liste, taille)
+
+    def supprimer(self, identifiant):
+        """Retire un identifiant (le dernier élément de sa liste prend sa place) ; faux s'il est absent"""
+        position = self._position.pop(int(identifiant), None)
+        if position is None:
+            return False
+        liste, i = position
+        dernier = self._tailles[liste] - 1
+        if i != dernier:
+            self._vecteurs[liste][i] = self._vecteurs[liste][dernier]
+            deplace = int(self._ids[liste][dernier])
+            self._ids[liste][i] = deplace
+            self._position[deplace] = (liste, i)
+        self._tailles[liste] = dernier
+        return True
+
+    def candidats(self, requete, nb_sondes=None):
+        """(identifiants, vecteurs) des listes les plus proches d'une requête"""
+        nb_sondes = min(nb_sondes or self.nb_sondes, len(self.centroides))
+        proximites = distances_carrees(requete[None, :], self.centroides, self._normes_centroides)[0]
+        sondes = np.argpartition(proximites, nb_sondes - 1)[:nb_sondes] if nb_sondes < len(proximites) \
+            else np.arange(len(proximites))
+        sondes = [l for l in sondes.tolist() if self._tailles[l]]
+        if not sondes:
+            return np.zeros(0, dtype=np.int64), np.zeros((0, self.dimension), dtype=np.float32)
+        ids = np.concatenate([self._ids[l][:self._tailles[l]] for l in sondes])
+        vecteurs = np.concatenate([self._vecteurs[l][:self._tailles[l]] for l in sondes])
+        return ids, vecteurs
+
+    def rechercher(self, requetes, k=1, nb_sondes=None):
+        """k plus proches voisins approximatifs : (distances, identifiants), complétés par inf / -1"""
+        requetes = np.asarray(requetes, dtype=np.float32).reshape(-1, self.dimension)
+        distances = np.full((len(requetes), k), np.inf, dtype=np.float32)
+        trouves = np.full((len(requetes), k), -1, dtype=np.int64)
+        for q, requete in enumerate(requetes):
+            ids, vecteurs = self.candidats(requete, nb_sondes)
+            if not len(ids):
+                continue
+            carres = distances_carrees(requete[None, :], vecteurs)[0]
+            n = min(k, len(ids))
+            meilleurs = np.argpartition(carres, n - 1)[:n] if n < len(ids) else np.arange(len(ids))
+            meilleurs = meilleurs[np.argsort(carres[meilleurs])]
+            distances[q, :n] = np.sqrt(carres[meilleurs])
+            trouves[q, :n] = ids[meilleurs]
+        return distances, trouves
+
+
+def recherche_exacte(base, requetes, k=1):
+    """Référence du banc : k plus proches voisins exacts (identifiants = indices de ligne)"""
+    carres = distances_carrees(requetes, base)
+    meilleurs = np.argsort(carres, axis=1)[:, :k]
+    return np.sqrt(np.take_along_axis(carres, meilleurs, axis=1)), meilleurs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Banc recall / latence de l'index IVF")
+    parser.add_argument('--references', type=int, default=20000, help="taille de la galerie simulée")
+    parser.add_argument('--photos-par-agent', type=int, default=4)
+    parser.add_argument('--requetes', type=int, default=500)
+    parser.add_argument('--listes', type=int, default=None, help="nombre de listes (défaut : racine de N)")
+    parser.add_argument('--sondes', type=int, nargs='+', default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument('--galerie', default=None, help="galerie réelle (format_galerie) au lieu de données simulées")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    if args.galerie:
+        from format_galerie import lire_galerie
+        base = np.array(lire_galerie(args.galerie).matrice)
+        requetes = base[rng.choice(len(base), min(args.requetes, len(base)), replace=False)]
+        requetes = requetes + rng.normal(0, 0.02, requetes.shape).astype(np.float32)
+    else:
+        # Encodages simulés : un centre par agent, photos et visages de caméra dispersés autour
+        nb_agents = max(1, args.references // args.photos_par_agent)
+        centres = rng.normal(0, 0.09, (nb_agents, 128)).astype(np.float32)
+        agents = rng.integers(0, nb_agents, args.references)
+        base = centres[agents] + rng.normal(0, 0.025, (args.references, 128)).astype(np.float32)
+        requetes = centres[rng.integers(0, nb_agents, args.requetes)] + \
+            rng.normal(0, 0.025, (args.requetes, 128)).astype(np.float32)
+
+    print(f"\n🧪 INDEX IVF - {len(base)} références, {len(requetes)} requêtes")
+    debut = time.perf_counter()
+    _, exacts = recherche_exacte(base, requetes)
+    duree_exacte = (time.perf_counter() - debut) / len(requetes)
+    # Latence exacte par visage, comme dans la boucle (une requête à la fois)
+    debut = time.perf_counter()
+    for requete in requetes[:100]:
+        recherche_exacte(base, requete[None, :])
+    duree_exacte_unitaire = (time.perf_counter() - debut) / min(100, len(requetes))
+
+    index = IndexIVF(dimension=base.shape[1], nb_listes=args.listes)
+    debut = time.perf_counter()
+    index.entrainer(base)
+    index.ajouter(np.arange(len(base)), base)
+    print(f"   Construction: {time.perf_counter() - debut:.2f}s ({len(index.centroides)} listes)")
+    print(f"   Exact: {duree_exacte_unitaire * 1000:.3f} ms/visage "
+          f"({duree_exacte * 1000:.3f} ms/visage par lot)")
+
+    print(f"\n   {'sondes':>6}  {'rappel@1':>9}  {'ms/visage':>10}  {'accélération':>12}")
+    for nb_sondes in args.sondes:
+        debut = time.perf_counter()
+        _, trouves = index.rechercher(requetes, k=1, nb_sondes=nb_sondes)
+        duree = (time.perf_counter() - debut) / len(requetes)
+        rappel = float(np.mean(trouves[:, 0] == exacts[:, 0]))
+        print(f"   {nb_sondes:>6}  {rappel:>9.1%}  {duree * 1000:>10.3f}  {duree_exacte_unitaire / duree:>11.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
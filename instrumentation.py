@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+MANGUI FI - MESURES DE LATENCE
+Chronométrage par étape (capture, prétraitement, détection, encodage, comparaison...),
+percentiles glissants p50/p95/p99, FPS effectifs, overlay à l'écran et fichier de métriques
+"""
+
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import cv2
+import numpy as np
+
+
+class MesuresLatence:
+    """Fenêtres glissantes de durées par étape, partagées entre les threads du pipeline"""
+
+    def __init__(self, taille_fenetre=300, fichier_metriques="metriques_manguifi.jsonl",
+                 intervalle_export=10.0):
+        self.taille_fenetre = taille_fenetre          # Nombre de mesures gardées par étape
+        self.fichier_metriques = fichier_metriques    # None = pas d'export
+        self.intervalle_export = intervalle_export    # Secondes entre deux lignes du fichier de métriques
+        self.durees = {}
+        self.totaux = {}                              # Nombre total de mesures par étape (hors fenêtre)
+        self.passages = {}
+        self._verrou = threading.Lock()
+        self._dernier_export = time.time()
+
+    def ajouter(self, etape, duree):
+        """Enregistre une durée (secondes) pour une étape"""
+        with self._verrou:
+            if etape not in self.durees:
+                self.durees[etape] = deque(maxlen=self.taille_fenetre)
+            self.durees[etape].append(duree)
+            self.totaux[etape] = self.totaux.get(etape, 0) + 1
+
+    @contextmanager
+    def mesurer(self, etape):
+        """Chronomètre le bloc `with` et l'enregistre sous le nom de l'étape"""
+        debut = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.ajouter(etape, time.perf_counter() - debut)
+
+    def dernieres(self, etape, n):
+        """Les n dernières durées (secondes) d'une étape, au plus la taille de la fenêtre"""
+        with self._verrou:
+            valeurs = list(self.durees.get(etape, ()))
+        return valeurs[-n:] if n > 0 else []
+
+    def compter(self, flux):
+        """Marque le passage d'une frame dans un flux ('affichage', 'reconnaissance'...) pour le FPS"""
+        with self._verrou:
+            if flux not in self.passages:
+                self.passages[flux] = deque(maxlen=self.taille_fenetre)
+            self.passages[flux].append(time.perf_counter())
+
+    def fps(self, flux):
+        """FPS effectif d'un flux sur la fenêtre glissante"""
+        with self._verrou:
+            passages = list(self.passages.get(flux, ()))
+        if len(passages) < 2 or passages[-1] <= passages[0]:
+            return 0.0
+        return (len(passages) - 1) / (passages[-1] - passages[0])
+
+    def resume(self):
+        """Percentiles (ms) par étape et FPS par flux"""
+        with self._verrou:
+            durees = {etape: list(valeurs) for etape, valeurs in self.durees.items() if valeurs}
+            flux = list(self.passages)
+        etapes = {}
+        for etape, valeurs in durees.items():
+            p50, p95, p99 = np.percentile(np.asarray(valeurs) * 1000.0, [50, 95, 99])
+            etapes[etape] = {'p50': float(p50), 'p95': float(p95), 'p99': float(p99), 'n': len(valeurs)}
+        return {'etapes': etapes, 'fps': {nom: self.fps(nom) for nom in flux}}
+
+    def exporter_si_necessaire(self, force=False):
+        """Ajoute un instantané au fichier de métriques toutes les `intervalle_export` secondes"""
+        if self.fichier_metriques is None:
+            return
+        maintenant = time.time()
+        if not force and maintenant - self._dernier_export < self.intervalle_export:
+            return
+        self._dernier_export = maintenant
+        instantane = self.resume()
+        instantane['timestamp'] = maintenant
+        try:
+            with open(self.fichier_metriques, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(instantane, ensure_ascii=False) + "\n")
+        except Exception as e:
+            print(f"❌ Erreur export métriques: {e}")
+
+    def dessiner(self, frame, x=None, y=90):
+        """Overlay des latences (p50/p95/p99 en ms) et des FPS dans un coin de la frame"""
+        resume = self.resume()
+        lignes = [f"{nom.upper()}: {valeur:.1f} FPS" for nom, valeur in resume['fps'].items()]
+        lignes += [f"{etape}: {m['p50']:.1f} / {m['p95']:.1f} / {m['p99']:.1f} ms"
+                   for etape, m in resume['etapes'].items()]
+        if not lignes:
+            return
+        lignes.insert(len(resume['fps']), "p50 / p95 / p99")
+
+        h, w = frame.shape[:2]
+        largeur, hauteur = 280, 16 * len(lignes) + 10
+        x = w - largeur - 10 if x is None else x
+        y1, x1 = min(h, y + hauteur), min(w, x + largeur)
+        # Fond semi-transparent limité à la zone de l'overlay
+        zone = frame[y:y1, x:x1]
+        cv2.addWeighted(zone, 0.3, np.zeros_like(zone), 0.7, 0, zone)
+        for i, ligne in enumerate(lignes):
+            cv2.putText(frame, ligne, (x + 6, y + 18 + 16 * i),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.4, (0, 255, 255), 1)
+
+    def afficher(self):
+        """Résumé des latences dans la console"""
+        resume = self.resume()
+        print(f"\n⏱️  LATENCES PAR ÉTAPE (ms):")
+        for nom, valeur in resume['fps'].items():
+            print(f"   🎞️  {nom}: {valeur:.1f} FPS")
+        for etape, m in resume['etapes'].items():
+            print(f"   • {etape}: p50={m['p50']:.1f}  p95={m['p95']:.1f}  p99={m['p99']:.1f}  (n={m['n']})")
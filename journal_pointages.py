@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+MANGUI FI - JOURNAL DES POINTAGES
+Écriture append-only (JSON Lines) avec fsync groupé et compaction périodique
+vers le fichier tableau JSON historique (pointages_manguifi.json).
+Un thread d'entretien fait le fsync à échéance et la fusion des journaux mis de côté :
+le thread de reconnaissance ne paie ni l'attente disque ni la réécriture de l'historique.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+
+
+class JournalPointages:
+    """Journal append-only des pointages, lisible avec les anciens fichiers tableau JSON"""
+
+    def __init__(self, fichier_json="pointages_manguifi.json", lot_fsync=8, delai_fsync=2.0,
+                 seuil_compaction=1000, taille_recents=50):
+        self.fichier_json = fichier_json
+        base = os.path.splitext(fichier_json)[0]
+        self.fichier_journal = base + ".jsonl"
+        self.fichier_compaction = base + ".jsonl.compaction"
+        self.lot_fsync = lot_fsync                # fsync au plus tous les N pointages...
+        self.delai_fsync = delai_fsync            # ...ou toutes les N secondes
+        self.seuil_compaction = seuil_compaction  # Compaction quand le journal dépasse N lignes
+        self._verrou = threading.RLock()
+        self._verrou_compaction = threading.Lock()   # Fusion du journal mis de côté / lecture complète
+        self._non_synchronises = 0
+        self._premier_non_synchronise = 0.0
+        self._flux = None
+        self._reveil = threading.Event()
+        self._arret = threading.Event()
+
+        self._reprendre_compaction()
+        journal = self._lire_journal(self.fichier_journal)
+        self.lignes_journal = len(journal)
+        # Queue de l'historique gardée en mémoire (anti-doublon sans relire le disque)
+        self.recents = deque(maxlen=taille_recents)
+        if len(journal) < taille_recents:
+            self.recents.extend(self._lire_tableau(self.fichier_json)[-(taille_recents - len(journal)):])
+        self.recents.extend(journal[-taille_recents:])
+        self._flux = open(self.fichier_journal, 'a', encoding='utf-8')
+        self._thread = threading.Thread(target=self._entretien, name="journal-pointages", daemon=True)
+        self._thread.start()
+
+    @staticmethod
+    def _lire_tableau(chemin):
+        """Lit un fichier tableau JSON historique (liste de pointages)"""
+        if not os.path.exists(chemin):
+            return []
+        with open(chemin, 'r', encoding='utf-8') as f:
+            contenu = f.read().strip()
+        return json.loads(contenu) if contenu else []
+
+    @staticmethod
+    def _lire_journal(chemin):
+        """Lit un journal JSON Lines (une dernière ligne tronquée par un crash est ignorée)"""
+        pointages = []
+        if not os.path.exists(chemin):
+            return pointages
+        with open(chemin, 'r', encoding='utf-8') as f:
+            for ligne in f:
+                ligne = ligne.strip()
+                if not ligne:
+                    continue
+                try:
+                    pointages.append(json.loads(ligne))
+                except ValueError:
+                    print(f"⚠️  Ligne de journal illisible ignorée: {ligne[:60]}")
+        return pointages
+
+    def ajouter(self, pointage):
+        """Ajoute un pointage en fin de journal : coût constant, quelle que soit la taille de l'historique"""
+        ligne = json.dumps(pointage, ensure_ascii=False) + "\n"
+        with self._verrou:
+            self._flux.write(ligne)
+            self._flux.flush()
+            if self._non_synchronises == 0:
+                self._premier_non_synchronise = time.time()
+                # Le thread d'entretien arme l'échéance du fsync
+                self._reveil.set()
+            self._non_synchronises += 1
+            self.lignes_journal += 1
+            self.recents.append(pointage)
+            if self._non_synchronises >= self.lot_fsync:
+                self.synchroniser()
+            # Journal mis de côté en O(1) ici, fusionné dans le tableau JSON par le thread d'entretien
+            if self.lignes_journal >= self.seuil_compaction and self._mettre_de_cote():
+                self._reveil.set()
+
+    def synchroniser(self):
+        """Force l'écriture physique des pointages en attente (fsync)"""
+        with self._verrou:
+            if self._flux is None or self._non_synchronises == 0:
+                return
+            self._flux.flush()
+            os.fsync(self._flux.fileno())
+            self._non_synchronises = 0
+
+    def _entretien(self):
+        """Thread de fond : fsync au plus delai_fsync après le premier pointage en attente, fusions"""
+        while not self._arret.is_set():
+            with self._verrou:
+                echeance = self._premier_non_synchronise + self.delai_fsync if self._non_synchronises else None
+            self._reveil.wait(None if echeance is None else max(0.0, echeance - time.time()))
+            self._reveil.clear()
+            if self._arret.is_set():
+                break
+            try:
+                with self._verrou:
+                    if self._non_synchronises and \
+                            time.time() - self._premier_non_synchronise >= self.delai_fsync:
+                        self.synchroniser()
+                if os.path.exists(self.fichier_compaction):
+                    self._fusionner()
+            except Exception as e:
+                print(f"❌ Erreur entretien journal: {e}")
+                self._arret.wait(self.delai_fsync)
+
+    def derniers(self, n=10):
+        """Derniers pointages connus (mémoire, sans lecture disque)"""
+        with self._verrou:
+            return list(self.recents)[-n:] if n > 0 else []
+
+    def dernier_timestamp(self, agent):
+        """Timestamp du dernier pointage connu d'un agent dans la queue en mémoire"""
+        with self._verrou:
+            for pointage in reversed(self.recents):
+                if pointage.get('agent') == agent:
+                    return pointage.get('timestamp')
+        return None
+
+    def derniers_par_agent(self, depuis):
+        """Dernier timestamp de chaque agent ayant pointé depuis `depuis`"""
+        with self._verrou:
+            recents = list(self.recents)
+        # La queue mémoire suffit si elle remonte avant `depuis`, sinon relecture complète
+        if len(recents) == self.recents.maxlen and recents[0].get('timestamp', 0) >= depuis:
+            recents = self.lire_tous()
+        resultat = {}
+        for pointage in recents:
+            timestamp = pointage.get('timestamp')
+            if timestamp is not None and timestamp >= depuis:
+                resultat[pointage['agent']] = max(timestamp, resultat.get(pointage['agent'], timestamp))
+        return resultat
+
+    def lire_tous(self):
+        """Historique complet : tableau JSON compacté + journal en cours"""
+        # Ni fusion ni mise de côté pendant la lecture : chaque pointage est lu exactement une fois
+        with self._verrou_compaction:
+            with self._verrou:
+                if self._flux is not None:
+                    self._flux.flush()
+            return (self._lire_tableau(self.fichier_json)
+                    + self._lire_journal(self.fichier_compaction)
+                    + self._lire_journal(self.fichier_journal))
+
+    def statistiques(self, date, n_derniers=5):
+        """Totaux, comptage par agent et derniers pointages d'une journée (parcours complet)"""
+        pointages = self.lire_tous()
+        pointages_jour = [p for p in pointages if p.get('date') == date]
+        par_agent = {}
+        for p in pointages_jour:
+            par_agent[p['agent']] = par_agent.get(p['agent'], 0) + 1
+        return {
+            'total': len(pointages),
+            'jour': len(pointages_jour),
+            'par_agent': par_agent,
+            'derniers': pointages_jour[-n_derniers:] if n_derniers > 0 else []
+        }
+
+    def _mettre_de_cote(self):
+        """Renomme le journal courant pour la fusion (O(1)) ; faux si une fusion est déjà en attente
+
+        Jamais pendant une fusion ou une lecture complète (lire_tous) : celle-ci verrait le pointage
+        ni dans le journal mis de côté, ni dans le journal courant. Sans attendre : on réessaiera
+        au prochain pointage.
+        """
+        with self._verrou:
+            if self.lignes_journal == 0 or not self._verrou_compaction.acquire(blocking=False):
+                return False
+            try:
+                if os.path.exists(self.fichier_compaction):
+                    return False
+                self.synchroniser()
+                # Les nouveaux pointages repartent dans un journal vide
+                self._flux.close()
+                os.replace(self.fichier_journal, self.fichier_compaction)
+                self._flux = open(self.fichier_journal, 'a', encoding='utf-8')
+                self.lignes_journal = 0
+                return True
+            finally:
+                self._verrou_compaction.release()
+
+    def _fusionner(self):
+        """Fusion du journal mis de côté, hors du verrou des ajouts"""
+        with self._verrou_compaction:
+            self._reprendre_compaction()
+
+    def compacter(self):
+        """Fusionne tout le journal dans le fichier tableau JSON (remplacement atomique), bloquant"""
+        while True:
+            self._fusionner()
+            with self._verrou:
+                if self.lignes_journal == 0 or self._mettre_de_cote():
+                    break
+        self._fusionner()
+
+    def _reprendre_compaction(self):
+        """Termine une compaction (éventuellement interrompue par un crash)"""
+        if not os.path.exists(self.fichier_compaction):
+            return
+        pointages = self._lire_tableau(self.fichier_json)
+        a_fusionner = self._lire_journal(self.fichier_compaction)
+        # Crash après le remplacement du tableau : ces pointages y sont déjà
+        deja = {(p.get('agent'), p.get('timestamp')) for p in pointages[-len(a_fusionner):]} if a_fusionner else set()
+        pointages.extend(p for p in a_fusionner if (p.get('agent'), p.get('timestamp')) not in deja)
+
+        temporaire = self.fichier_json + ".tmp"
+        with open(temporaire, 'w', encoding='utf-8') as f:
+            json.dump(pointages, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporaire, self.fichier_json)
+        os.remove(self.fichier_compaction)
+
+    def fermer(self, compacter=True):
+        """Synchronise (et compacte) le journal à l'arrêt"""
+        self._arret.set()
+        self._reveil.set()
+        if self._thread is not threading.current_thread():
+            self._thread.join()
+        if self._flux is None:
+            return
+        try:
+            if compacter:
+                self.compacter()
+            else:
+                self.synchroniser()
+        finally:
+            with self._verrou:
+                if self._flux is not None:
+                    self._flux.close()
+                    self._flux = None
@@ -9,6 +9,9 @@ import os
 import time
 from datetime import datetime
 
+from detecteur_haar import DetecteurHaar, filtrer_taille
+from appariement_modeles import AppariementModeles
+
 print("🎯 MANGUI FI - TEST ALPHONSE")
 print("=" * 40)
 
@@ -16,6 +19,9 @@ class TestAlphonse:
     def __init__(self):
         self.visage_alphonse = None
         self.pointages = []
+        self.detecteur = DetecteurHaar()          # Cascade lue une seule fois
+        # Même score qu'avant (1 - écart absolu moyen sur 100×100), modèles empilés
+        self.appariement = AppariementModeles(taille=(100, 100), methode='l1', egaliser=False)
         
         print("📁 Chargement de la photo d'Alphonse...")
         self.charger_alphonse()
@@ -42,13 +48,13 @@ class TestAlphonse:
         if image is not None:
             # Détecter le visage d'Alphonse
             gris = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-            detecteur = cv2.CascadeClassifier("haarcascade_frontalface_default.xml")
-            visages = detecteur.detectMultiScale(gris, 1.1, 4)
+            visages = self.detecteur.detecter(gris)
             
             if len(visages) > 0:
                 x, y, w, h = visages[0]
                 self.visage_alphonse = gris[y:y+h, x:x+w]
                 self.visage_alphonse = cv2.resize(self.visage_alphonse, (100, 100))
+                self.appariement.ajouter("ALPHONSE", [self.visage_alphonse], variations=["Original"])
                 print("✅ Visage de référence chargé")
             else:
                 print("❌ Aucun visage détecté dans la photo")
@@ -61,23 +67,19 @@ class TestAlphonse:
             return 0.0
         
         try:
-            # Redimensionner à la même taille
-            visage_capture = cv2.resize(visage_capture, (100, 100))
-            
-            # Méthode simple de comparaison
-            difference = cv2.absdiff(visage_capture, self.visage_alphonse)
-            score = 1 - (np.mean(difference) / 255.0)
-            
-            return score
+            # Un seul modèle : score identique à cv2.absdiff + np.mean, seuil de 60% inchangé
+            return float(self.appariement.scores_personnes(visage_capture)[0])
         except:
             return 0.0
     
-    def est_alphonse(self, image):
-        """Détermine si l'image contient Alphonse"""
-        # Détection du visage
-        gris = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        detecteur = cv2.CascadeClassifier("haarcascade_frontalface_default.xml")
-        visages = detecteur.detectMultiScale(gris, 1.1, 4, minSize=(100, 100))
+    def est_alphonse(self, image, gris=None, visages=None):
+        """Détermine si l'image contient Alphonse (gris et visages : détection déjà faite sur la frame)"""
+        if gris is None:
+            gris = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        if visages is None:
+            visages = self.detecteur.detecter(gris, taille_min=(100, 100))
+        else:
+            visages = filtrer_taille(visages, (100, 100))
         
         if len(visages) == 0:
             return False, 0.0
@@ -127,17 +129,15 @@ class TestAlphonse:
                 
                 image = cv2.flip(image, 1)
                 
-                # Détection visage pour l'interface
-                gris = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-                detecteur = cv2.CascadeClassifier("haarcascade_frontalface_default.xml")
-                visages = detecteur.detectMultiScale(gris, 1.1, 4)
+                # Détection unique : boîtes partagées par l'interface et la reconnaissance
+                gris, visages = self.detecteur.analyser(image)
                 
                 est_alphonse = False
                 score = 0.0
                 
                 # Reconnaissance
                 if len(visages) == 1:
-                    est_alphonse, score = self.est_alphonse(image)
+                    est_alphonse, score = self.est_alphonse(image, gris, visages)
                     
                     # Pointage automatique
                     if est_alphonse and score > 0.6:
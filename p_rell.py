@@ -5,21 +5,64 @@ Version avec gestion d'affichage garantie
 """
 
 import cv2
-import face_recognition
 import numpy as np
 import time
 import json
 import os
+import threading
+import argparse
 from datetime import datetime
 
+from cache_embeddings import CacheEmbeddings
+from capture_threadee import CaptureThreadee, TravailleurReconnaissance
+from suivi_visages import SuiviVisages
+from detecteur_mouvement import DetecteurMouvement
+from controleur_adaptatif import ControleurAdaptatif
+from pool_encodage import PoolEncodage
+from base_pointages import ouvrir_stockage_pointages
+from anti_doublon import IndexAntiDoublon
+from sources_frames import ouvrir_source
+from commandes import LecteurCommandes
+from instrumentation import MesuresLatence
+from hud import HUD
+from chargement_modeles import face_recognition, ChronologieDemarrage, PrechargementModeles
+
 class SystemeReconnaissanceFaciale:
-    def __init__(self):
+    def __init__(self, pointages_file="pointages_manguifi.json",
+                 dossier_references="/home/alphonse/facialVCN/VNC_mangui_fi/marie/", source=None,
+                 chargement_differe=False, backend_pointages="journal"):
         self.camera_index = 0
-        self.pointages_file = "pointages_manguifi.json"
+        self.source = source                      # Source de frames (None = caméra, voir sources_frames)
+        self.pointages_file = pointages_file
+        self.dossier_references = dossier_references
+        self.backend_pointages = backend_pointages  # "journal" (JSON Lines) ou "sqlite" (WAL indexé)
+        self.stockage = ouvrir_stockage_pointages(self.backend_pointages, self.pointages_file)
+        self.anti_doublon = IndexAntiDoublon(fenetre=25).charger(self.stockage)
         self.reference_encoding = None
         self.dernier_pointage = 0
         self.compteur_frames = 0
-        self.frame_skip = 3
+        self.frame_skip = 1                       # Chaque frame est suivie, la détection HOG est cadencée par le suivi
+        self.suivi = SuiviVisages(intervalle_redetection=10, intervalle_sans_visage=3)
+        self.mouvement = DetecteurMouvement(battement=3.0)  # Couloir vide et immobile : HOG en veille
+        self.modele_detection = "hog"             # "hog" (CPU) ou "cnn" (GPU)
+        self.upsample_detection = 0              # Suréchantillonnages HOG (visages petits ou lointains)
+        self.seuil_confiance = 0.6                # Confiance minimum (1 - distance) pour reconnaître
+        self.controleur = ControleurAdaptatif(latence_cible=0.15)  # Résolution, upsample et saut selon la charge
+        self.pool_encodage = None                # PoolEncodage optionnel (--processus N)
+        self.sequence_encodage = 0
+        
+        # Mesures de latence par étape (overlay avec la touche M, export périodique)
+        self.mesures = MesuresLatence(fichier_metriques="metriques_manguifi.jsonl")
+        self.afficher_mesures = False
+        self.hud = HUD()                         # Couches d'interface en cache
+        self.chronologie = ChronologieDemarrage()
+        self.chargement_differe = chargement_differe  # Modèles et références chargés en arrière-plan
+        self.prechargement = None
+        
+        # Mode terminal sans écran : ni fenêtre ni rendu, commandes sur stdin ou socket locale
+        self.sans_affichage = False
+        self.socket_commandes = None
+        self.commandes = None
         
         # Résolutions
         self.taille_traitement = (320, 240)
@@ -29,22 +72,54 @@ class SystemeReconnaissanceFaciale:
         self.derniers_visages = []
         self.derniers_noms = []
         self.derniere_detection = 0
+        self.verrou_pointages = threading.Lock()
+        
+        # Cache disque de l'encodage de référence
+        self.cache_embeddings = CacheEmbeddings(
+            "cache_embeddings_manguifi.json",
+            parametres={"modele": "hog", "upsample": 0, "taille_max": 1000, "jitters": 1}
+        )
         
         # Configuration fenêtre
         self.nom_fenetre = 'MANGUI FI - RECONNAISSANCE FACIALE'
         
-        self.charger_reference_rapide()
+        if not self.chargement_differe:
+            self.charger_reference_rapide()
+
+    def modeles_prets(self):
+        """Vrai quand face_recognition est importé et le préchargement terminé"""
+        return self.prechargement is None or \
+            (self.prechargement.pret.is_set() and self.prechargement.erreur is None)
+
+    def statut_modeles(self):
+        """Statut HUD tant que la reconnaissance n'est pas active, sinon None"""
+        if self.modeles_prets():
+            return None
+        if self.prechargement.erreur is not None:
+            return "ERREUR MODELES - RECONNAISSANCE INACTIVE", (0, 0, 255)
+        return "CHARGEMENT DES MODELES...", (0, 165, 255)
 
     def charger_reference_rapide(self):
         """Charge la référence rapidement avec redimensionnement"""
         try:
-            chemin_ref = "/home/alphonse/facialVCN/VNC_mangui_fi/marie/Alphonse Marie Mbengue.jpg"
+            chemin_ref = os.path.join(self.dossier_references, "Alphonse Marie Mbengue.jpg")
             if not os.path.exists(chemin_ref):
                 print("❌ Photo référence non trouvée")
                 return
 
             print("📸 Chargement RAPIDE de la référence...")
             
+            # Photo inchangée : encodage relu depuis le cache
+            cle_cache = self.cache_embeddings.calculer_cle(chemin_ref)
+            trouve, encodage = self.cache_embeddings.obtenir(cle_cache)
+            if trouve:
+                if encodage is not None:
+                    self.reference_encoding = encodage
+                    print("⚡ Référence chargée depuis le cache")
+                else:
+                    print("❌ Aucun visage détecté (cache)")
+                return
+            
             image_bgr = cv2.imread(chemin_ref)
             if image_bgr is None:
                 print("❌ Impossible de charger l'image")
@@ -79,44 +154,37 @@ class SystemeReconnaissanceFaciale:
                     print("✅ Référence encodée avec succès")
             else:
                 print("❌ Aucun visage détecté")
+            
+            self.cache_embeddings.enregistrer(cle_cache, self.reference_encoding, os.path.basename(chemin_ref))
+            self.cache_embeddings.sauvegarder()
                     
         except Exception as e:
             print(f"❌ Erreur chargement: {e}")
 
     def initialiser_camera(self):
-        """Initialise la caméra et la fenêtre d'affichage"""
+        """Initialise la source de frames (caméra par défaut) et la fenêtre d'affichage"""
         print("📷 Initialisation caméra et affichage...")
         
-        # Créer la fenêtre AVANT d'initialiser la caméra
-        cv2.namedWindow(self.nom_fenetre, cv2.WINDOW_NORMAL)
-        cv2.resizeWindow(self.nom_fenetre, self.taille_affichage[0], self.taille_affichage[1])
-        cv2.moveWindow(self.nom_fenetre, 100, 100)  # Position sur l'écran
+        if not self.sans_affichage:
+            # Créer la fenêtre AVANT d'initialiser la caméra
+            cv2.namedWindow(self.nom_fenetre, cv2.WINDOW_NORMAL)
+            cv2.resizeWindow(self.nom_fenetre, self.taille_affichage[0], self.taille_affichage[1])
+            cv2.moveWindow(self.nom_fenetre, 100, 100)  # Position sur l'écran
         
-        for i in [0, 1, 2]:
-            cap = cv2.VideoCapture(i)
-            if cap.isOpened():
-                print(f"✅ Caméra trouvée sur l'index {i}")
-                cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.taille_affichage[0])
-                cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.taille_affichage[1])
-                cap.set(cv2.CAP_PROP_FPS, 15)
-                
-                # Tester l'affichage immédiatement
-                ret, test_frame = cap.read()
-                if ret:
-                    print("✅ Caméra fonctionnelle - Test d'affichage...")
-                    # Afficher un frame de test
-                    cv2.imshow(self.nom_fenetre, test_frame)
-                    cv2.waitKey(100)  # Court délai pour l'affichage
-                else:
-                    print("❌ Caméra ne renvoie pas d'image")
-                    cap.release()
-                    continue
-                    
-                return cap
-            cap.release()
+        cap = ouvrir_source(self.source, self.taille_affichage)
+        if cap is None:
+            print("❌ Aucune source de frames fonctionnelle trouvée")
+            return None
+        print(f"✅ Source: {cap}")
         
-        print("❌ Aucune caméra fonctionnelle trouvée")
-        return None
+        # Tester l'affichage immédiatement
+        if not self.sans_affichage and getattr(cap, 'premiere_frame', None) is not None:
+            print("✅ Caméra fonctionnelle - Test d'affichage...")
+            # Afficher un frame de test
+            cv2.imshow(self.nom_fenetre, cap.premiere_frame)
+            cv2.waitKey(100)  # Court délai pour l'affichage
+        
+        return cap
 
     def detecter_et_reconnaitre(self, frame):
         """Détection et reconnaissance"""
@@ -124,19 +192,77 @@ class SystemeReconnaissanceFaciale:
         noms = []
         
         try:
-            # Détection sur résolution réduite
-            small_frame = cv2.resize(frame, self.taille_traitement)
-            rgb_small_frame = cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB)
+            # Modèles encore en chargement : aperçu caméra seul, la reconnaissance démarre ensuite
+            if not self.modeles_prets():
+                return [], []
             
-            face_locations = face_recognition.face_locations(
-                rgb_small_frame, 
-                number_of_times_to_upsample=0,
-                model="hog"
-            )
+            # Réglages adaptés à la latence mesurée (avant la frame, dans le thread de reconnaissance)
+            self.controleur.ajuster(self)
+            self.reprendre_encodages()
+            
+            with self.mesures.mesurer('pretraitement'):
+                small_frame = cv2.resize(frame, self.taille_traitement)
+                gris_small_frame = cv2.cvtColor(small_frame, cv2.COLOR_BGR2GRAY)
+            
+            if not self.suivi.pistes and self.suivi.besoin_detection():
+                # Personne suivi : la détection attend un mouvement ou le battement de contrôle
+                with self.mesures.mesurer('mouvement'):
+                    eveille = self.mouvement.reveiller(gris_small_frame)
+                if not eveille:
+                    self.mesures.compter('veille')
+                    return [], []
+            
+            if self.suivi.besoin_detection():
+                # Détection complète sur résolution réduite
+                # Étape distincte : un seul échantillon 'pretraitement' par frame
+                with self.mesures.mesurer('conversion_rgb'):
+                    rgb_small_frame = cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB)
+                
+                with self.mesures.mesurer('detection'):
+                    face_locations = face_recognition.face_locations(
+                        rgb_small_frame, 
+                        number_of_times_to_upsample=self.upsample_detection,
+                        model=self.modele_detection
+                    )
+                self.controleur.observer_visages(face_locations)
+                pistes = self.suivi.associer_detections(gris_small_frame, face_locations)
+                
+                # Encodage dlib seulement pour les pistes nouvelles, anciennes ou dont l'apparence a changé
+                a_encoder = self.suivi.pistes_a_encoder(gris_small_frame, pistes)
+                if a_encoder and self.pool_encodage is not None:
+                    # Encodage dans les processus du pool, identités reprises aux frames suivantes
+                    self.sequence_encodage += 1
+                    self.pool_encodage.soumettre(self.sequence_encodage, rgb_small_frame,
+                                                 [face_locations[i] for i in a_encoder],
+                                                 contexte=[pistes[i] for i in a_encoder])
+                    for i in a_encoder:
+                        pistes[i].en_attente = True
+                elif a_encoder:
+                    with self.mesures.mesurer('encodage'):
+                        face_encodings = face_recognition.face_encodings(
+                            rgb_small_frame, [face_locations[i] for i in a_encoder])
+                    
+                    # Reconnaissance
+                    with self.mesures.mesurer('comparaison'):
+                        noms = []
+                        for face_encoding in face_encodings:
+                            nom, couleur = self.comparer_visage(face_encoding)
+                            noms.append((nom, couleur))
+                    self.chronologie.marquer('premiere_reconnaissance', "Première reconnaissance")
+                    
+                    for i, encodage, etiquette in zip(a_encoder, face_encodings, noms):
+                        self.suivi.memoriser_identite(pistes[i], encodage, etiquette)
+            else:
+                # Frame intermédiaire : suivi par flux optique, sans HOG ni encodage
+                with self.mesures.mesurer('suivi'):
+                    pistes = self.suivi.suivre(gris_small_frame)
             
-            if not face_locations:
+            if not pistes:
                 return [], []
             
+            face_locations = [piste.boite_entiere() for piste in pistes]
+            noms = [piste.etiquette for piste in pistes]
+            
             # Conversion coordonnées
             face_locations_fullres = []
             for (top, right, bottom, left) in face_locations:
@@ -150,21 +276,29 @@ class SystemeReconnaissanceFaciale:
                 
                 face_locations_fullres.append((top, right, bottom, left))
             
-            # Encodage
-            face_encodings = face_recognition.face_encodings(rgb_small_frame, face_locations)
-            
-            # Reconnaissance
-            noms = []
-            for face_encoding in face_encodings:
-                nom, couleur = self.comparer_visage(face_encoding)
-                noms.append((nom, couleur))
-            
             return face_locations_fullres, noms
             
         except Exception as e:
             print(f"⚠️  Erreur détection: {e}")
             return [], []
 
+    def reprendre_encodages(self):
+        """Identités des encodages terminés par le pool, appliquées dans l'ordre des frames"""
+        if self.pool_encodage is None:
+            return
+        for _, pistes, encodages, duree in self.pool_encodage.prendre():
+            self.mesures.ajouter('encodage', duree)
+            for piste in pistes:
+                piste.en_attente = False
+            valides = [(piste, encodage) for piste, encodage in zip(pistes, encodages) if encodage is not None]
+            if not valides:
+                continue
+            with self.mesures.mesurer('comparaison'):
+                noms = [self.comparer_visage(encodage) for _, encodage in valides]
+            self.chronologie.marquer('premiere_reconnaissance', "Première reconnaissance")
+            for (piste, encodage), etiquette in zip(valides, noms):
+                self.suivi.memoriser_identite(piste, encodage, etiquette)
+
     def comparer_visage(self, face_encoding):
         """Compare un visage avec la référence"""
         if self.reference_encoding is None:
@@ -177,7 +311,7 @@ class SystemeReconnaissanceFaciale:
             
             print(f"   🔍 Confiance: {confidence:.3f}")
             
-            if confidence > 0.6:
+            if confidence > self.seuil_confiance:
                 nom = "ALPHONSE MARIE MBENGUE"
                 couleur = (0, 255, 0)
                 
@@ -207,22 +341,16 @@ class SystemeReconnaissanceFaciale:
         }
         
         try:
-            pointages = []
-            if os.path.exists(self.pointages_file):
-                with open(self.pointages_file, 'r') as f:
-                    pointages = json.load(f)
-            
-            if pointages:
-                dernier = pointages[-1]
-                if time.time() - dernier['timestamp'] < 25:
+            with self.verrou_pointages:
+                # Anti-doublon en mémoire par agent (25 s), indépendant du trafic
+                if self.anti_doublon.est_doublon(nom, pointage['timestamp']):
                     return
             
-            pointages.append(pointage)
-            
-            with open(self.pointages_file, 'w') as f:
-                json.dump(pointages, f, indent=2)
+                # Ajout en fin de stockage (coût constant)
+                self.stockage.ajouter(pointage)
+                self.anti_doublon.enregistrer(nom, pointage['timestamp'])
             
-            print(f"✅ POINTAGE: {nom} à {pointage['heure']} (confiance: {confidence:.2f})")
+                print(f"✅ POINTAGE: {nom} à {pointage['heure']} (confiance: {confidence:.2f})")
             
         except Exception as e:
             print(f"❌ Erreur sauvegarde: {e}")
@@ -232,103 +360,164 @@ class SystemeReconnaissanceFaciale:
         print("🎯 MANGUI FI - AFFICHAGE CAMÉRA GARANTI")
         print("=" * 50)
         
-        if self.reference_encoding is not None:
+        if self.chargement_differe:
+            print("⏳ Modèles en chargement - Aperçu caméra en attendant")
+        elif self.reference_encoding is not None:
             print("✅ Référence chargée - Reconnaissance activée")
         else:
             print("⚠️  Mode détection seulement")
         
+        if self.chargement_differe and self.prechargement is None:
+            # dlib chargé pendant l'ouverture de la caméra et les premières frames
+            self.prechargement = PrechargementModeles(self.charger_reference_rapide, self.chronologie).demarrer()
+        
         cap = self.initialiser_camera()
         if cap is None:
             print("❌ Impossible de démarrer sans caméra")
             return
         
         print("✅ Système initialisé")
-        print("📍 Contrôles: Q=Quitter, P=Pointage, S=Stats")
+        print("📍 Contrôles: Q=Quitter, P=Pointage, S=Stats, M=Mesures")
         print("👀 Vérifiez l'affichage de la caméra...")
         
         # Attendre un peu pour que la fenêtre s'affiche
         time.sleep(1)
         
+        if self.sans_affichage or self.socket_commandes:
+            self.commandes = LecteurCommandes(stdin=self.sans_affichage,
+                                              chemin_socket=self.socket_commandes).demarrer()
+        
+        # Étage 1 : capture sur son propre thread (seule la frame la plus récente est gardée)
+        capture = CaptureThreadee(cap, mesures=self.mesures).demarrer()
+        # Étage 2 : reconnaissance sur un thread dédié, sur la frame la plus fraîche
+        travailleur = TravailleurReconnaissance(capture, self.detecter_et_reconnaitre,
+                                                pas=lambda: self.frame_skip,
+                                                mesures=self.mesures).demarrer()
+        
         try:
+            sequence = 0
+            # Étage 3 : affichage au rythme de la caméra (sans écran : au rythme de la reconnaissance)
             while True:
-                debut = time.time()
-                
-                # Capture frame
-                ret, frame = cap.read()
-                if not ret:
-                    print("❌ Erreur capture - Caméra déconnectée?")
-                    break
+                if self.sans_affichage:
+                    # Ni frame à afficher, ni rendu, ni waitKey : le CPU reste à la reconnaissance
+                    resultat = travailleur.attendre_resultat(timeout=0.2)
+                    if resultat is None and not capture.actif:
+                        print("❌ Capture arrêtée - Caméra déconnectée ou fin de la source?")
+                        break
+                else:
+                    sequence, frame = capture.lire(sequence, demander=False)
+                    if frame is None:
+                        if not capture.actif:
+                            print("❌ Erreur capture - Caméra déconnectée?")
+                            break
+                        continue
                 
-                # Vérifier que l'image n'est pas vide
-                if frame is None or frame.size == 0:
-                    print("❌ Image vide de la caméra")
-                    continue
+                    # Vérifier que l'image n'est pas vide
+                    if frame.size == 0:
+                        print("❌ Image vide de la caméra")
+                        continue
                 
-                # Traitement tous les N frames
-                if self.compteur_frames % self.frame_skip == 0:
-                    try:
-                        face_locations, noms = self.detecter_et_reconnaitre(frame)
-                        
-                        if face_locations:
-                            self.derniers_visages = face_locations
-                            self.derniers_noms = noms
-                            self.derniere_detection = time.time()
-                        else:
-                            if time.time() - self.derniere_detection > 2.0:
-                                self.derniers_visages = []
-                                self.derniers_noms = []
-                                
-                    except Exception as e:
-                        print(f"⚠️  Erreur traitement: {e}")
+                    # Dernier résultat publié par le thread de reconnaissance
+                    resultat = travailleur.prendre_resultat()
                 
-                # TOUJOURS afficher le frame même sans détection
-                self.afficher_resultats(frame)
+                if resultat is not None:
+                    _, (face_locations, noms) = resultat
+                    self.appliquer_resultats(face_locations, noms)
                 
-                # AFFICHAGE CRITIQUE - Utiliser waitKey correctement
-                key = cv2.waitKey(1) & 0xFF
-                if key == ord('q'):
+                # Contrôles : clavier de la fenêtre, stdin ou socket locale
+                commande = self.commandes.prendre() if self.commandes else None
+                if not self.sans_affichage:
+                    # TOUJOURS afficher le frame même sans détection
+                    # (sur une copie : la frame est partagée avec la reconnaissance)
+                    self.afficher_resultats(frame.copy())
+                    
+                    # AFFICHAGE CRITIQUE - Utiliser waitKey correctement
+                    with self.mesures.mesurer('waitkey'):
+                        key = cv2.waitKey(1) & 0xFF
+                    if key != 255:
+                        commande = chr(key)
+                if commande and not self.executer_commande(commande):
                     break
-                elif key == ord('p'):
-                    self.pointage_manuel()
-                elif key == ord('s'):
-                    self.afficher_statistiques()
                 
+                if self.sans_affichage and resultat is None:
+                    continue
                 self.compteur_frames += 1
+                if self.compteur_frames == 1:
+                    self.chronologie.marquer('premiere_frame', "Première frame")
+                self.mesures.compter('affichage')
+                self.mesures.exporter_si_necessaire()
                 
                 # Feedback visuel toutes les 100 frames
                 if self.compteur_frames % 100 == 0:
-                    print(f"📊 Frame {self.compteur_frames} - Système actif")
-                
-                # Limiter FPS
-                temps_frame = time.time() - debut
-                if temps_frame < 0.1:
-                    time.sleep(0.1 - temps_frame)
+                    print(f"📊 Frame {self.compteur_frames} - Système actif "
+                          f"({self.mesures.fps('affichage'):.1f} FPS affichage, "
+                          f"{self.mesures.fps('reconnaissance'):.1f} FPS reconnaissance)")
                     
         except KeyboardInterrupt:
             print("\n�� Arrêt demandé")
         except Exception as e:
             print(f"❌ Erreur système: {e}")
         finally:
+            travailleur.arreter()
+            capture.arreter()
             cap.release()
-            cv2.destroyAllWindows()
-            cv2.waitKey(1)  # S'assurer que les fenêtres sont fermées
+            if self.pool_encodage is not None:
+                self.pool_encodage.fermer()
+            self.stockage.fermer()
+            self.mesures.exporter_si_necessaire(force=True)
+            self.chronologie.afficher()
+            if self.commandes:
+                self.commandes.arreter()
+            if not self.sans_affichage:
+                cv2.destroyAllWindows()
+                cv2.waitKey(1)  # S'assurer que les fenêtres sont fermées
             print("👋 Système arrêté")
 
+    def executer_commande(self, commande):
+        """Commande clavier ou distante (q, p, s, m) ; retourne False pour quitter"""
+        if commande == 'q':
+            return False
+        elif commande == 'p':
+            self.pointage_manuel()
+        elif commande == 's':
+            self.afficher_statistiques()
+        elif commande == 'm':
+            self.afficher_mesures = not self.afficher_mesures
+            self.mesures.afficher()
+        return True
+
+    def appliquer_resultats(self, face_locations, noms):
+        """Met à jour les détections affichées avec le dernier résultat de reconnaissance"""
+        if face_locations:
+            self.derniers_visages = face_locations
+            self.derniers_noms = noms
+            self.derniere_detection = time.time()
+        else:
+            if time.time() - self.derniere_detection > 2.0:
+                self.derniers_visages = []
+                self.derniers_noms = []
+
     def afficher_resultats(self, frame):
         """Affiche les résultats avec gestion d'erreur d'affichage"""
         try:
-            # Dessiner les rectangles de détection
-            for (top, right, bottom, left), (nom, couleur) in zip(self.derniers_visages, self.derniers_noms):
-                cv2.rectangle(frame, (left, top), (right, bottom), couleur, 2)
-                cv2.rectangle(frame, (left, bottom - 35), (right, bottom), couleur, cv2.FILLED)
-                cv2.putText(frame, nom, (left + 6, bottom - 6), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
-            
-            # Interface utilisateur
-            self.afficher_interface(frame)
+            with self.mesures.mesurer('dessin'):
+                # Dessiner les rectangles de détection
+                for (top, right, bottom, left), (nom, couleur) in zip(self.derniers_visages, self.derniers_noms):
+                    cv2.rectangle(frame, (left, top), (right, bottom), couleur, 2)
+                    cv2.rectangle(frame, (left, bottom - 35), (right, bottom), couleur, cv2.FILLED)
+                    cv2.putText(frame, nom, (left + 6, bottom - 6), 
+                               cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+                
+                # Interface utilisateur
+                self.afficher_interface(frame)
+                
+                # Latences par étape (touche M)
+                if self.afficher_mesures:
+                    self.mesures.dessiner(frame)
             
             # AFFICHAGE PRINCIPAL
-            cv2.imshow(self.nom_fenetre, frame)
+            with self.mesures.mesurer('imshow'):
+                cv2.imshow(self.nom_fenetre, frame)
             
         except Exception as e:
             print(f"❌ Erreur affichage: {e}")
@@ -340,15 +529,11 @@ class SystemeReconnaissanceFaciale:
         noms = [nom for nom, _ in self.derniers_noms]
         
         # En-tête semi-transparente
-        overlay = frame.copy()
-        cv2.rectangle(overlay, (0, 0), (w, 70), (0, 0, 0), -1)
-        alpha = 0.7
-        cv2.addWeighted(overlay, alpha, frame, 1 - alpha, 0, frame)
+        self.hud.assombrir(frame, 0, 70, 0.7)
         
         # Statut référence
         statut_ref = "REF: ✅" if self.reference_encoding is not None else "REF: ❌"
-        cv2.putText(frame, statut_ref, (10, 20),
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+        self.hud.texte(frame, statut_ref, (10, 20), 0.5, (255, 255, 255), 1)
         
         # Statut principal
         if nb_visages > 0:
@@ -362,20 +547,18 @@ class SystemeReconnaissanceFaciale:
             statut = "EN ATTENTE..."
             couleur_statut = (255, 255, 255)
         
-        cv2.putText(frame, "MANGUI FI - RECONNAISSANCE", (10, 40),
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
-        cv2.putText(frame, statut, (10, 65),
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.5, couleur_statut, 1)
+        if not self.modeles_prets():
+            statut, couleur_statut = self.statut_modeles()
+        
+        self.hud.texte(frame, "MANGUI FI - RECONNAISSANCE", (10, 40), 0.6, (255, 255, 255), 1)
+        self.hud.texte(frame, statut, (10, 65), 0.5, couleur_statut, 1)
         
         # Informations
         info_text = f"Frame: {self.compteur_frames} | Visages: {nb_visages}"
-        cv2.putText(frame, info_text, (w - 250, 20),
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 255, 255), 1)
+        self.hud.texte(frame, info_text, (w - 250, 20), 0.4, (255, 255, 255), 1)
         
         # Pied de page
-        cv2.rectangle(frame, (0, h-25), (w, h), (0, 0, 0), -1)
-        cv2.putText(frame, "Q=Quitter  P=Pointage  S=Stats", (10, h-8),
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 255, 255), 1)
+        self.hud.bandeau(frame, h-25, h, [("Q=Quitter  P=Pointage  S=Stats  M=Mesures", (10, h-8), 0.4, (255, 255, 255))])
 
     def pointage_manuel(self):
         """Pointage manuel"""
@@ -392,20 +575,16 @@ class SystemeReconnaissanceFaciale:
     def afficher_statistiques(self):
         """Affiche les statistiques"""
         try:
-            if os.path.exists(self.pointages_file):
-                with open(self.pointages_file, 'r') as f:
-                    pointages = json.load(f)
-                
-                aujourd_hui = datetime.now().strftime("%Y-%m-%d")
-                pointages_auj = [p for p in pointages if p['date'] == aujourd_hui]
-                
+            aujourd_hui = datetime.now().strftime("%Y-%m-%d")
+            stats = self.stockage.statistiques(aujourd_hui, n_derniers=3)
+            if stats['total']:
                 print(f"\n📊 STATISTIQUES:")
-                print(f"   Aujourd'hui: {len(pointages_auj)}")
-                print(f"   Total: {len(pointages)}")
+                print(f"   Aujourd'hui: {stats['jour']}")
+                print(f"   Total: {stats['total']}")
                 
-                if pointages_auj:
+                if stats['jour']:
                     print(f"   Derniers:")
-                    for p in pointages_auj[-3:]:
+                    for p in stats['derniers']:
                         print(f"     - {p['heure']} ({p['agent']})")
             else:
                 print("📊 Aucun pointage")
@@ -414,6 +593,30 @@ class SystemeReconnaissanceFaciale:
 
 # Lancement du système
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="MANGUI FI - Affichage Garanti")
+    parser.add_argument('--sans-affichage', action='store_true',
+                        help="terminal sans écran : ni fenêtre ni rendu, commandes lues sur stdin")
+    parser.add_argument('--socket', default=None,
+                        help="socket Unix locale pour les commandes (ex. /tmp/manguifi.sock)")
+    parser.add_argument('--source', default=None,
+                        help="camera, camera:1, video.mp4, rtsp://..., dossier/ ou synthetique:dossier/")
+    parser.add_argument('--latence-cible', type=float, default=150,
+                        help="p95 visé en ms pour la détection, réglage automatique (0 = réglages fixes)")
+    parser.add_argument('--processus', type=int, default=0,
+                        help="encodages répartis sur N processus (0 = dans le thread de reconnaissance)")
+    parser.add_argument('--stockage', choices=('journal', 'sqlite'), default='journal',
+                        help="pointages en journal JSON Lines ou en base SQLite indexée (WAL)")
+    args = parser.parse_args()
+    
     print("🚀 Démarrage MANGUI FI - Affichage Garanti...")
-    systeme = SystemeReconnaissanceFaciale()
+    systeme = SystemeReconnaissanceFaciale(source=args.source, chargement_differe=True,
+                                          backend_pointages=args.stockage)
+    systeme.sans_affichage = args.sans_affichage
+    systeme.socket_commandes = args.socket
+    systeme.controleur.latence_cible = args.latence_cible / 1000.0
+    systeme.controleur.actif = args.latence_cible > 0
+    if args.processus > 0:
+        # Processus lancés par forkserver (le journal des pointages a déjà son thread) ; chacun importe
+        # et chauffe ses modèles pendant que le préchargement du processus principal tourne
+        systeme.pool_encodage = PoolEncodage(args.processus, taille_max=systeme.taille_affichage)
     systeme.executer()
@@ -4,21 +4,44 @@ MANGUI FI - AUGMENTATION DES DONNÉES
 Crée 10 variations du visage d'Alphonse pour améliorer l'entraînement
 """
 
+import argparse
 import cv2
 import numpy as np
 import os
 import pickle
+import time
 from datetime import datetime
 
+from format_galerie import ecrire_galerie
+from augmentation_lot import MoteurAugmentation, SPEC_DEFAUT
+from detecteur_haar import DetecteurHaar
+from enrolement import nom_depuis_fichier
+from sources_frames import lister_images
+
 print("🎯 MANGUI FI - AUGMENTATION DES DONNÉES")
 print("=" * 50)
 
 class AugmentationDonnees:
-    def __init__(self):
+    def __init__(self, graine=0, dossier_debug=None):
         self.chemin_alphonse = "/home/alphonse/facialVCN/VNC_mangui_fi/marie/Alphonse Marie Mbengue.jpg"
-        self.modele_embedding = "modele_alphonse_augmente.pkl"
-        self.detecteur = cv2.CascadeClassifier('haarcascade_frontalface_default.xml')
-        
+        self.modele_embedding = "modele_alphonse_augmente.gal"   # Format binaire versionné (format_galerie), sans pickle
+        # Ancien format pickle, pour les scripts hors dépôt (reconnaissance_augmentee.py) pas encore migrés
+        self.modele_embedding_pkl = "modele_alphonse_augmente.pkl"
+        self.modeles_equipe = "modeles_augmentes.gal"             # Toutes les variations de toute l'équipe
+        self.detecteur = DetecteurHaar(voisins=5)
+        # Variations déclarées dans SPEC_DEFAUT, générées à la demande (graine fixe : modèles reproductibles)
+        self.moteur = MoteurAugmentation(SPEC_DEFAUT, taille=(64, 64), graine=graine)
+        self.dossier_debug = dossier_debug                       # Copie JPEG des variations (débogage seulement)
+        
+    def detecter_visage(self, image):
+        """Plus grand visage (≥ 100px) d'une image BGR, en niveaux de gris, ou None"""
+        gris = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        visages = self.detecteur.detecter(gris, taille_min=(100, 100))
+        if not visages:
+            return None
+        x, y, w, h = max(visages, key=lambda v: v[2] * v[3])
+        return gris[y:y+h, x:x+w]
+    
     def charger_visage_original(self):
         """Charge et détecte le visage original"""
         print("📁 Chargement de l'image originale...")
@@ -27,166 +50,113 @@ class AugmentationDonnees:
             print(f"❌ Impossible de charger: {self.chemin_alphonse}")
             return None
         
-        gris = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        visages = self.detecteur.detectMultiScale(gris, 1.1, 5, minSize=(100, 100))
-        
-        if len(visages) == 0:
+        visage_original = self.detecter_visage(image)
+        if visage_original is None:
             print("❌ Aucun visage détecté")
             return None
         
-        x, y, w, h = visages[0]
-        visage_original = gris[y:y+h, x:x+w]
-        print(f"✅ Visage original détecté: {w}x{h} pixels")
-        
+        print(f"✅ Visage original détecté: {visage_original.shape[1]}x{visage_original.shape[0]} pixels")
         return visage_original
     
     def creer_variations(self, visage_original):
-        """Crée 10 variations différentes du visage"""
-        print("🎨 Création des variations...")
-        variations = []
-        
-        # 1. Original (normalisé)
-        visage_base = self.preprocess_standard(visage_original)
-        variations.append(("Original", visage_base))
-        
-        # 2. Luminosité augmentée (+20%)
-        visage_clair = self.ajuster_luminosite(visage_base, 1.2)
-        variations.append(("Luminosité +20%", visage_clair))
-        
-        # 3. Luminosité réduite (-20%)
-        visage_sombre = self.ajuster_luminosite(visage_base, 0.8)
-        variations.append(("Luminosité -20%", visage_sombre))
-        
-        # 4. Contraste augmenté
-        visage_contraste = self.ajuster_contraste(visage_base, 1.3)
-        variations.append(("Contraste +30%", visage_contraste))
-        
-        # 5. Légère rotation gauche (-5 degrés)
-        visage_rotation_gauche = self.rotation_visage(visage_base, -5)
-        variations.append(("Rotation -5°", visage_rotation_gauche))
-        
-        # 6. Légère rotation droite (+5 degrés)
-        visage_rotation_droite = self.rotation_visage(visage_base, 5)
-        variations.append(("Rotation +5°", visage_rotation_droite))
-        
-        # 7. Flou gaussien léger
-        visage_flou = cv2.GaussianBlur(visage_base, (3, 3), 0)
-        variations.append(("Flou léger", visage_flou))
-        
-        # 8. Zoom léger (105%)
-        visage_zoom = self.zoom_visage(visage_base, 1.05)
-        variations.append(("Zoom 105%", visage_zoom))
-        
-        # 9. Dézoom léger (95%)
-        visage_dezoom = self.zoom_visage(visage_base, 0.95)
-        variations.append(("Zoom 95%", visage_dezoom))
-        
-        # 10. Bruit gaussien léger
-        visage_bruite = self.ajouter_bruit(visage_base)
-        variations.append(("Bruit léger", visage_bruite))
-        
-        # 11. Égalisation d'histogramme renforcée
-        visage_egalise = cv2.equalizeHist(visage_base)
-        variations.append(("Égalisation renforcée", visage_egalise))
+        """Variations du visage (une par entrée de la spécification), produites à la demande"""
+        print(f"🎨 Génération de {len(self.moteur.spec)} variations...")
+        return ((libelle, vignette) for _, libelle, vignette in self.moteur.generer([visage_original]))
+    
+    def augmenter_dossiers(self, dossiers):
+        """Augmente toute l'équipe : un visage par photo, variations générées par lots directement vers la galerie"""
+        print(f"🚀 AUGMENTATION DE L'ÉQUIPE ({', '.join(dossiers)})...")
+        debut = time.time()
+        noms, fichiers = [], []
+        chemins = [chemin for dossier in dossiers for chemin in lister_images(dossier)]
+        
+        def visages_detectes():
+            # Photos lues et détectées au fil de la génération : seul le lot en cours est en mémoire
+            for chemin in chemins:
+                image = cv2.imread(chemin)
+                if image is None:
+                    print(f"⚠️  Image illisible: {chemin}")
+                    continue
+                # Photos d'appareil : réduites avant la détection Haar
+                echelle = min(1.0, 1000 / max(image.shape[:2]))
+                if echelle < 1.0:
+                    image = cv2.resize(image, None, fx=echelle, fy=echelle)
+                visage = self.detecter_visage(image)
+                if visage is None:
+                    print(f"❌ Aucun visage: {os.path.basename(chemin)}")
+                    continue
+                noms.append(nom_depuis_fichier(chemin))
+                fichiers.append(os.path.abspath(chemin))
+                yield visage
+        
+        # Une ligne par variation, le nom répété : prête pour un appariement max sur les variations.
+        # Matrice float32 préallouée (photos × variations au plus), remplie au fil de la génération
+        largeur, hauteur = self.moteur.taille
+        matrice = np.empty((len(chemins) * len(self.moteur.spec), largeur * hauteur), dtype=np.float32)
+        noms_lignes = []
+        variations = ((f"{noms[i]}_{libelle}", i, vignette)
+                      for i, libelle, vignette in self.moteur.generer(visages_detectes()))
+        if self.dossier_debug:
+            variations = self.sauvegarder_variations_images(variations)
+        for _, i, vignette in variations:
+            matrice[len(noms_lignes)] = vignette.reshape(-1)
+            noms_lignes.append(noms[i])
+        duree = time.time() - debut
+        if not noms_lignes:
+            print("❌ Aucun visage à augmenter")
+            return False
         
-        # 12. Miroir horizontal
-        visage_miroir = cv2.flip(visage_base, 1)
-        variations.append(("Miroir horizontal", visage_miroir))
+        # Lignes remplies : vue contiguë, sans copie
+        matrice = matrice[:len(noms_lignes)]
+        ecrire_galerie(self.modeles_equipe, matrice, noms_lignes, metadonnees={
+            'taille_visage': list(self.moteur.taille),
+            'variations': self.moteur.libelles,
+            'fichiers': fichiers,
+            'timestamp': datetime.now().isoformat()})
         
-        print(f"✅ {len(variations)} variations créées")
-        return variations
-    
-    def preprocess_standard(self, visage_image):
-        """Prétraitement standard pour toutes les variations"""
-        visage = cv2.resize(visage_image, (64, 64))
-        visage = cv2.equalizeHist(visage)
-        return visage
-    
-    def ajuster_luminosite(self, image, facteur):
-        """Ajuste la luminosité de l'image"""
-        image_float = image.astype(np.float32)
-        image_ajustee = np.clip(image_float * facteur, 0, 255)
-        return image_ajustee.astype(np.uint8)
-    
-    def ajuster_contraste(self, image, facteur):
-        """Ajuste le contraste de l'image"""
-        image_float = image.astype(np.float32)
-        moyenne = np.mean(image_float)
-        image_ajustee = np.clip((image_float - moyenne) * facteur + moyenne, 0, 255)
-        return image_ajustee.astype(np.uint8)
-    
-    def rotation_visage(self, image, angle):
-        """Effectue une rotation du visage"""
-        h, w = image.shape
-        centre = (w // 2, h // 2)
-        matrice_rotation = cv2.getRotationMatrix2D(centre, angle, 1.0)
-        image_rotation = cv2.warpAffine(image, matrice_rotation, (w, h), flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REFLECT)
-        return image_rotation
-    
-    def zoom_visage(self, image, facteur_zoom):
-        """Effectue un zoom sur le visage"""
-        h, w = image.shape
-        nouvelle_taille = int(min(h, w) * facteur_zoom)
-        debut_h = (h - nouvelle_taille) // 2
-        debut_w = (w - nouvelle_taille) // 2
-        
-        if facteur_zoom > 1:  # Zoom
-            image_zoom = image[debut_h:debut_h+nouvelle_taille, debut_w:debut_w+nouvelle_taille]
-            image_zoom = cv2.resize(image_zoom, (w, h))
-        else:  # Dézoom
-            image_redimensionnee = cv2.resize(image, (nouvelle_taille, nouvelle_taille))
-            image_zoom = np.zeros((h, w), dtype=np.uint8)
-            debut_h_final = (h - nouvelle_taille) // 2
-            debut_w_final = (w - nouvelle_taille) // 2
-            image_zoom[debut_h_final:debut_h_final+nouvelle_taille, debut_w_final:debut_w_final+nouvelle_taille] = image_redimensionnee
-        
-        return image_zoom
-    
-    def ajouter_bruit(self, image):
-        """Ajoute un bruit gaussien léger"""
-        bruit = np.random.normal(0, 5, image.shape).astype(np.float32)
-        image_bruite = image.astype(np.float32) + bruit
-        return np.clip(image_bruite, 0, 255).astype(np.uint8)
+        print(f"\n✅ MODÈLES AUGMENTÉS SAUVEGARDÉS: {self.modeles_equipe}")
+        print(f"📊 {len(noms)} photos, {len(set(noms))} personnes, {len(matrice)} vignettes en {duree:.1f}s")
+        return True
     
     def creer_modele_moyen(self, variations):
-        """Crée un modèle basé sur la moyenne de toutes les variations"""
+        """Crée un modèle basé sur la moyenne de toutes les variations (consommées au fil de l'eau)"""
         print("�� Création du modèle moyen...")
         
-        # Extraire tous les embeddings
-        embeddings = []
+        # Somme courante : aucune variation gardée en mémoire
+        somme = np.zeros(self.moteur.taille[0] * self.moteur.taille[1], dtype=np.float64)
+        noms_variations = []
         for nom, visage in variations:
-            embedding = {
-                'pixels': visage.flatten(),
-                'nom_variation': nom
-            }
-            embeddings.append(embedding)
+            somme += visage.reshape(-1)
+            noms_variations.append(nom)
         
         # Calculer l'embedding moyen (plus robuste)
-        pixels_moyens = np.mean([emb['pixels'] for emb in embeddings], axis=0)
+        pixels_moyens = somme / max(len(noms_variations), 1)
         
         # Créer le modèle final
         modele_final = {
             'pixels': pixels_moyens.astype(np.float32),
-            'taille_visage': (64, 64),
-            'nombre_variations': len(variations),
+            'taille_visage': tuple(self.moteur.taille),
+            'nombre_variations': len(noms_variations),
             'timestamp': datetime.now().isoformat(),
             'seuil_recommandé': 0.65,  # Seuil plus bas car modèle plus robuste
             'version_modele': '3.0_augmente',
-            'variations_incluses': [nom for nom, _ in variations]
+            'variations_incluses': noms_variations
         }
         
         return modele_final
     
     def sauvegarder_variations_images(self, variations):
-        """Sauvegarde les variations en images pour vérification"""
-        dossier_variations = "variations_alphonse"
-        os.makedirs(dossier_variations, exist_ok=True)
+        """Débogage : écrit chaque variation en JPEG au passage, sans interrompre le flux"""
+        os.makedirs(self.dossier_debug, exist_ok=True)
         
-        for i, (nom, visage) in enumerate(variations):
-            chemin_image = f"{dossier_variations}/variation_{i+1:02d}_{nom}.jpg"
-            cv2.imwrite(chemin_image, visage)
+        nombre = 0
+        for variation in variations:
+            nom, visage = variation[0], variation[-1]
+            nombre += 1
+            cv2.imwrite(f"{self.dossier_debug}/variation_{nombre:02d}_{nom}.jpg", visage)
+            yield variation
         
-        print(f"📷 Variations sauvegardées dans: {dossier_variations}/")
+        print(f"📷 {nombre} variations sauvegardées dans: {self.dossier_debug}/")
     
     def executer_augmentation(self):
         """Exécute tout le processus d'augmentation"""
@@ -197,20 +167,24 @@ class AugmentationDonnees:
         if visage_original is None:
             return False
         
-        # 2. Créer les variations
+        # 2. Variations générées à la demande, sans passer par le disque
         variations = self.creer_variations(visage_original)
         
-        # 3. Sauvegarder les variations en images (optionnel)
-        self.sauvegarder_variations_images(variations)
+        # 3. Copie en images pour vérification (débogage seulement)
+        if self.dossier_debug:
+            variations = self.sauvegarder_variations_images(variations)
         
         # 4. Créer le modèle moyen
         modele_final = self.creer_modele_moyen(variations)
         
-        # 5. Sauvegarder le modèle
-        with open(self.modele_embedding, 'wb') as f:
+        # 5. Sauvegarder le modèle : vecteur de pixels en matrice 1×4096, le reste en métadonnées
+        metadonnees = {cle: valeur for cle, valeur in modele_final.items() if cle != 'pixels'}
+        ecrire_galerie(self.modele_embedding, modele_final['pixels'][None, :],
+                       ["ALPHONSE MARIE MBENGUE"], metadonnees=metadonnees)
+        with open(self.modele_embedding_pkl, 'wb') as f:
             pickle.dump(modele_final, f)
         
-        print(f"\n✅ MODÈLE AUGMENTÉ SAUVEGARDÉ: {self.modele_embedding}")
+        print(f"\n✅ MODÈLE AUGMENTÉ SAUVEGARDÉ: {self.modele_embedding} (+ {self.modele_embedding_pkl})")
         print(f"📊 Statistiques:")
         print(f"   - Variations: {modele_final['nombre_variations']}")
         print(f"   - Dimensions: {modele_final['taille_visage']}")
@@ -220,10 +194,25 @@ class AugmentationDonnees:
         return True
 
 if __name__ == "__main__":
-    augmentation = AugmentationDonnees()
+    parser = argparse.ArgumentParser(description="MANGUI FI - Augmentation des données")
+    parser.add_argument('--dossiers', nargs='+', default=None,
+                        help="augmente toutes les photos de ces dossiers (ex. dev_data/ marie/) au lieu d'Alphonse seul")
+    parser.add_argument('--graine', type=int, default=0, help="graine du bruit (mêmes photos -> mêmes variations)")
+    parser.add_argument('--variations-debug', default=None, metavar='DOSSIER',
+                        help="écrit aussi chaque variation en JPEG (ex. variations_alphonse/)")
+    args = parser.parse_args()
+    
+    augmentation = AugmentationDonnees(graine=args.graine, dossier_debug=args.variations_debug)
+    
+    if args.dossiers:
+        reussi = augmentation.augmenter_dossiers(args.dossiers)
+    else:
+        reussi = augmentation.executer_augmentation()
     
-    if augmentation.executer_augmentation():
+    if reussi:
+        galerie = augmentation.modeles_equipe if args.dossiers else augmentation.modele_embedding
         print("\n🎉 AUGMENTATION RÉUSSIE!")
-        print("💡 Maintenant exécutez: python3 reconnaissance_augmentee.py")
+        print(f"💡 Modèles lus par appariement_modeles (AppariementModeles.charger), "
+              f"ex. : python3 appariement_modeles.py --galerie {galerie}")
     else:
         print("\n❌ Échec de l'augmentation")
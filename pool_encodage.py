@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+MANGUI FI - POOL D'ENCODAGE MULTIPROCESSUS
+Encodages dlib (face_encodings) répartis sur tous les cœurs : les images passent par
+une mémoire partagée (RawArray) au lieu d'être copiées par pickle, un visage par tâche,
+et les résultats sont rendus dans l'ordre des numéros de frame
+
+Les processus partent d'un serveur "forkserver" (interpréteur neuf) et non d'un fork du
+terminal : celui-ci a déjà des threads actifs (journal des pointages, préchargement) dont
+les verrous seraient copiés dans un état quelconque.
+"""
+
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+# État des processus de travail (initialisé une fois par processus)
+_memoire = None
+_octets_emplacement = 0
+_face_recognition = None
+
+
+def _initialiser(memoire, octets_emplacement):
+    global _memoire, _octets_emplacement, _face_recognition
+    import face_recognition
+    _memoire = memoire
+    _octets_emplacement = octets_emplacement
+    _face_recognition = face_recognition
+    # Chaque processus charge ses propres modèles dlib : chauffe au démarrage du pool, pas sur la première tâche
+    try:
+        image = np.zeros((240, 320, 3), dtype=np.uint8)
+        face_recognition.face_encodings(image, [(60, 200, 180, 80)])
+    except Exception as e:
+        print(f"⚠️  Chauffe processus d'encodage impossible: {e}")
+
+
+def _encoder_visage(emplacement, forme, location):
+    """Dans un processus de travail : encodage d'un visage de l'image de l'emplacement partagé"""
+    image = np.frombuffer(_memoire, dtype=np.uint8, count=int(np.prod(forme)),
+                          offset=emplacement * _octets_emplacement).reshape(forme)
+    encodages = _face_recognition.face_encodings(image, [location])
+    return encodages[0] if encodages else None
+
+
+class PoolEncodage:
+    """Processus d'encodage alimentés par des emplacements d'images en mémoire partagée"""
+
+    def __init__(self, nb_processus=None, taille_max=(640, 480), nb_emplacements=None):
+        self.nb_processus = nb_processus or max(1, (os.cpu_count() or 2) - 1)
+        self.octets_emplacement = taille_max[0] * taille_max[1] * 3
+        self.nb_emplacements = nb_emplacements or 2 * self.nb_processus
+        contexte = multiprocessing.get_context("forkserver")
+        self.memoire = contexte.RawArray('B', self.nb_emplacements * self.octets_emplacement)
+        self.pool = contexte.Pool(self.nb_processus, initializer=_initialiser,
+                                  initargs=(self.memoire, self.octets_emplacement))
+        self._condition = threading.Condition()
+        self._libres = list(range(self.nb_emplacements))
+        self._taches = {}          # séquence -> tâche en cours ou terminée
+        self._ordre = deque()      # Séquences soumises, dans l'ordre
+        print(f"⚙️  Pool d'encodage: {self.nb_processus} processus, {self.nb_emplacements} emplacements partagés")
+
+    def _emplacement(self, emplacement, forme):
+        return np.frombuffer(self.memoire, dtype=np.uint8, count=int(np.prod(forme)),
+                             offset=emplacement * self.octets_emplacement).reshape(forme)
+
+    def soumettre(self, sequence, image_rgb, face_locations, contexte=None):
+        """Lance l'encodage des visages d'une frame, sans attendre ; bloque si tous les emplacements sont pris"""
+        if image_rgb.nbytes > self.octets_emplacement:
+            raise ValueError(f"image {image_rgb.shape} trop grande pour le pool d'encodage")
+        with self._condition:
+            while not self._libres:
+                self._condition.wait()
+            emplacement = self._libres.pop()
+            tache = {'emplacement': emplacement, 'contexte': contexte, 'debut': time.perf_counter(),
+                     'encodages': [None] * len(face_locations), 'restants': len(face_locations)}
+            self._taches[sequence] = tache
+            self._ordre.append(sequence)
+        # Copie unique dans la mémoire partagée, lue directement par les processus
+        self._emplacement(emplacement, image_rgb.shape)[:] = image_rgb
+        if not face_locations:
+            self._terminer(tache)
+        for i, location in enumerate(face_locations):
+            self.pool.apply_async(
+                _encoder_visage, (emplacement, image_rgb.shape, tuple(int(v) for v in location)),
+                callback=lambda encodage, t=tache, i=i: self._recevoir(t, i, encodage),
+                error_callback=lambda erreur, t=tache, i=i: self._recevoir(t, i, None, erreur))
+
+    def _recevoir(self, tache, indice, encodage, erreur=None):
+        # Thread de résultats du pool
+        if erreur is not None:
+            print(f"⚠️  Erreur encodage (pool): {erreur}")
+        with self._condition:
+            tache['encodages'][indice] = encodage
+            tache['restants'] -= 1
+            if tache['restants'] == 0:
+                self._terminer(tache)
+
+    def _terminer(self, tache):
+        with self._condition:
+            tache['duree'] = time.perf_counter() - tache['debut']
+            self._libres.append(tache['emplacement'])
+            self._condition.notify_all()
+
+    def prendre(self):
+        """Frames terminées, dans l'ordre de soumission : liste de (séquence, contexte, encodages, durée)
+
+        Une frame terminée reste en attente tant qu'une frame plus ancienne est en cours
+        """
+        resultats = []
+        with self._condition:
+            while self._ordre and 'duree' in self._taches[self._ordre[0]]:
+                sequence = self._ordre.popleft()
+                tache = self._taches.pop(sequence)
+                resultats.append((sequence, tache['contexte'], tache['encodages'], tache['duree']))
+        return resultats
+
+    def encoder(self, sequence, image_rgb, face_locations, timeout=10.0):
+        """Version bloquante : encodages des visages d'une frame, calculés en parallèle"""
+        self.soumettre(sequence, image_rgb, face_locations)
+        limite = time.time() + timeout
+        with self._condition:
+            while 'duree' not in self._taches[sequence] and time.time() < limite:
+                self._condition.wait(limite - time.time())
+            tache = self._taches.pop(sequence)
+            self._ordre.remove(sequence)
+        return tache['encodages']
+
+    def fermer(self):
+        """Arrête les processus d'encodage"""
+        self.pool.terminate()
+        self.pool.join()
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+MANGUI FI - SOURCES DE FRAMES
+Caméra, fichier vidéo (ou flux RTSP), dossier d'images et flux synthétique en boucle,
+derrière la même interface que cv2.VideoCapture (read / isOpened / release)
+
+Spécifications acceptées par ouvrir_source() :
+    None, "camera", "camera:1"       webcam (indices 0, 1, 2 essayés par défaut)
+    "video.mp4", "rtsp://..."        fichier vidéo ou flux réseau
+    "dev_data/"                      dossier d'images
+    "synthetique:marie/"             séquences synthétiques en boucle autour des photos d'un dossier
+"""
+
+import os
+import time
+from abc import ABC, abstractmethod
+
+import cv2
+import numpy as np
+
+EXTENSIONS_IMAGES = ('.jpg', '.jpeg', '.png', '.bmp')
+
+
+def cadrer(image, taille):
+    """Redimensionne une image à la taille caméra en gardant les proportions (bandes noires)"""
+    largeur, hauteur = taille
+    h, w = image.shape[:2]
+    if (w, h) == (largeur, hauteur):
+        return image
+    echelle = min(largeur / w, hauteur / h)
+    nouvelle = cv2.resize(image, (max(1, int(w * echelle)), max(1, int(h * echelle))))
+    frame = np.zeros((hauteur, largeur, 3), dtype=np.uint8)
+    y = (hauteur - nouvelle.shape[0]) // 2
+    x = (largeur - nouvelle.shape[1]) // 2
+    frame[y:y + nouvelle.shape[0], x:x + nouvelle.shape[1]] = nouvelle
+    return frame
+
+
+def sequence_synthetique(frame, nb_frames):
+    """Séquence déterministe : léger va-et-vient, zoom et variation de luminosité autour d'une photo"""
+    h, w = frame.shape[:2]
+    for k in range(nb_frames):
+        phase = 2 * np.pi * k / max(1, nb_frames)
+        matrice = cv2.getRotationMatrix2D((w / 2, h / 2), 0, 1.0 + 0.05 * np.sin(phase))
+        matrice[0, 2] += 0.04 * w * np.sin(phase)
+        matrice[1, 2] += 0.02 * h * np.cos(phase)
+        deplacee = cv2.warpAffine(frame, matrice, (w, h))
+        yield cv2.convertScaleAbs(deplacee, alpha=1.0 + 0.15 * np.sin(2 * phase), beta=0)
+
+
+def lister_images(dossier):
+    """Photos d'un dossier, triées par nom"""
+    if not os.path.isdir(dossier):
+        return []
+    return sorted(os.path.join(dossier, f) for f in os.listdir(dossier)
+                  if f.lower().endswith(EXTENSIONS_IMAGES))
+
+
+class SourceFrames(ABC):
+    """Base commune : fps natif, cadence temps réel et politique de perte de frames conseillée
+
+    politique "derniere"  : la capture écrase les frames non lues (caméra, temps réel)
+    politique "bloquante" : la capture attend la reconnaissance, aucune frame perdue (essais reproductibles)
+    """
+
+    description = "source"
+
+    def __init__(self, taille=(640, 480), fps_natif=15.0, temps_reel=True, politique=None):
+        self.taille = taille
+        self.fps_natif = fps_natif
+        self.temps_reel = temps_reel              # Cadence les lectures au fps natif
+        self.politique = politique or ("derniere" if temps_reel else "bloquante")
+        self.frames_lues = 0
+        self._prochaine = None
+        self._ouverte = True
+
+    @abstractmethod
+    def _suivante(self):
+        """Frame suivante (à la taille de la source) ou None en fin de source"""
+
+    def _cadencer(self):
+        if not self.temps_reel or not self.fps_natif:
+            return
+        maintenant = time.perf_counter()
+        if self._prochaine is None:
+            self._prochaine = maintenant
+        attente = self._prochaine - maintenant
+        if attente > 0:
+            time.sleep(attente)
+        # En retard de plus d'une frame : on ne rattrape pas, on repart de maintenant
+        self._prochaine = max(self._prochaine, maintenant - 1.0 / self.fps_natif) + 1.0 / self.fps_natif
+
+    def read(self):
+        """Même contrat que cv2.VideoCapture.read() : (ret, frame)"""
+        if not self._ouverte:
+            return False, None
+        self._cadencer()
+        frame = self._suivante()
+        if frame is None:
+            return False, None
+        self.frames_lues += 1
+        return True, frame
+
+    def isOpened(self):
+        return self._ouverte
+
+    def release(self):
+        self._ouverte = False
+
+    def __str__(self):
+        return f"{self.description} ({self.fps_natif:.1f} fps, politique {self.politique})"
+
+
+class SourceCamera(SourceFrames):
+    """Webcam : premier index fonctionnel parmi ceux proposés"""
+
+    description = "caméra"
+
+    def __init__(self, indices=(0, 1, 2), taille=(640, 480), fps=15, politique=None):
+        super().__init__(taille, fps, temps_reel=False, politique=politique or "derniere")
+        self.cap = None
+        self.premiere_frame = None
+        for i in indices:
+            cap = cv2.VideoCapture(i)
+            if cap.isOpened():
+                print(f"✅ Caméra trouvée sur l'index {i}")
+                cap.set(cv2.CAP_PROP_FRAME_WIDTH, taille[0])
+                cap.set(cv2.CAP_PROP_FRAME_HEIGHT, taille[1])
+                cap.set(cv2.CAP_PROP_FPS, fps)
+
+                ret, frame = cap.read()
+                if ret:
+                    print("✅ Caméra fonctionnelle")
+                    self.cap = cap
+                    self.premiere_frame = frame
+                    self.fps_natif = cap.get(cv2.CAP_PROP_FPS) or float(fps)
+                    self.description = f"caméra {i}"
+                    break
+                print("❌ Caméra ne renvoie pas d'image")
+            cap.release()
+        self._ouverte = self.cap is not None
+
+    def _suivante(self):
+        # La caméra impose elle-même sa cadence
+        ret, frame = self.cap.read()
+        return frame if ret else None
+
+    def release(self):
+        super().release()
+        if self.cap is not None:
+            self.cap.release()
+
+
+class SourceVideo(SourceFrames):
+    """Fichier vidéo ou flux réseau (rtsp://, http://...), éventuellement rejoué en boucle"""
+
+    def __init__(self, chemin, taille=(640, 480), temps_reel=True, boucle=False, politique=None):
+        self.cap = cv2.VideoCapture(chemin)
+        super().__init__(taille, self.cap.get(cv2.CAP_PROP_FPS) or 25.0, temps_reel, politique)
+        self.chemin = chemin
+        self.boucle = boucle
+        self.description = f"vidéo {os.path.basename(chemin)}"
+        self._ouverte = self.cap.isOpened()
+
+    def _suivante(self):
+        ret, frame = self.cap.read()
+        if not ret and self.boucle and self.frames_lues:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.cap.read()
+        return cadrer(frame, self.taille) if ret else None
+
+    def release(self):
+        super().release()
+        self.cap.release()
+
+
+class SourceDossierImages(SourceFrames):
+    """Dossier d'images rejoué comme un flux (chaque photo tenue `repetitions` frames)"""
+
+    def __init__(self, dossier, taille=(640, 480), fps=5.0, repetitions=1, boucle=True,
+                 temps_reel=True, politique=None):
+        super().__init__(taille, fps, temps_reel, politique)
+        self.chemins = lister_images(dossier)
+        self.repetitions = max(1, repetitions)
+        self.boucle = boucle
+        self.description = f"images {dossier}"
+        self.indice = 0
+        self._courante = None
+        self._ouverte = bool(self.chemins)
+
+    def _suivante(self):
+        while self.chemins:
+            position, reste = divmod(self.indice, self.repetitions)
+            if position >= len(self.chemins):
+                if not self.boucle:
+                    return None
+                self.indice = position = reste = 0
+            if reste == 0 or self._courante is None:
+                image = cv2.imread(self.chemins[position])
+                if image is None:
+                    print(f"⚠️  Image illisible ignorée: {self.chemins[position]}")
+                    del self.chemins[position]
+                    self._courante = None
+                    continue
+                self._courante = cadrer(image, self.taille)
+            self.indice += 1
+            return self._courante
+        return None
+
+
+class SourceSynthetique(SourceFrames):
+    """Flux synthétique en boucle : chaque photo d'un dossier animée sur `frames_par_photo` frames"""
+
+    def __init__(self, dossier, taille=(640, 480), fps=15.0, frames_par_photo=30, boucle=True,
+                 temps_reel=True, politique=None):
+        super().__init__(taille, fps, temps_reel, politique)
+        self.chemins = lister_images(dossier)
+        self.frames_par_photo = max(1, frames_par_photo)
+        self.boucle = boucle
+        self.description = f"synthétique {dossier}"
+        self.position = 0
+        self.indice = 0
+        self._sequence = []                      # Seule la séquence de la photo en cours est en mémoire
+        self._ouverte = bool(self.chemins)
+
+    def _suivante(self):
+        while self.indice >= len(self._sequence):
+            if not self.chemins:
+                return None
+            if self.position >= len(self.chemins):
+                if not self.boucle:
+                    return None
+                self.position = 0
+            chemin = self.chemins[self.position]
+            image = cv2.imread(chemin)
+            if image is None:
+                print(f"⚠️  Image illisible ignorée: {chemin}")
+                del self.chemins[self.position]
+                continue
+            # Séquence calculée d'un bloc au changement de photo : les frames suivantes ne coûtent rien
+            self._sequence = list(sequence_synthetique(cadrer(image, self.taille), self.frames_par_photo))
+            self.position += 1
+            self.indice = 0
+        frame = self._sequence[self.indice]
+        self.indice += 1
+        return frame
+
+
+def ouvrir_source(specification=None, taille=(640, 480), temps_reel=True, politique=None):
+    """Ouvre une source d'après sa spécification (voir l'en-tête du module) ; None si indisponible"""
+    if specification is None or specification == "camera" or specification.startswith("camera:"):
+        indices = (0, 1, 2) if specification in (None, "camera") else (int(specification.split(':', 1)[1]),)
+        source = SourceCamera(indices, taille, politique=politique)
+    elif specification.startswith("synthetique:"):
+        source = SourceSynthetique(specification.split(':', 1)[1], taille,
+                                   temps_reel=temps_reel, politique=politique)
+    elif os.path.isdir(specification):
+        source = SourceDossierImages(specification, taille, temps_reel=temps_reel, politique=politique)
+    else:
+        # Flux réseau : déjà cadencé par l'émetteur
+        reseau = "://" in specification
+        source = SourceVideo(specification, taille, temps_reel=temps_reel and not reseau,
+                             politique=politique or ("derniere" if reseau else None))
+    if not source.isOpened():
+        source.release()
+        return None
+    return source
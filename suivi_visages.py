@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+MANGUI FI - SUIVI DES VISAGES ENTRE DEUX DÉTECTIONS
+Détection HOG ponctuelle, puis suivi par flux optique (Lucas-Kanade) sur les frames intermédiaires
+"""
+
+import cv2
+import numpy as np
+
+
+def iou(boite_a, boite_b):
+    """Recouvrement (intersection / union) de deux boîtes (top, right, bottom, left)"""
+    top = max(boite_a[0], boite_b[0])
+    right = min(boite_a[1], boite_b[1])
+    bottom = min(boite_a[2], boite_b[2])
+    left = max(boite_a[3], boite_b[3])
+    inter = max(0.0, right - left) * max(0.0, bottom - top)
+    aire_a = (boite_a[1] - boite_a[3]) * (boite_a[2] - boite_a[0])
+    aire_b = (boite_b[1] - boite_b[3]) * (boite_b[2] - boite_b[0])
+    union = aire_a + aire_b - inter
+    return inter / union if union > 0 else 0.0
+
+
+class Piste:
+    """Un visage suivi : boîte, points caractéristiques et identité associée"""
+
+    def __init__(self, identifiant, boite):
+        self.id = identifiant
+        self.boite = tuple(float(v) for v in boite)   # (top, right, bottom, left), résolution de traitement
+        self.points = None
+        self.nb_points_initial = 0
+        self.confiance = 1.0
+        self.etiquette = ("INCONNU", (0, 0, 255))      # (nom, couleur) affichés
+        # Cache d'identité : encodage dlib réutilisé tant que la piste ne change pas
+        self.encodage = None
+        self.signature = None                          # Vignette normalisée au moment de l'encodage
+        self.signature_courante = None
+        self.detections_depuis_encodage = 0
+        self.confirmation_demandee = False
+        self.en_attente = False                        # Encodage en cours dans le pool d'encodage
+
+    def boite_entiere(self):
+        return tuple(int(round(v)) for v in self.boite)
+
+
+class SuiviVisages:
+    """Suit les visages détectés et décide quand une nouvelle détection complète est nécessaire"""
+
+    def __init__(self, intervalle_redetection=10, intervalle_sans_visage=3, confiance_min=0.5,
+                 iou_association=0.3, max_points=40, erreur_max=1.0,
+                 rafraichissement_encodage=5, seuil_apparence=0.6):
+        self.intervalle_redetection = intervalle_redetection  # Frames entre deux détections quand on suit des visages
+        self.intervalle_sans_visage = intervalle_sans_visage  # Frames entre deux détections quand personne n'est suivi
+        self.confiance_min = confiance_min                    # Fraction de points suivis en dessous de laquelle on re-détecte
+        self.iou_association = iou_association
+        self.max_points = max_points
+        self.erreur_max = erreur_max                          # Erreur aller-retour max (pixels) d'un point fiable
+        self.rafraichissement_encodage = rafraichissement_encodage  # Ré-encodage au plus tard toutes les N détections
+        self.seuil_apparence = seuil_apparence                # Écart de vignette au-delà duquel on ré-encode
+        self.encodages_evites = 0
+        self.encodages_calcules = 0
+        self.pistes = []
+        self.frames_depuis_detection = None
+        self.detection_forcee = True
+        self._gris_precedent = None
+        self._prochain_id = 1
+        self.parametres_lk = dict(winSize=(15, 15), maxLevel=2,
+                                  criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 10, 0.03))
+
+    def besoin_detection(self):
+        """Vrai si la prochaine frame doit passer par la détection complète"""
+        if self.detection_forcee or self.frames_depuis_detection is None:
+            return True
+        intervalle = self.intervalle_redetection if self.pistes else self.intervalle_sans_visage
+        return self.frames_depuis_detection >= intervalle
+
+    def _extraire_points(self, gris, boite):
+        top, right, bottom, left = boite
+        h, w = gris.shape[:2]
+        # Marge de 15 % pour éviter les points du fond
+        marge_y = 0.15 * (bottom - top)
+        marge_x = 0.15 * (right - left)
+        y0, y1 = int(max(0, top + marge_y)), int(min(h, bottom - marge_y))
+        x0, x1 = int(max(0, left + marge_x)), int(min(w, right - marge_x))
+        if y1 <= y0 or x1 <= x0:
+            return None
+        masque = np.zeros(gris.shape[:2], dtype=np.uint8)
+        masque[y0:y1, x0:x1] = 255
+        return cv2.goodFeaturesToTrack(gris, maxCorners=self.max_points, qualityLevel=0.01,
+                                       minDistance=3, mask=masque)
+
+    def associer_detections(self, gris, face_locations):
+        """Nouvelle détection complète : réassocie les boîtes aux pistes existantes (IoU) et relance le suivi"""
+        anciennes = list(self.pistes)
+        pistes = []
+        for boite in face_locations:
+            meilleure, meilleur_iou = None, self.iou_association
+            for piste in anciennes:
+                recouvrement = iou(piste.boite, boite)
+                if recouvrement >= meilleur_iou:
+                    meilleure, meilleur_iou = piste, recouvrement
+            if meilleure is not None:
+                anciennes.remove(meilleure)
+                meilleure.boite = tuple(float(v) for v in boite)
+                piste = meilleure
+            else:
+                piste = Piste(self._prochain_id, boite)
+                self._prochain_id += 1
+            piste.points = self._extraire_points(gris, piste.boite)
+            piste.nb_points_initial = 0 if piste.points is None else len(piste.points)
+            piste.confiance = 1.0
+            pistes.append(piste)
+
+        self.pistes = pistes
+        self._gris_precedent = gris
+        self.frames_depuis_detection = 0
+        self.detection_forcee = False
+        return pistes
+
+    def suivre(self, gris):
+        """Frame intermédiaire : déplace les boîtes selon le flux optique des points suivis"""
+        self.frames_depuis_detection = (self.frames_depuis_detection or 0) + 1
+        pistes_valides = [p for p in self.pistes if p.points is not None and len(p.points) > 0]
+        if len(pistes_valides) < len(self.pistes):
+            # Piste sans point exploitable : elle sera retrouvée par la prochaine détection
+            self.detection_forcee = True
+        if self._gris_precedent is None or not pistes_valides:
+            if self.pistes:
+                self.detection_forcee = True
+            self._gris_precedent = gris
+            return self.pistes
+
+        # Tous les points de toutes les pistes en un seul appel, avec vérification aller-retour
+        points = np.concatenate([p.points for p in pistes_valides]).astype(np.float32)
+        suivants, statut, _ = cv2.calcOpticalFlowPyrLK(self._gris_precedent, gris, points, None, **self.parametres_lk)
+        retour, statut_retour, _ = cv2.calcOpticalFlowPyrLK(gris, self._gris_precedent, suivants, None,
+                                                            **self.parametres_lk)
+        erreur = np.linalg.norm((points - retour).reshape(-1, 2), axis=1)
+        fiables = (statut.ravel() == 1) & (statut_retour.ravel() == 1) & (erreur < self.erreur_max)
+
+        debut = 0
+        pistes_gardees = []
+        for piste in pistes_valides:
+            fin = debut + len(piste.points)
+            ok = fiables[debut:fin]
+            anciens = points[debut:fin][ok].reshape(-1, 2)
+            nouveaux = suivants[debut:fin][ok].reshape(-1, 2)
+            debut = fin
+
+            piste.confiance = len(nouveaux) / max(1, piste.nb_points_initial)
+            if len(nouveaux) < 4 or piste.confiance < self.confiance_min:
+                # Suivi perdu : la piste disparaît et une détection complète est demandée
+                self.detection_forcee = True
+                continue
+
+            # Translation médiane et changement d'échelle médian autour du centre des points
+            deplacement = np.median(nouveaux - anciens, axis=0)
+            centre_ancien = np.median(anciens, axis=0)
+            centre_nouveau = np.median(nouveaux, axis=0)
+            d_ancien = np.linalg.norm(anciens - centre_ancien, axis=1)
+            d_nouveau = np.linalg.norm(nouveaux - centre_nouveau, axis=1)
+            valides = d_ancien > 1e-3
+            echelle = float(np.median(d_nouveau[valides] / d_ancien[valides])) if np.any(valides) else 1.0
+
+            top, right, bottom, left = piste.boite
+            cx = (left + right) / 2.0 + deplacement[0]
+            cy = (top + bottom) / 2.0 + deplacement[1]
+            demi_l = (right - left) / 2.0 * echelle
+            demi_h = (bottom - top) / 2.0 * echelle
+            piste.boite = (cy - demi_h, cx + demi_l, cy + demi_h, cx - demi_l)
+            piste.points = nouveaux.reshape(-1, 1, 2)
+            pistes_gardees.append(piste)
+
+        self.pistes = pistes_gardees
+        self._gris_precedent = gris
+        return self.pistes
+
+    @staticmethod
+    def _signature(gris, boite):
+        """Vignette 24×24 normalisée (moyenne nulle, écart-type unitaire) du visage"""
+        top, right, bottom, left = (int(round(v)) for v in boite)
+        h, w = gris.shape[:2]
+        recadrage = gris[max(0, top):min(h, bottom), max(0, left):min(w, right)]
+        if recadrage.size == 0:
+            return None
+        vignette = cv2.resize(recadrage, (24, 24), interpolation=cv2.INTER_AREA).astype(np.float32)
+        return (vignette - vignette.mean()) / (vignette.std() + 1e-6)
+
+    def pistes_a_encoder(self, gris, pistes):
+        """Indices des pistes à (ré)encoder : nouvelles, trop anciennes, apparence changée ou vote à confirmer"""
+        indices = []
+        for i, piste in enumerate(pistes):
+            if piste.en_attente:
+                continue
+            piste.signature_courante = self._signature(gris, piste.boite)
+            piste.detections_depuis_encodage += 1
+            if (piste.encodage is None
+                    or piste.confirmation_demandee
+                    or piste.detections_depuis_encodage > self.rafraichissement_encodage
+                    or piste.signature is None or piste.signature_courante is None
+                    or float(np.mean(np.abs(piste.signature_courante - piste.signature))) > self.seuil_apparence):
+                indices.append(i)
+            else:
+                self.encodages_evites += 1
+        return indices
+
+    def memoriser_identite(self, piste, encodage, etiquette):
+        """Enregistre le résultat d'encodage/reconnaissance d'une piste"""
+        piste.encodage = encodage
+        piste.etiquette = etiquette
+        piste.signature = piste.signature_courante
+        piste.detections_depuis_encodage = 0
+        piste.confirmation_demandee = False
+        self.encodages_calcules += 1
+
+    def demander_confirmation(self, id_piste):
+        """Force le ré-encodage d'une piste à la prochaine détection (confirmation d'un vote)"""
+        for piste in self.pistes:
+            if piste.id == id_piste:
+                piste.confirmation_demandee = True
+
+    def reinitialiser(self):
+        """Oublie toutes les pistes"""
+        self.pistes = []
+        self._gris_precedent = None
+        self.frames_depuis_detection = None
+        self.detection_forcee = True
@@ -5,22 +5,71 @@ Version avec les noms réels
 """
 
 import cv2
-import face_recognition
 import numpy as np
 import time
 import json
 import os
+import threading
+import argparse
+import zlib
 from datetime import datetime
 
+from cache_embeddings import CacheEmbeddings
+from galerie import GalerieVisages
+from capture_threadee import CaptureThreadee, TravailleurReconnaissance
+from suivi_visages import SuiviVisages
+from detecteur_mouvement import DetecteurMouvement
+from controleur_adaptatif import ControleurAdaptatif
+from pool_encodage import PoolEncodage
+from format_galerie import lire_galerie
+from base_pointages import ouvrir_stockage_pointages
+from anti_doublon import IndexAntiDoublon
+from sources_frames import ouvrir_source
+from commandes import LecteurCommandes
+from instrumentation import MesuresLatence
+from hud import HUD
+from chargement_modeles import face_recognition, ChronologieDemarrage, PrechargementModeles
+
 class SystemeReconnaissanceFaciale:
-    def __init__(self):
+    def __init__(self, pointages_file="pointages_manguifi.json",
+                 dossier_references="/home/alphonse/facialVCN/VNC_mangui_fi/marie/", source=None,
+                 fichier_galerie=None,
+                 chargement_differe=False, backend_pointages="journal"):
         self.camera_index = 0
-        self.pointages_file = "pointages_manguifi.json"
+        self.source = source                      # Source de frames (None = caméra, voir sources_frames)
+        self.pointages_file = pointages_file
+        self.dossier_references = dossier_references
+        self.fichier_galerie = fichier_galerie    # Galerie écrite par enrolement.py (remplace la liste fixe)
+        self.backend_pointages = backend_pointages  # "journal" (JSON Lines) ou "sqlite" (WAL indexé)
+        self.stockage = ouvrir_stockage_pointages(self.backend_pointages, self.pointages_file)
+        self.anti_doublon = IndexAntiDoublon(fenetre=25).charger(self.stockage)
         self.references_encodings = []
         self.noms_references = []
+        self.galerie = GalerieVisages()
         self.derniers_pointages = {}
         self.compteur_frames = 0
-        self.frame_skip = 3
+        self.frame_skip = 1                       # Chaque frame est suivie, la détection HOG est cadencée par le suivi
+        self.suivi = SuiviVisages(intervalle_redetection=10, intervalle_sans_visage=3)
+        self.mouvement = DetecteurMouvement(battement=3.0)  # Couloir vide et immobile : HOG en veille
+        self.modele_detection = "hog"             # "hog" (CPU) ou "cnn" (GPU)
+        self.upsample_detection = 1              # Suréchantillonnages HOG (visages petits ou lointains)
+        self.seuil_confiance = 0.6                # Confiance minimum (1 - distance) pour reconnaître
+        self.controleur = ControleurAdaptatif(latence_cible=0.15)  # Résolution, upsample et saut selon la charge
+        self.pool_encodage = None                # PoolEncodage optionnel (--processus N)
+        self.sequence_encodage = 0
+        
+        # Mesures de latence par étape (overlay avec la touche M, export périodique)
+        self.mesures = MesuresLatence(fichier_metriques="metriques_manguifi.jsonl")
+        self.afficher_mesures = False
+        self.hud = HUD()                         # Couches d'interface en cache
+        self.chronologie = ChronologieDemarrage()
+        self.chargement_differe = chargement_differe  # Modèles et références chargés en arrière-plan
+        self.prechargement = None
+        
+        # Mode terminal sans écran : ni fenêtre ni rendu, commandes sur stdin ou socket locale
+        self.sans_affichage = False
+        self.socket_commandes = None
+        self.commandes = None
         
         # Résolutions
         self.taille_traitement = (320, 240)
@@ -30,18 +79,57 @@ class SystemeReconnaissanceFaciale:
         self.derniers_visages = []
         self.derniers_noms = []
         self.derniere_detection = 0
+        self.verrou_pointages = threading.Lock()
+        
+        # Cache disque des encodages de référence
+        self.cache_embeddings = CacheEmbeddings(
+            "cache_embeddings_manguifi.json",
+            parametres={"modele": "hog", "upsample": 1, "taille_max": 1000, "jitters": 1}
+        )
         
         # Configuration fenêtre
         self.nom_fenetre = 'MANGUI FI - 7 PERSONNES'
         
-        self.charger_references_multiple()
+        if not self.chargement_differe:
+            self.charger_references_multiple()
+
+    def modeles_prets(self):
+        """Vrai quand face_recognition est importé et le préchargement terminé"""
+        return self.prechargement is None or \
+            (self.prechargement.pret.is_set() and self.prechargement.erreur is None)
+
+    def statut_modeles(self):
+        """Statut HUD tant que la reconnaissance n'est pas active, sinon None"""
+        if self.modeles_prets():
+            return None
+        if self.prechargement.erreur is not None:
+            return "ERREUR MODELES - RECONNAISSANCE INACTIVE", (0, 0, 255)
+        return "CHARGEMENT DES MODELES...", (0, 165, 255)
+
+    def charger_galerie_enrolement(self):
+        """Charge une galerie écrite par enrolement.py (une ou plusieurs photos par personne)"""
+        try:
+            # Matrice projetée en mémoire (mmap), partagée en lecture seule avec les autres terminaux
+            fichier = lire_galerie(self.fichier_galerie)
+            # Matrice et identités de chaque ligne passées telles quelles : aucun objet Python par photo
+            self.references_encodings = fichier.matrice
+            self.noms_references = list(fichier.identites)
+            for nom in self.noms_references:
+                self.derniers_pointages[nom] = 0
+            self.galerie.definir(fichier.matrice, fichier.identites, ids=fichier.ids, normes_carre=fichier.normes)
+            # Index IVF : recherche approximative au-delà de 2000 photos, exacte en deçà (construit seulement au-delà)
+            self.galerie.activer_index(nb_sondes=8, seuil_exact=2000)
+            print(f"✅ Galerie chargée: {len(fichier)} photos, {len(fichier.identites)} personnes ({self.fichier_galerie})")
+        except Exception as e:
+            print(f"❌ Erreur chargement galerie: {e}")
 
     def charger_references_multiple(self):
         """Charge les références pour les 7 personnes spécifiques"""
+        if self.fichier_galerie:
+            self.charger_galerie_enrolement()
+            return
+        
         try:
-            # Dossier contenant les photos de référence
-            dossier_references = "/home/alphonse/facialVCN/VNC_mangui_fi/marie/"
-            
             # Liste des personnes avec leurs fichiers exacts
             personnes = [
                 {"nom": "ALLA NIANG", "fichier": "Alla NIANG.jpg"},
@@ -56,7 +144,7 @@ class SystemeReconnaissanceFaciale:
             print("📸 Chargement des références pour 7 personnes...")
             
             for personne in personnes:
-                chemin_ref = os.path.join(dossier_references, personne["fichier"])
+                chemin_ref = os.path.join(self.dossier_references, personne["fichier"])
                 
                 if not os.path.exists(chemin_ref):
                     print(f"⚠️  Photo non trouvée: {personne['fichier']}")
@@ -64,6 +152,19 @@ class SystemeReconnaissanceFaciale:
                 
                 print(f"   Chargement: {personne['nom']}...")
                 
+                # Photo inchangée : encodage relu depuis le cache, sans HOG ni dlib
+                cle_cache = self.cache_embeddings.calculer_cle(chemin_ref)
+                trouve, encodage = self.cache_embeddings.obtenir(cle_cache)
+                if trouve:
+                    if encodage is not None:
+                        self.references_encodings.append(encodage)
+                        self.noms_references.append(personne["nom"])
+                        self.derniers_pointages[personne["nom"]] = 0
+                        print(f"     ⚡ {personne['nom']} - Référence chargée (cache)")
+                    else:
+                        print(f"     ❌ Aucun visage détecté pour: {personne['nom']} (cache)")
+                    continue
+                
                 image_bgr = cv2.imread(chemin_ref)
                 if image_bgr is None:
                     print(f"❌ Impossible de charger: {personne['fichier']}")
@@ -84,9 +185,11 @@ class SystemeReconnaissanceFaciale:
                 # Détection du visage
                 face_locations = face_recognition.face_locations(image_rgb, model="hog")
                 
+                encodage = None
                 if face_locations:
                     encodings = face_recognition.face_encodings(image_rgb, face_locations)
                     if encodings:
+                        encodage = encodings[0]
                         self.references_encodings.append(encodings[0])
                         self.noms_references.append(personne["nom"])
                         self.derniers_pointages[personne["nom"]] = 0
@@ -95,6 +198,13 @@ class SystemeReconnaissanceFaciale:
                         print(f"     ❌ Impossible d'encoder: {personne['nom']}")
                 else:
                     print(f"     ❌ Aucun visage détecté pour: {personne['nom']}")
+                
+                self.cache_embeddings.enregistrer(cle_cache, encodage, personne["fichier"])
+            
+            self.cache_embeddings.sauvegarder()
+            
+            # Galerie contiguë utilisée pour la comparaison
+            self.galerie.definir(self.references_encodings, self.noms_references)
             
             print(f"\n✅ CHARGEMENT TERMINÉ: {len(self.references_encodings)} références chargées sur 7")
             
@@ -108,38 +218,28 @@ class SystemeReconnaissanceFaciale:
             print(f"❌ Erreur chargement références: {e}")
 
     def initialiser_camera(self):
-        """Initialise la caméra et la fenêtre d'affichage"""
+        """Initialise la source de frames (caméra par défaut) et la fenêtre d'affichage"""
         print("📷 Initialisation caméra et affichage...")
         
-        # Créer la fenêtre AVANT d'initialiser la caméra
-        cv2.namedWindow(self.nom_fenetre, cv2.WINDOW_NORMAL)
-        cv2.resizeWindow(self.nom_fenetre, self.taille_affichage[0], self.taille_affichage[1])
-        cv2.moveWindow(self.nom_fenetre, 100, 100)
+        if not self.sans_affichage:
+            # Créer la fenêtre AVANT d'initialiser la caméra
+            cv2.namedWindow(self.nom_fenetre, cv2.WINDOW_NORMAL)
+            cv2.resizeWindow(self.nom_fenetre, self.taille_affichage[0], self.taille_affichage[1])
+            cv2.moveWindow(self.nom_fenetre, 100, 100)
         
-        for i in [0, 1, 2]:
-            cap = cv2.VideoCapture(i)
-            if cap.isOpened():
-                print(f"✅ Caméra trouvée sur l'index {i}")
-                cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.taille_affichage[0])
-                cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.taille_affichage[1])
-                cap.set(cv2.CAP_PROP_FPS, 15)
-                
-                # Tester l'affichage immédiatement
-                ret, test_frame = cap.read()
-                if ret:
-                    print("✅ Caméra fonctionnelle - Test d'affichage...")
-                    cv2.imshow(self.nom_fenetre, test_frame)
-                    cv2.waitKey(100)
-                else:
-                    print("❌ Caméra ne renvoie pas d'image")
-                    cap.release()
-                    continue
-                    
-                return cap
-            cap.release()
+        cap = ouvrir_source(self.source, self.taille_affichage)
+        if cap is None:
+            print("❌ Aucune source de frames fonctionnelle trouvée")
+            return None
+        print(f"✅ Source: {cap}")
+        
+        # Tester l'affichage immédiatement
+        if not self.sans_affichage and getattr(cap, 'premiere_frame', None) is not None:
+            print("✅ Caméra fonctionnelle - Test d'affichage...")
+            cv2.imshow(self.nom_fenetre, cap.premiere_frame)
+            cv2.waitKey(100)
         
-        print("❌ Aucune caméra fonctionnelle trouvée")
-        return None
+        return cap
 
     def detecter_et_reconnaitre(self, frame):
         """Détection et reconnaissance pour plusieurs personnes"""
@@ -147,15 +247,72 @@ class SystemeReconnaissanceFaciale:
         noms = []
         
         try:
-            # Détection sur résolution réduite
-            small_frame = cv2.resize(frame, self.taille_traitement)
-            rgb_small_frame = cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB)
+            # Modèles encore en chargement : aperçu caméra seul, la reconnaissance démarre ensuite
+            if not self.modeles_prets():
+                return [], []
+            
+            # Réglages adaptés à la latence mesurée (avant la frame, dans le thread de reconnaissance)
+            self.controleur.ajuster(self)
+            self.reprendre_encodages()
             
-            face_locations = face_recognition.face_locations(rgb_small_frame, model="hog")
+            with self.mesures.mesurer('pretraitement'):
+                small_frame = cv2.resize(frame, self.taille_traitement)
+                gris_small_frame = cv2.cvtColor(small_frame, cv2.COLOR_BGR2GRAY)
             
-            if not face_locations:
+            if not self.suivi.pistes and self.suivi.besoin_detection():
+                # Personne suivi : la détection attend un mouvement ou le battement de contrôle
+                with self.mesures.mesurer('mouvement'):
+                    eveille = self.mouvement.reveiller(gris_small_frame)
+                if not eveille:
+                    self.mesures.compter('veille')
+                    return [], []
+            
+            if self.suivi.besoin_detection():
+                # Détection complète sur résolution réduite
+                # Étape distincte : un seul échantillon 'pretraitement' par frame
+                with self.mesures.mesurer('conversion_rgb'):
+                    rgb_small_frame = cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB)
+                
+                with self.mesures.mesurer('detection'):
+                    face_locations = face_recognition.face_locations(
+                        rgb_small_frame, number_of_times_to_upsample=self.upsample_detection,
+                        model=self.modele_detection)
+                self.controleur.observer_visages(face_locations)
+                pistes = self.suivi.associer_detections(gris_small_frame, face_locations)
+                
+                # Encodage dlib seulement pour les pistes nouvelles, anciennes ou dont l'apparence a changé
+                a_encoder = self.suivi.pistes_a_encoder(gris_small_frame, pistes)
+                if a_encoder and self.pool_encodage is not None:
+                    # Encodage dans les processus du pool, identités reprises aux frames suivantes
+                    self.sequence_encodage += 1
+                    self.pool_encodage.soumettre(self.sequence_encodage, rgb_small_frame,
+                                                 [face_locations[i] for i in a_encoder],
+                                                 contexte=[pistes[i] for i in a_encoder])
+                    for i in a_encoder:
+                        pistes[i].en_attente = True
+                elif a_encoder:
+                    with self.mesures.mesurer('encodage'):
+                        face_encodings = face_recognition.face_encodings(
+                            rgb_small_frame, [face_locations[i] for i in a_encoder])
+                    
+                    # Reconnaissance en une seule opération matricielle
+                    with self.mesures.mesurer('comparaison'):
+                        noms = self.comparer_visages_multiples(face_encodings)
+                    self.chronologie.marquer('premiere_reconnaissance', "Première reconnaissance")
+                    
+                    for i, encodage, etiquette in zip(a_encoder, face_encodings, noms):
+                        self.suivi.memoriser_identite(pistes[i], encodage, etiquette)
+            else:
+                # Frame intermédiaire : suivi par flux optique, sans HOG ni encodage
+                with self.mesures.mesurer('suivi'):
+                    pistes = self.suivi.suivre(gris_small_frame)
+            
+            if not pistes:
                 return [], []
             
+            face_locations = [piste.boite_entiere() for piste in pistes]
+            noms = [piste.etiquette for piste in pistes]
+            
             # Conversion coordonnées
             face_locations_fullres = []
             for (top, right, bottom, left) in face_locations:
@@ -169,39 +326,57 @@ class SystemeReconnaissanceFaciale:
                 
                 face_locations_fullres.append((top, right, bottom, left))
             
-            # Encodage des visages détectés
-            face_encodings = face_recognition.face_encodings(rgb_small_frame, face_locations)
-            
-            # Reconnaissance pour chaque visage
-            noms = []
-            for face_encoding in face_encodings:
-                nom, couleur = self.comparer_visage_multiple(face_encoding)
-                noms.append((nom, couleur))
-            
             return face_locations_fullres, noms
             
         except Exception as e:
             print(f"⚠️  Erreur détection: {e}")
             return [], []
 
+    def reprendre_encodages(self):
+        """Identités des encodages terminés par le pool, appliquées dans l'ordre des frames"""
+        if self.pool_encodage is None:
+            return
+        for _, pistes, encodages, duree in self.pool_encodage.prendre():
+            self.mesures.ajouter('encodage', duree)
+            for piste in pistes:
+                piste.en_attente = False
+            valides = [(piste, encodage) for piste, encodage in zip(pistes, encodages) if encodage is not None]
+            if not valides:
+                continue
+            with self.mesures.mesurer('comparaison'):
+                noms = self.comparer_visages_multiples([encodage for _, encodage in valides])
+            self.chronologie.marquer('premiere_reconnaissance', "Première reconnaissance")
+            for (piste, encodage), etiquette in zip(valides, noms):
+                self.suivi.memoriser_identite(piste, encodage, etiquette)
+
     def comparer_visage_multiple(self, face_encoding):
         """Compare un visage avec toutes les références"""
-        if not self.references_encodings:
-            return "INCONNU", (0, 0, 255)
+        return self.comparer_visages_multiples([face_encoding])[0]
+
+    def comparer_visages_multiples(self, face_encodings):
+        """Compare tous les visages d'une frame avec la galerie en un seul calcul"""
+        if not len(self.galerie):
+            return [("INCONNU", (0, 0, 255)) for _ in face_encodings]  # Rouge pour inconnu
         
         try:
-            # Calcul des distances avec toutes les références
-            distances = face_recognition.face_distance(self.references_encodings, face_encoding)
-            
-            # Trouver la meilleure correspondance
-            best_match_index = np.argmin(distances)
-            best_distance = distances[best_match_index]
+            # Distances de tous les visages à toutes les références (meilleure + deuxième)
+            correspondances = self.galerie.identifier(face_encodings)
+        except Exception as e:
+            print(f"❌ Erreur comparaison: {e}")
+            return [("ERREUR", (255, 0, 0)) for _ in face_encodings]
+        
+        return [self.interpreter_correspondance(c) for c in correspondances]
+
+    def interpreter_correspondance(self, correspondance):
+        """Décide du nom et de la couleur à partir de la meilleure correspondance"""
+        try:
+            best_distance = correspondance.distance
             confidence = 1.0 - best_distance
             
-            nom_trouve = self.noms_references[best_match_index]
+            nom_trouve = correspondance.nom
             print(f"   🔍 {nom_trouve} (confiance: {confidence:.3f})")
             
-            if confidence > 0.6:
+            if confidence > self.seuil_confiance:
                 couleur = self.get_couleur_personne(nom_trouve)
                 
                 # Pointage automatique
@@ -229,7 +404,12 @@ class SystemeReconnaissanceFaciale:
             "FALLOU DIOP": (128, 0, 128),        # Violet
             "EL HADJI MALICK": (255, 165, 0)     # Orange
         }
-        return couleurs.get(nom, (0, 0, 255))  # Rouge par défaut
+        if nom in couleurs:
+            return couleurs[nom]
+        # Personne enrôlée en masse : couleur stable tirée du nom, hors des rouges des inconnus
+        teinte = 15 + zlib.crc32(nom.encode('utf-8')) % 150
+        hsv = np.uint8([[[teinte, 200, 255]]])
+        return tuple(int(v) for v in cv2.cvtColor(hsv, cv2.COLOR_HSV2BGR)[0, 0])
 
     def sauvegarder_pointage(self, nom, confidence=1.0):
         """Sauvegarde des pointages"""
@@ -242,24 +422,16 @@ class SystemeReconnaissanceFaciale:
         }
         
         try:
-            pointages = []
-            if os.path.exists(self.pointages_file):
-                with open(self.pointages_file, 'r') as f:
-                    pointages = json.load(f)
-            
-            # Anti-doublon pour la même personne
-            derniers_pointages_personne = [p for p in pointages[-10:] if p['agent'] == nom]
-            if derniers_pointages_personne:
-                dernier = derniers_pointages_personne[-1]
-                if time.time() - dernier['timestamp'] < 25:
+            with self.verrou_pointages:
+                # Anti-doublon en mémoire par agent (25 s), indépendant du trafic
+                if self.anti_doublon.est_doublon(nom, pointage['timestamp']):
                     return
             
-            pointages.append(pointage)
-            
-            with open(self.pointages_file, 'w') as f:
-                json.dump(pointages, f, indent=2)
+                # Ajout en fin de stockage (coût constant)
+                self.stockage.ajouter(pointage)
+                self.anti_doublon.enregistrer(nom, pointage['timestamp'])
             
-            print(f"✅ POINTAGE: {nom} à {pointage['heure']} (confiance: {confidence:.2f})")
+                print(f"✅ POINTAGE: {nom} à {pointage['heure']} (confiance: {confidence:.2f})")
             
         except Exception as e:
             print(f"❌ Erreur sauvegarde: {e}")
@@ -269,101 +441,162 @@ class SystemeReconnaissanceFaciale:
         print("🎯 MANGUI FI - SYSTÈME 7 PERSONNES")
         print("=" * 50)
         
-        if self.references_encodings:
+        if self.chargement_differe:
+            print("⏳ Modèles en chargement - Aperçu caméra en attendant")
+        elif len(self.references_encodings):
             print(f"✅ {len(self.references_encodings)} personnes chargées")
         else:
             print("⚠️  Aucune référence chargée - Mode détection seulement")
         
+        if self.chargement_differe and self.prechargement is None:
+            # dlib chargé pendant l'ouverture de la caméra et les premières frames
+            self.prechargement = PrechargementModeles(self.charger_references_multiple, self.chronologie).demarrer()
+        
         cap = self.initialiser_camera()
         if cap is None:
             print("❌ Impossible de démarrer sans caméra")
             return
         
         print("✅ Système initialisé")
-        print("📍 Contrôles: Q=Quitter, P=Pointage, S=Stats, L=Liste personnes")
+        print("📍 Contrôles: Q=Quitter, P=Pointage, S=Stats, L=Liste personnes, M=Mesures")
         print("👀 Vérifiez l'affichage de la caméra...")
         
         time.sleep(1)
         
+        if self.sans_affichage or self.socket_commandes:
+            self.commandes = LecteurCommandes(stdin=self.sans_affichage,
+                                              chemin_socket=self.socket_commandes).demarrer()
+        
+        # Étage 1 : capture sur son propre thread (seule la frame la plus récente est gardée)
+        capture = CaptureThreadee(cap, mesures=self.mesures).demarrer()
+        # Étage 2 : reconnaissance sur un thread dédié, sur la frame la plus fraîche
+        travailleur = TravailleurReconnaissance(capture, self.detecter_et_reconnaitre,
+                                                pas=lambda: self.frame_skip,
+                                                mesures=self.mesures).demarrer()
+        
         try:
+            sequence = 0
+            # Étage 3 : affichage au rythme de la caméra (sans écran : au rythme de la reconnaissance)
             while True:
-                debut = time.time()
-                
-                # Capture frame
-                ret, frame = cap.read()
-                if not ret:
-                    print("❌ Erreur capture - Caméra déconnectée?")
-                    break
+                if self.sans_affichage:
+                    # Ni frame à afficher, ni rendu, ni waitKey : le CPU reste à la reconnaissance
+                    resultat = travailleur.attendre_resultat(timeout=0.2)
+                    if resultat is None and not capture.actif:
+                        print("❌ Capture arrêtée - Caméra déconnectée ou fin de la source?")
+                        break
+                else:
+                    sequence, frame = capture.lire(sequence, demander=False)
+                    if frame is None:
+                        if not capture.actif:
+                            print("❌ Erreur capture - Caméra déconnectée?")
+                            break
+                        continue
                 
-                if frame is None or frame.size == 0:
-                    print("❌ Image vide de la caméra")
-                    continue
+                    if frame.size == 0:
+                        print("❌ Image vide de la caméra")
+                        continue
                 
-                # Traitement tous les N frames
-                if self.compteur_frames % self.frame_skip == 0:
-                    try:
-                        face_locations, noms = self.detecter_et_reconnaitre(frame)
-                        
-                        if face_locations:
-                            self.derniers_visages = face_locations
-                            self.derniers_noms = noms
-                            self.derniere_detection = time.time()
-                        else:
-                            if time.time() - self.derniere_detection > 2.0:
-                                self.derniers_visages = []
-                                self.derniers_noms = []
-                                
-                    except Exception as e:
-                        print(f"⚠️  Erreur traitement: {e}")
+                    # Dernier résultat publié par le thread de reconnaissance
+                    resultat = travailleur.prendre_resultat()
                 
-                # Affichage
-                self.afficher_resultats(frame)
+                if resultat is not None:
+                    _, (face_locations, noms) = resultat
+                    self.appliquer_resultats(face_locations, noms)
                 
-                # Contrôles
-                key = cv2.waitKey(1) & 0xFF
-                if key == ord('q'):
+                # Contrôles : clavier de la fenêtre, stdin ou socket locale
+                commande = self.commandes.prendre() if self.commandes else None
+                if not self.sans_affichage:
+                    # Affichage (sur une copie : la frame est partagée avec la reconnaissance)
+                    self.afficher_resultats(frame.copy())
+                    
+                    # Clavier de la fenêtre
+                    with self.mesures.mesurer('waitkey'):
+                        key = cv2.waitKey(1) & 0xFF
+                    if key != 255:
+                        commande = chr(key)
+                if commande and not self.executer_commande(commande):
                     break
-                elif key == ord('p'):
-                    self.pointage_manuel()
-                elif key == ord('s'):
-                    self.afficher_statistiques()
-                elif key == ord('l'):
-                    self.afficher_liste_personnes()
                 
+                if self.sans_affichage and resultat is None:
+                    continue
                 self.compteur_frames += 1
+                if self.compteur_frames == 1:
+                    self.chronologie.marquer('premiere_frame', "Première frame")
+                self.mesures.compter('affichage')
+                self.mesures.exporter_si_necessaire()
                 
                 if self.compteur_frames % 100 == 0:
-                    print(f"📊 Frame {self.compteur_frames} - Système actif")
-                
-                temps_frame = time.time() - debut
-                if temps_frame < 0.1:
-                    time.sleep(0.1 - temps_frame)
+                    print(f"📊 Frame {self.compteur_frames} - Système actif "
+                          f"({self.mesures.fps('affichage'):.1f} FPS affichage, "
+                          f"{self.mesures.fps('reconnaissance'):.1f} FPS reconnaissance)")
                     
         except KeyboardInterrupt:
             print("\n🛑 Arrêt demandé")
         except Exception as e:
             print(f"❌ Erreur système: {e}")
         finally:
+            travailleur.arreter()
+            capture.arreter()
             cap.release()
-            cv2.destroyAllWindows()
-            cv2.waitKey(1)
+            if self.pool_encodage is not None:
+                self.pool_encodage.fermer()
+            self.stockage.fermer()
+            self.mesures.exporter_si_necessaire(force=True)
+            self.chronologie.afficher()
+            if self.commandes:
+                self.commandes.arreter()
+            if not self.sans_affichage:
+                cv2.destroyAllWindows()
+                cv2.waitKey(1)
             print("👋 Système arrêté")
 
+    def executer_commande(self, commande):
+        """Commande clavier ou distante (q, p, s, m, l) ; retourne False pour quitter"""
+        if commande == 'q':
+            return False
+        elif commande == 'p':
+            self.pointage_manuel()
+        elif commande == 's':
+            self.afficher_statistiques()
+        elif commande == 'm':
+            self.afficher_mesures = not self.afficher_mesures
+            self.mesures.afficher()
+        elif commande == 'l':
+            self.afficher_liste_personnes()
+        return True
+
+    def appliquer_resultats(self, face_locations, noms):
+        """Met à jour les détections affichées avec le dernier résultat de reconnaissance"""
+        if face_locations:
+            self.derniers_visages = face_locations
+            self.derniers_noms = noms
+            self.derniere_detection = time.time()
+        else:
+            if time.time() - self.derniere_detection > 2.0:
+                self.derniers_visages = []
+                self.derniers_noms = []
+
     def afficher_resultats(self, frame):
         """Affiche les résultats avec gestion d'erreur d'affichage"""
         try:
-            # Dessiner les rectangles de détection
-            for (top, right, bottom, left), (nom, couleur) in zip(self.derniers_visages, self.derniers_noms):
-                cv2.rectangle(frame, (left, top), (right, bottom), couleur, 2)
-                cv2.rectangle(frame, (left, bottom - 35), (right, bottom), couleur, cv2.FILLED)
-                cv2.putText(frame, nom, (left + 6, bottom - 6), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
-            
-            # Interface utilisateur
-            self.afficher_interface(frame)
+            with self.mesures.mesurer('dessin'):
+                # Dessiner les rectangles de détection
+                for (top, right, bottom, left), (nom, couleur) in zip(self.derniers_visages, self.derniers_noms):
+                    cv2.rectangle(frame, (left, top), (right, bottom), couleur, 2)
+                    cv2.rectangle(frame, (left, bottom - 35), (right, bottom), couleur, cv2.FILLED)
+                    cv2.putText(frame, nom, (left + 6, bottom - 6), 
+                               cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+                
+                # Interface utilisateur
+                self.afficher_interface(frame)
+                
+                # Latences par étape (touche M)
+                if self.afficher_mesures:
+                    self.mesures.dessiner(frame)
             
             # AFFICHAGE PRINCIPAL
-            cv2.imshow(self.nom_fenetre, frame)
+            with self.mesures.mesurer('imshow'):
+                cv2.imshow(self.nom_fenetre, frame)
             
         except Exception as e:
             print(f"❌ Erreur affichage: {e}")
@@ -375,15 +608,11 @@ class SystemeReconnaissanceFaciale:
         noms = [nom for nom, _ in self.derniers_noms]
         
         # En-tête semi-transparente
-        overlay = frame.copy()
-        cv2.rectangle(overlay, (0, 0), (w, 80), (0, 0, 0), -1)
-        alpha = 0.7
-        cv2.addWeighted(overlay, alpha, frame, 1 - alpha, 0, frame)
+        self.hud.assombrir(frame, 0, 80, 0.7)
         
         # Statut références
         statut_ref = f"PERSONNES: {len(self.references_encodings)}/7"
-        cv2.putText(frame, statut_ref, (10, 20),
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+        self.hud.texte(frame, statut_ref, (10, 20), 0.5, (255, 255, 255), 1)
         
         # Statut principal
         if nb_visages > 0:
@@ -401,20 +630,18 @@ class SystemeReconnaissanceFaciale:
             statut = "EN ATTENTE DE DETECTION..."
             couleur_statut = (255, 255, 255)
         
-        cv2.putText(frame, "MANGUI FI - 7 PERSONNES", (10, 45),
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
-        cv2.putText(frame, statut, (10, 70),
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.5, couleur_statut, 1)
+        if not self.modeles_prets():
+            statut, couleur_statut = self.statut_modeles()
+        
+        self.hud.texte(frame, "MANGUI FI - 7 PERSONNES", (10, 45), 0.6, (255, 255, 255), 1)
+        self.hud.texte(frame, statut, (10, 70), 0.5, couleur_statut, 1)
         
         # Informations
         info_text = f"Frame: {self.compteur_frames} | Visages: {nb_visages}"
-        cv2.putText(frame, info_text, (w - 250, 20),
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 255, 255), 1)
+        self.hud.texte(frame, info_text, (w - 250, 20), 0.4, (255, 255, 255), 1)
         
         # Pied de page
-        cv2.rectangle(frame, (0, h-30), (w, h), (0, 0, 0), -1)
-        cv2.putText(frame, "Q=Quitter  P=Pointage  S=Stats  L=Liste", (10, h-10),
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 255, 255), 1)
+        self.hud.bandeau(frame, h-30, h, [("Q=Quitter  P=Pointage  S=Stats  L=Liste  M=Mesures", (10, h-10), 0.4, (255, 255, 255))])
 
     def pointage_manuel(self):
         """Pointage manuel"""
@@ -435,28 +662,24 @@ class SystemeReconnaissanceFaciale:
     def afficher_statistiques(self):
         """Affiche les statistiques"""
         try:
-            if os.path.exists(self.pointages_file):
-                with open(self.pointages_file, 'r') as f:
-                    pointages = json.load(f)
-                
-                aujourd_hui = datetime.now().strftime("%Y-%m-%d")
-                pointages_auj = [p for p in pointages if p['date'] == aujourd_hui]
-                
+            aujourd_hui = datetime.now().strftime("%Y-%m-%d")
+            stats = self.stockage.statistiques(aujourd_hui, n_derniers=5)
+            if stats['total']:
                 print(f"\n📊 STATISTIQUES MANGUI FI:")
-                print(f"   Pointages aujourd'hui: {len(pointages_auj)}")
-                print(f"   Total historique: {len(pointages)}")
+                print(f"   Pointages aujourd'hui: {stats['jour']}")
+                print(f"   Total historique: {stats['total']}")
                 
                 # Statistiques par personne
-                if pointages_auj:
+                if stats['jour']:
                     print(f"   Détail aujourd'hui:")
                     for personne in self.noms_references:
-                        count = len([p for p in pointages_auj if p['agent'] == personne])
+                        count = stats['par_agent'].get(personne, 0)
                         if count > 0:
                             print(f"     - {personne}: {count} pointages")
                 
-                if pointages_auj:
+                if stats['jour']:
                     print(f"   Derniers pointages:")
-                    for p in pointages_auj[-5:]:
+                    for p in stats['derniers']:
                         print(f"     - {p['heure']} ({p['agent']})")
             else:
                 print("📊 Aucun pointage enregistré")
@@ -479,6 +702,32 @@ class SystemeReconnaissanceFaciale:
 
 # Lancement du système
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="MANGUI FI - Système 7 Personnes")
+    parser.add_argument('--sans-affichage', action='store_true',
+                        help="terminal sans écran : ni fenêtre ni rendu, commandes lues sur stdin")
+    parser.add_argument('--socket', default=None,
+                        help="socket Unix locale pour les commandes (ex. /tmp/manguifi.sock)")
+    parser.add_argument('--source', default=None,
+                        help="camera, camera:1, video.mp4, rtsp://..., dossier/ ou synthetique:dossier/")
+    parser.add_argument('--latence-cible', type=float, default=150,
+                        help="p95 visé en ms pour la détection, réglage automatique (0 = réglages fixes)")
+    parser.add_argument('--galerie', default=None,
+                        help="galerie écrite par enrolement.py au lieu des photos de référence fixes")
+    parser.add_argument('--processus', type=int, default=0,
+                        help="encodages répartis sur N processus (0 = dans le thread de reconnaissance)")
+    parser.add_argument('--stockage', choices=('journal', 'sqlite'), default='journal',
+                        help="pointages en journal JSON Lines ou en base SQLite indexée (WAL)")
+    args = parser.parse_args()
+    
     print("🚀 Démarrage MANGUI FI - Système 7 Personnes...")
-    systeme = SystemeReconnaissanceFaciale()
+    systeme = SystemeReconnaissanceFaciale(source=args.source, fichier_galerie=args.galerie,
+                                          chargement_differe=True, backend_pointages=args.stockage)
+    systeme.sans_affichage = args.sans_affichage
+    systeme.socket_commandes = args.socket
+    systeme.controleur.latence_cible = args.latence_cible / 1000.0
+    systeme.controleur.actif = args.latence_cible > 0
+    if args.processus > 0:
+        # Processus lancés par forkserver (le journal des pointages a déjà son thread) ; chacun importe
+        # et chauffe ses modèles pendant que le préchargement du processus principal tourne
+        systeme.pool_encodage = PoolEncodage(args.processus, taille_max=systeme.taille_affichage)
     systeme.executer()